@@ -1,13 +1,51 @@
 from flask import Flask, render_template, request, jsonify
+from algosdk.v2client import algod
+from backend.services.blockFollower import Subscription
 from backend.services.chadExchangeService import ChadExchangeService
-from backend.services.priceAPI.coingeckoPriceAPI import CoingeckoPriceAPI
+from backend.services.keyPair import KeyPair
+from backend.services.priceAPI.priceService import PriceService
+from backend.services.quoteEngine import QuoteEngine
+from typing import Optional
 import json
+import os
 import backend.chadServer.models as models
 
 app = Flask(__name__)
 
-# Create the exchange service
-# exchange = ChadExchangeService
+# Quotes follow the escrow's minimum swap size, 20 CHAD unless configured
+minChadTxThresh = int(os.environ.get("CHAD_MIN_TX_THRESH", 20000000))
+quoteEngine = QuoteEngine(minChadTxThresh=minChadTxThresh)
+
+def exchangeFromEnv() -> Optional[ChadExchangeService]:
+    """
+    Exchange given by CHAD_ADMIN_ADDR and CHAD_ID on the algod at CHAD_ALGOD_ADDRESS,
+    or None if not configured. The server only watches the escrow, so no admin key
+    is needed
+    """
+    adminAddr = os.getenv("CHAD_ADMIN_ADDR")
+    chadID = os.getenv("CHAD_ID")
+    if adminAddr is None or chadID is None:
+        return None
+
+    client = algod.AlgodClient(
+        algod_token=os.getenv("CHAD_ALGOD_TOKEN", "a" * 64),
+        algod_address=os.getenv("CHAD_ALGOD_ADDRESS", "http://localhost:4001")
+    )
+    appID = os.getenv("CHAD_APP_ID")
+    return ChadExchangeService(
+        client, KeyPair(pubKey=adminAddr, privKey=None), minChadTxThresh, int(chadID),
+        appID=int(appID) if appID is not None else None
+    )
+
+def followExchange(exchange: ChadExchangeService) -> Subscription:
+    """
+    Count the exchange's confirmed swaps in the /candles volume
+    """
+    return PriceService.instance().candles.follow(exchange)
+
+exchange = exchangeFromEnv()
+if exchange is not None:
+    followExchange(exchange)
 
 @app.route("/")
 def hello_world():
@@ -18,14 +56,51 @@ def getPrice():
     """
     Returns the current algo price in NZD
     """
-    api = CoingeckoPriceAPI()
-    priceData = api.requestAlgoPrice()
+    priceData = PriceService.instance().requestAlgoPrice()
     print(priceData.price)
     schema = models.PriceReturnSchema()
     res = jsonify(schema.dumps(priceData))
     res.headers.add('Access-Control-Allow-Origin', '*')
     return res
 
+@app.route("/candles", methods=["GET"])
+def candles():
+    """
+    OHLC candles of the algo price in NZD with swap volume in uAlgo, e.g.
+    /candles?interval=5m&start=1700000000&end=1700086400&limit=288
+    """
+    try:
+        start = request.args.get("start", type=float)
+        end = request.args.get("end", type=float)
+        limit = request.args.get("limit", type=int)
+        res = jsonify(PriceService.instance().candles.query(request.args.get("interval", "1m"), start, end, limit))
+    except ValueError as e:
+        res = jsonify({"error": str(e)})
+        res.status_code = 400
+
+    res.headers.add('Access-Control-Allow-Origin', '*')
+    return res
+
+@app.route("/quoteLadder", methods=["GET"])
+def quoteLadder():
+    """
+    Quote a comma separated list of amounts (whole Algo or CHAD) in one pass, e.g.
+    /quoteLadder?action=swapAlgoForChad&chadsPerAlgo=3&amounts=1,5,10,50
+    """
+    try:
+        action = request.args.get("action", "swapAlgoForChad")
+        chadsPerAlgo = float(request.args["chadsPerAlgo"])
+        amounts = [float(amount) for amount in request.args["amounts"].split(",")]
+        ladder = quoteEngine.ladder(action, amounts, chadsPerAlgo)
+    except (KeyError, ValueError) as e:
+        res = jsonify({"error": str(e)})
+        res.status_code = 400
+    else:
+        res = jsonify(ladder.toDict())
+
+    res.headers.add('Access-Control-Allow-Origin', '*')
+    return res
+
 @app.route("/createBuyChadTx", methods=["POST"])
 def handleBuyChadTx():
     """
@@ -35,9 +110,8 @@ def handleBuyChadTx():
     schema = models.BuyChadRequestSchema()
     req = schema.load(json.loads(request.data))
     
-    # Get the current algo per chad rate
-    api = CoingeckoPriceAPI()
-    price = api.requestAlgoPrice()
+    # Swaps are approved at the time weighted price, so one bad sample can't set the rate
+    price = PriceService.instance().requestSmoothedPrice()
     print(price.success)
     print(price.price)
  
@@ -1,4 +1,5 @@
 from pyteal import *
+from backend.contracts.chadExchangeApp import ChadExchangeApp
 
 class ChadExchangeASC1:
     """
@@ -12,23 +13,104 @@ class ChadExchangeASC1:
     - Withdraw CHAD
     """
 
-    def __init__(self, adminAddr: str, chadID: int, minChadTxThresh: int):
+    # Order the Cond in program() tests each action in
+    defaultBranchOrder = ["optIn", "withdrawAlgo", "withdrawChad", "swapAlgoForChad", "swapChadForAlgo"]
+
+    # Price attestation passed as LogicSig arg 0: rate (8) | expiry round (8) | exchange address (32)
+    attestationLength = 48
+
+    # Most swaps a batched group can carry, each a buyer payment and escrow payout pair
+    maxBatchSwaps = 5
+
+    def __init__(self, adminAddr: str, chadID: int, minChadTxThresh: int, branchOrder: list = None,
+                 appID: int = None, attested: bool = False, batched: bool = False, salt: int = 0):
         self.adminAddr = adminAddr
         self.chadID = chadID
         self.minChadTxThresh = minChadTxThresh
+        self.branchOrder = list(branchOrder) if branchOrder is not None else None
+        self.appID = appID
+        self.attested = attested
+        self.batched = batched
+        self.salt = salt
+
+        if appID is not None and attested:
+            raise ValueError("Swaps are approved either by the exchange app or by attestation, not both")
+        if batched and (appID is not None or attested):
+            raise ValueError("Batched swaps share one admin approval transaction")
+
+        if salt < 0:
+            raise ValueError("salt must not be negative")
+        if self.branchOrder is not None and sorted(self.branchOrder) != sorted(self.defaultBranchOrder):
+            raise ValueError(f"branchOrder must be a permutation of {self.defaultBranchOrder}")
 
     def program(self):
+        branches = {
+            "optIn": [self.isOptIn(), self.handleOptIn()],
+            "withdrawAlgo": [self.isWithdrawAlgo(), self.handleWithdrawAlgo()],
+            "withdrawChad": [self.isWithdrawChad(), self.handleWithdrawChad()],
+            "swapAlgoForChad": [self.isSwapAlgoForChad(), self.handleSwapAlgoForChad()],
+            "swapChadForAlgo": [self.isSwapChadForAlgo(), self.handleSwapChadForAlgo()],
+        }
+
         actions = Cond(
-            [self.isOptIn(), self.handleOptIn()],
-            [self.isWithdrawAlgo(), self.handleWithdrawAlgo()],
-            [self.isWithdrawChad(), self.handleWithdrawChad()],
-            [self.isSwapAlgoForChad(), self.handleSwapAlgoForChad()],
-            [self.isSwapChadForAlgo(), self.handleSwapChadForAlgo()],
+            *[branches[name] for name in (self.branchOrder or self.defaultBranchOrder)],
             [Int(1), Int(0)]    # Fail if none of the criteria are met
         )
 
+        if self.salt:
+            # Only changes the program bytes, and so the escrow address, of a shard
+            return Seq([Pop(Int(self.salt)), actions])
+
         return actions
 
+    @property
+    def swapGroupSize(self) -> int:
+        """
+        Attested swaps carry their rate approval in the LogicSig, so have no third
+        approval transaction
+        """
+        return 2 if self.attested else 3
+
+    def isSwapGroup(self, predicate: Expr):
+        """
+        Returns predicate for a swap sized group. Gtxn fields can't be read beyond the
+        group, so the size check must guard the predicate rather than be And-ed with
+        it. The default program rejects outright on any other size, which only matches
+        falling through while the swaps are tested last, so reordered programs fall
+        through instead
+        """
+        otherwise = Return(Int(0)) if self.branchOrder is None else Int(0)
+        if self.batched:
+            isGroup = And(
+                Global.group_size() % Int(2) == Int(1),                         # Swap pairs plus approval
+                Global.group_size() >= Int(3),
+                Global.group_size() <= Int(2 * self.maxBatchSwaps + 1),
+                Txn.group_index() % Int(2) == Int(1),                           # Escrow signs a payout
+            )
+        else:
+            isGroup = Global.group_size() == Int(self.swapGroupSize)
+
+        return If(isGroup).Then(predicate).Else(otherwise)
+
+    def buyerLeg(self):
+        """
+        Buyer's payment into the escrow. In a batched group each swap is a pair of
+        transactions at (i - 1, i) where i is the escrow payout
+        """
+        return Gtxn[Txn.group_index() - Int(1)] if self.batched else Gtxn[0]
+
+    def payoutLeg(self):
+        """
+        Escrow's payout to the buyer
+        """
+        return Gtxn[Txn.group_index()] if self.batched else Gtxn[1]
+
+    def approvalLeg(self):
+        """
+        Rate approval, last in a batched group
+        """
+        return Gtxn[Global.group_size() - Int(1)] if self.batched else Gtxn[2]
+
     def isOptIn(self):
         """
         Returns true if the transaction is opting the contract into
@@ -50,14 +132,12 @@ class ChadExchangeASC1:
         3. Approval 0 algo tx from admin approving exchange rate
         """
 
-        return (If(Global.group_size() == Int(3)).Then(
+        return self.isSwapGroup(
             And(
-                Gtxn[0].type_enum() == TxnType.Payment,             # First tx is payment
-                Gtxn[1].type_enum() == TxnType.AssetTransfer       # Second tx is asset transfer
+                self.buyerLeg().type_enum() == TxnType.Payment,             # First tx is payment
+                self.payoutLeg().type_enum() == TxnType.AssetTransfer       # Second tx is asset transfer
             )
-        ).Else(
-            Return(Int(0))
-        ))
+        )
         
     def isSwapChadForAlgo(self):
         """
@@ -66,13 +146,11 @@ class ChadExchangeASC1:
         2. Payment of algo from contract to user
         3. Approval 0 algo tx from admin approving exchange rate
         """
-        return If(Global.group_size() == Int(3)).Then(
+        return self.isSwapGroup(
             And(
-                Gtxn[0].type_enum() == TxnType.AssetTransfer,       # First tx is asset transfer
-                Gtxn[1].type_enum() == TxnType.Payment,             # Second tx is payment
+                self.buyerLeg().type_enum() == TxnType.AssetTransfer,       # First tx is asset transfer
+                self.payoutLeg().type_enum() == TxnType.Payment,             # Second tx is payment
             )
-        ).Else(
-            Return(Int(0))
         )
 
     def isWithdrawAlgo(self):
@@ -117,40 +195,110 @@ class ChadExchangeASC1:
         """
 
         return And(
-            Gtxn[0].fee() <= Int(1000),                           # Appropriate fee
-            Gtxn[0].receiver() == Gtxn[1].sender(),             # Check valid swap
-            Gtxn[1].asset_receiver() == Gtxn[0].sender(),       # Sending asset to correct account
-            Gtxn[1].xfer_asset() == Int(self.chadID),                # Correct asset
-            Gtxn[1].fee() <= Int(1000),                         # Appropriate fee
-            Gtxn[1].asset_sender() == Global.zero_address(),    # No clawback address
-            Gtxn[1].asset_close_to() == Global.zero_address(),  # Prevent close-to
-            Gtxn[1].rekey_to() == Global.zero_address(),        # Prevent rekey
-            Gtxn[1].asset_amount() >= Int(self.minChadTxThresh), # Above min swap size 
-            Gtxn[2].type_enum() == TxnType.Payment,             # Third transaction is payment
-            Gtxn[2].sender() == Addr(self.adminAddr),                 # Third transaction from admin
-            Gtxn[2].amount() == Int(0),                         # Amount is 0
-            Gtxn[2].fee() <= Int(1000)                          # Fee is sensible
+            self.buyerLeg().fee() <= Int(1000),                           # Appropriate fee
+            self.buyerLeg().receiver() == self.payoutLeg().sender(),             # Check valid swap
+            self.payoutLeg().asset_receiver() == self.buyerLeg().sender(),       # Sending asset to correct account
+            self.payoutLeg().xfer_asset() == Int(self.chadID),                # Correct asset
+            self.payoutLeg().fee() <= Int(1000),                         # Appropriate fee
+            self.payoutLeg().asset_sender() == Global.zero_address(),    # No clawback address
+            self.payoutLeg().asset_close_to() == Global.zero_address(),  # Prevent close-to
+            self.payoutLeg().rekey_to() == Global.zero_address(),        # Prevent rekey
+            self.payoutLeg().asset_amount() >= Int(self.minChadTxThresh), # Above min swap size 
+            *self.swapApproval("swapAlgoForChad")
         )
 
     def handleSwapChadForAlgo(self):
 
         return And(
-            Gtxn[0].fee() <= Int(1000),                           # Appropriate fee
-            Gtxn[0].xfer_asset() == Int(self.chadID),                # Correct asset
-            Gtxn[0].asset_amount() >= Int(self.minChadTxThresh), # Above min swap size 
-            Gtxn[0].asset_sender() == Global.zero_address(),    # No clawback address
-            Gtxn[0].asset_close_to() == Global.zero_address(),  # Prevent close-to
-            Gtxn[0].rekey_to() == Global.zero_address(),        # Prevent rekey
-            Gtxn[1].receiver() == Gtxn[0].sender(),             # Sending algo to correct account
-            Gtxn[1].fee() <= Int(1000),                         # Appropriate fee
-            Gtxn[1].close_remainder_to() == Global.zero_address(),   # Prevent close remainder to
-            Gtxn[1].rekey_to() == Global.zero_address(),             # Prevent rekey
-            Gtxn[2].type_enum() == TxnType.Payment,             # Third transaction is payment
-            Gtxn[2].sender() == Addr(self.adminAddr),                 # Third transaction from admin
-            Gtxn[2].amount() == Int(0),                         # Amount is 0
-            Gtxn[2].fee() <= Int(1000)                          # Fee is sensible
+            self.buyerLeg().fee() <= Int(1000),                           # Appropriate fee
+            self.buyerLeg().xfer_asset() == Int(self.chadID),                # Correct asset
+            self.buyerLeg().asset_amount() >= Int(self.minChadTxThresh), # Above min swap size 
+            self.buyerLeg().asset_sender() == Global.zero_address(),    # No clawback address
+            self.buyerLeg().asset_close_to() == Global.zero_address(),  # Prevent close-to
+            self.buyerLeg().rekey_to() == Global.zero_address(),        # Prevent rekey
+            self.payoutLeg().receiver() == self.buyerLeg().sender(),             # Sending algo to correct account
+            self.payoutLeg().fee() <= Int(1000),                         # Appropriate fee
+            self.payoutLeg().close_remainder_to() == Global.zero_address(),   # Prevent close remainder to
+            self.payoutLeg().rekey_to() == Global.zero_address(),             # Prevent rekey
+            *self.swapApproval("swapChadForAlgo")
         )
 
+    def swapApproval(self, action: str):
+        """
+        Conditions approving the rate of a swap. By default the third transaction is a
+        0 algo payment signed by the admin. With an appID it is a call to the exchange
+        app, which checks the swap against the rate in its global state. Attested
+        swaps check the payout against a rate signed by the admin once per price tick
+        """
+        if self.attested:
+            return [*self.swapLegs(action), *self.isAttestedRate(action)]
+
+        if self.appID is None:
+            if self.batched and action == "swapChadForAlgo":
+                return [
+                    self.buyerLeg().asset_receiver() == Txn.sender(),       # Chads are paid to the escrow
+                    *self.adminApproval()
+                ]
+
+            return self.adminApproval()
+
+        return [
+            *self.swapLegs(action),
+            self.approvalLeg().type_enum() == TxnType.ApplicationCall,     # Third transaction is app call
+            self.approvalLeg().application_id() == Int(self.appID),        # Call to the exchange app
+            self.approvalLeg().on_completion() == OnComplete.NoOp,         # Plain call
+            self.approvalLeg().fee() <= Int(1000)                          # Fee is sensible
+        ]
+
+    def adminApproval(self):
+        """
+        0 algo payment from the admin approving the rate of every swap in the group
+        """
+        return [
+            self.approvalLeg().type_enum() == TxnType.Payment,             # Third transaction is payment
+            self.approvalLeg().sender() == Addr(self.adminAddr),                 # Third transaction from admin
+            self.approvalLeg().amount() == Int(0),                         # Amount is 0
+            self.approvalLeg().fee() <= Int(1000)                          # Fee is sensible
+        ]
+
+    def swapLegs(self, action: str):
+        """
+        Without an admin signing each swap group, the escrow must only sign the payout
+        (the second transaction) and the buyer's payment must be to the escrow, or a
+        group could have the escrow pay out on the buyer's leg
+        """
+        legs = [Txn.group_index() == Int(1)]                     # Escrow signs the payout
+        if action == "swapChadForAlgo":
+            legs.append(self.buyerLeg().asset_receiver() == Txn.sender())   # Chads are paid to the escrow
+
+        return legs
+
+    def isAttestedRate(self, action: str):
+        """
+        LogicSig args are [attestation, signature]. The attestation must be signed by
+        the admin for this program, name this escrow, outlive the payout transaction
+        and cover the amount paid out
+        """
+        attestation = Arg(0)
+        rate = ExtractUint64(attestation, Int(0))
+
+        if action == "swapAlgoForChad":
+            payoutOk = self.payoutLeg().asset_amount() <= WideRatio(
+                [self.buyerLeg().amount(), rate], [Int(ChadExchangeApp.RATE_SCALE)]
+            )
+        else:
+            payoutOk = self.payoutLeg().amount() <= WideRatio(
+                [self.buyerLeg().asset_amount(), Int(ChadExchangeApp.RATE_SCALE)], [rate]
+            )
+
+        return [
+            Len(attestation) == Int(self.attestationLength),
+            Extract(attestation, Int(16), Int(32)) == Txn.sender(),         # For this escrow
+            Txn.last_valid() <= ExtractUint64(attestation, Int(8)),          # Not expired
+            Ed25519Verify(attestation, Arg(1), Addr(self.adminAddr)),        # Signed by admin
+            payoutOk,                                                          # At the attested rate
+        ]
+
     def handleWithdrawAlgo(self):
         """
         Approve withdraw algo transaction
@@ -0,0 +1,130 @@
+from pyteal import *
+
+class ChadExchangeApp:
+    """
+    Exchange application holding the current CHAD/Algo rate in global state. A swap
+    group calls the app as its third transaction in place of the admin approval
+    payment, and the app checks the swap amounts against the stored rate. The admin
+    only signs a rate update once per price tick
+
+    Global state
+    - admin: address allowed to update the rate and manage the app
+    - chadID: ChadCoin ASA ID
+    - rate: uChads per uAlgo, scaled by RATE_SCALE
+    - rateRound: round the rate was last updated in, swaps fail once it is older
+      than maxRateAge
+    """
+
+    RATE_SCALE = 1000000
+    maxRateAge = 100        # [rounds] The admin republishes an unchanged rate before this
+
+    # Global state schema
+    numInts = 3
+    numBytes = 1
+
+    def __init__(self, chadID: int):
+        self.chadID = chadID
+
+    def approvalProgram(self):
+        onCreate = Seq([
+            App.globalPut(Bytes("admin"), Txn.sender()),
+            App.globalPut(Bytes("chadID"), Int(self.chadID)),
+            App.globalPut(Bytes("rate"), Btoi(Txn.application_args[0])),
+            App.globalPut(Bytes("rateRound"), Global.round()),
+            Return(Int(1))
+        ])
+
+        isAdmin = Txn.sender() == App.globalGet(Bytes("admin"))
+
+        actions = Cond(
+            [Txn.application_id() == Int(0), onCreate],
+            [Txn.on_completion() == OnComplete.DeleteApplication, Return(isAdmin)],
+            [Txn.on_completion() == OnComplete.UpdateApplication, Return(isAdmin)],
+            [Txn.on_completion() != OnComplete.NoOp, Return(Int(0))],
+            [Txn.application_args[0] == Bytes("setRate"), self.handleSetRate(isAdmin)],
+            [Txn.application_args[0] == Bytes("swapAlgoForChad"), Return(self.isValidSwapAlgoForChad())],
+            [Txn.application_args[0] == Bytes("swapChadForAlgo"), Return(self.isValidSwapChadForAlgo())],
+        )
+
+        return actions
+
+    def clearProgram(self):
+        return Return(Int(1))
+
+    def handleSetRate(self, isAdmin: Expr):
+        """
+        Admin sets the rate, args are ["setRate", rate]
+        """
+        return Seq([
+            Assert(isAdmin),
+            Assert(Btoi(Txn.application_args[1]) > Int(0)),
+            App.globalPut(Bytes("rate"), Btoi(Txn.application_args[1])),
+            App.globalPut(Bytes("rateRound"), Global.round()),
+            Return(Int(1))
+        ])
+
+    def isSwapGroup(self):
+        """
+        App call is the last of three transactions
+        """
+        return And(
+            Global.group_size() == Int(3),
+            Txn.group_index() == Int(2),
+        )
+
+    def isRateFresh(self):
+        """
+        Stored rate was set within the last maxRateAge rounds
+        """
+        return Global.round() - App.globalGet(Bytes("rateRound")) <= Int(self.maxRateAge)
+
+    def isValidSwapAlgoForChad(self):
+        """
+        Chads sent to the buyer are no more than the Algo paid at the stored rate
+        """
+        return And(
+            self.isSwapGroup(),
+            self.isRateFresh(),
+            Gtxn[0].type_enum() == TxnType.Payment,
+            Gtxn[1].type_enum() == TxnType.AssetTransfer,
+            Gtxn[1].xfer_asset() == App.globalGet(Bytes("chadID")),
+            Gtxn[1].asset_amount() <= WideRatio(
+                [Gtxn[0].amount(), App.globalGet(Bytes("rate"))], [Int(self.RATE_SCALE)]
+            ),
+        )
+
+    def isValidSwapChadForAlgo(self):
+        """
+        Algo sent to the seller is no more than the Chads paid at the stored rate
+        """
+        return And(
+            self.isSwapGroup(),
+            self.isRateFresh(),
+            Gtxn[0].type_enum() == TxnType.AssetTransfer,
+            Gtxn[1].type_enum() == TxnType.Payment,
+            Gtxn[0].xfer_asset() == App.globalGet(Bytes("chadID")),
+            Gtxn[1].amount() <= WideRatio(
+                [Gtxn[0].asset_amount(), Int(self.RATE_SCALE)], [App.globalGet(Bytes("rate"))]
+            ),
+        )
+
+    @staticmethod
+    def rateFor(chadsPerAlgo: float) -> int:
+        """
+        Fixed point rate stored in global state
+        """
+        return int(round(chadsPerAlgo * ChadExchangeApp.RATE_SCALE))
+
+    @staticmethod
+    def chadsFor(algoAmount: int, rate: int) -> int:
+        """
+        uChads paid out for algoAmount uAlgo, rounding as the app does
+        """
+        return algoAmount * rate // ChadExchangeApp.RATE_SCALE
+
+    @staticmethod
+    def algosFor(chadAmount: int, rate: int) -> int:
+        """
+        uAlgo paid out for chadAmount uChads, rounding as the app does
+        """
+        return chadAmount * ChadExchangeApp.RATE_SCALE // rate
@@ -1,16 +1,65 @@
 from pyteal import *
+from backend.teal.template import ProgramTemplate
 
 class DelegatedSignature:
     """
     Delegated signature transaction for floating exchange payments
     """
 
+    _algoTemplate = None
+    _chadTemplate = None
+
     @staticmethod
     def algoSig(exchangeAddr: str, noMoreThan: int):
         """
         Returns a TEAL delegated signature approval program for spending up to noMoreThan
         Algos
         """
+        return DelegatedSignature.algoSigTeal(Addr(exchangeAddr), Int(noMoreThan))
+
+    @staticmethod
+    def chadSig(exchangeAddr: str, noMoreThan: int, chadID: int):
+        """
+        Returns a TEAL delegated signature approval program for spending up to noMoreThan
+        Chads
+        """
+        return DelegatedSignature.chadSigTeal(Addr(exchangeAddr), Int(noMoreThan), Int(chadID))
+
+    @staticmethod
+    def algoSigProgram(exchangeAddr: str, noMoreThan: int) -> bytes:
+        """
+        Returns the bytecode of algoSig(exchangeAddr, noMoreThan), derived by patching
+        a program template compiled once per process
+        """
+        if DelegatedSignature._algoTemplate is None:
+            DelegatedSignature._algoTemplate = ProgramTemplate(DelegatedSignature.algoSigTeal(
+                Tmpl.Addr("TMPL_EXCHANGE_ADDR"), Tmpl.Int("TMPL_NO_MORE_THAN")
+            ))
+
+        return DelegatedSignature._algoTemplate.instantiate(
+            TMPL_EXCHANGE_ADDR=exchangeAddr, TMPL_NO_MORE_THAN=noMoreThan
+        )
+
+    @staticmethod
+    def chadSigProgram(exchangeAddr: str, noMoreThan: int, chadID: int) -> bytes:
+        """
+        Returns the bytecode of chadSig(exchangeAddr, noMoreThan, chadID), derived by
+        patching a program template compiled once per process
+        """
+        if DelegatedSignature._chadTemplate is None:
+            DelegatedSignature._chadTemplate = ProgramTemplate(DelegatedSignature.chadSigTeal(
+                Tmpl.Addr("TMPL_EXCHANGE_ADDR"), Tmpl.Int("TMPL_NO_MORE_THAN"), Tmpl.Int("TMPL_CHAD_ID")
+            ))
+
+        return DelegatedSignature._chadTemplate.instantiate(
+            TMPL_EXCHANGE_ADDR=exchangeAddr, TMPL_NO_MORE_THAN=noMoreThan, TMPL_CHAD_ID=chadID
+        )
+
+    @staticmethod
+    def algoSigTeal(exchangeAddr: Expr, noMoreThan: Expr):
+        """
+        Returns the algoSig TEAL for the given address and limit expressions
+        """
         actions = Cond(
             [DelegatedSignature.isAlgoTx(), DelegatedSignature.validateAlgoTx(exchangeAddr, noMoreThan)],
             [Int(1), Int(0)]    # Fail if none of the criteria are met
@@ -19,10 +68,9 @@ class DelegatedSignature:
         return compileTeal(actions, Mode.Signature, version=5)
 
     @staticmethod
-    def chadSig(exchangeAddr: str, noMoreThan: int, chadID: int):
+    def chadSigTeal(exchangeAddr: Expr, noMoreThan: Expr, chadID: Expr):
         """
-        Returns a TEAL delegated signature approval program for spending up to noMoreThan
-        Chads 
+        Returns the chadSig TEAL for the given address, limit and asset ID expressions
         """
         actions = Cond(
             [DelegatedSignature.isChadTx(chadID), DelegatedSignature.validateChadTx(exchangeAddr, noMoreThan)],
@@ -43,44 +91,44 @@ class DelegatedSignature:
         )
 
     @staticmethod
-    def isChadTx(chadID: int):
+    def isChadTx(chadID: Expr):
         """
         Returns true if the transaction is a ChadCoin transfer
         """
         return And(
             Global.group_size() == Int(1),                  # Single Tx
             Txn.type_enum() == TxnType.AssetTransfer,       # Type is asset tx
-            Txn.xfer_asset() == Int(chadID),                # Asset is ChadCoin
+            Txn.xfer_asset() == chadID,                     # Asset is ChadCoin
         )
 
     @staticmethod
-    def validateAlgoTx(exchangeAddr: str, noMoreThan: int):
+    def validateAlgoTx(exchangeAddr: Expr, noMoreThan: Expr):
         """
         Transaction is validated if
         - Receiver is chadcoin exchange address
         - Algo amount is no more than limit
-        - Generic security criteria is met 
+        - Generic security criteria is met
         """
         return And(
-            Txn.receiver() == Addr(exchangeAddr),               # Payment is to admin addr
+            Txn.receiver() == exchangeAddr,                     # Payment is to admin addr
             Txn.fee() <= Int(1000),                             # Fee is sensible
-            Txn.amount() <= Int(noMoreThan),                    # Amount is less than limit
+            Txn.amount() <= noMoreThan,                         # Amount is less than limit
             Txn.close_remainder_to() == Global.zero_address(),  # Prevent close remainder to
             Txn.rekey_to() == Global.zero_address()             # Prevent rekey
         )
 
     @staticmethod
-    def validateChadTx(exchangeAddr: str, noMoreThan: int):
+    def validateChadTx(exchangeAddr: Expr, noMoreThan: Expr):
         """
         Transaction is validated if
         - Receiver is chadcoin exchange address
         - Chad amount is no more than limit
-        - Generic security criteria is met 
+        - Generic security criteria is met
         """
         return And(
-            Txn.asset_receiver() == Addr(exchangeAddr),         # Payment is to admin addr
+            Txn.asset_receiver() == exchangeAddr,               # Payment is to admin addr
             Txn.fee() <= Int(1000),                             # Fee is sensible
-            Txn.asset_amount() <= Int(noMoreThan),              # Amount is less than limit
+            Txn.asset_amount() <= noMoreThan,                   # Amount is less than limit
             Txn.asset_close_to() == Global.zero_address(),      # Prevent close asset to
             Txn.rekey_to() == Global.zero_address()             # Prevent rekey
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,164 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from algosdk.v2client import algod
+from backend.services.blockFollower import BlockEvent, BlockFollower, Subscription
+
+
+@dataclass(frozen=True)
+class AccountState:
+    """
+    Balances of an account as of fetchedAt. assets holds the ASAs it has opted into
+    """
+
+    address: str
+    amount: int
+    minBalance: int
+    assets: Dict[int, int] = field(default_factory=dict)
+    fetchedAt: float = field(default_factory=time.monotonic)
+
+    @staticmethod
+    def fromAccountInfo(accountInfo: dict) -> "AccountState":
+        return AccountState(
+            address=accountInfo["address"],
+            amount=accountInfo.get("amount", 0),
+            minBalance=accountInfo.get("min-balance", 0),
+            assets={a["asset-id"]: a["amount"] for a in accountInfo.get("assets", [])},
+        )
+
+    @property
+    def spendable(self) -> int:
+        """
+        uAlgo that can leave the account without breaking its minimum balance
+        """
+        return max(self.amount - self.minBalance, 0)
+
+    def isOptedIn(self, assetID: int) -> bool:
+        return assetID in self.assets
+
+    def assetBalance(self, assetID: int) -> int:
+        return self.assets.get(assetID, 0)
+
+
+class AccountStateCache:
+    """
+    Account balances shared by everything using a client. Missing accounts are
+    fetched with concurrent account_info calls, and an entry is dropped as soon as
+    the BlockFollower publishes a confirmed transaction touching its address, or
+    after ttl in case a round was missed. A fetch that overlaps an invalidation is
+    returned to its caller but not cached, as it may predate the transaction
+    """
+
+    maxEntries = 10000
+    ttl = 30.0                  # [s] Upper bound on how stale an entry can get
+    fetchWorkers = 8            # Concurrent account_info calls per batch
+
+    _caches = weakref.WeakKeyDictionary()
+    _cachesLock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient):
+        self.client = client
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        self._states: "OrderedDict[str, AccountState]" = OrderedDict()
+        self._generation = 0        # Bumped by every invalidation
+        self._lock = threading.Lock()
+        self._subscription: Optional[Subscription] = None
+
+    @staticmethod
+    def forClient(client: algod.AlgodClient) -> "AccountStateCache":
+        """
+        Return the cache shared by everything using client
+        """
+        cache = AccountStateCache._caches.get(client)
+        if cache is None:
+            with AccountStateCache._cachesLock:
+                cache = AccountStateCache._caches.get(client)
+                if cache is None:
+                    cache = AccountStateCache(client)
+                    AccountStateCache._caches[client] = cache
+
+        return cache
+
+    def get(self, address: str) -> AccountState:
+        return self.getMany([address])[0]
+
+    def getMany(self, addresses: Iterable[str]) -> List[AccountState]:
+        """
+        States of addresses in order, fetching every missing or stale one in one batch
+        """
+        addresses = list(addresses)
+        now = time.monotonic()
+
+        with self._lock:
+            states = {}
+            for address in addresses:
+                state = self._states.get(address)
+                if state is not None and now - state.fetchedAt < self.ttl:
+                    self._states.move_to_end(address)
+                    states[address] = state
+
+            self.hits += len(states)
+
+        missing = [address for address in dict.fromkeys(addresses) if address not in states]
+        if missing:
+            self._ensureSubscribed()
+            self.misses += len(missing)
+            with self._lock:
+                generation = self._generation
+            for state in self._fetch(missing):
+                self._store(state, generation)
+                states[state.address] = state
+
+        return [states[address] for address in addresses]
+
+    def invalidate(self, address: str):
+        with self._lock:
+            # Bumped even without an entry, the address may be being fetched
+            self._generation += 1
+            if self._states.pop(address, None) is not None:
+                self.invalidations += 1
+
+    def _fetch(self, addresses: List[str]) -> List[AccountState]:
+        if len(addresses) == 1:
+            return [AccountState.fromAccountInfo(self.client.account_info(addresses[0]))]
+
+        with ThreadPoolExecutor(min(self.fetchWorkers, len(addresses))) as pool:
+            return [AccountState.fromAccountInfo(info) for info in pool.map(self.client.account_info, addresses)]
+
+    def _store(self, state: AccountState, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._states[state.address] = state
+            self._states.move_to_end(state.address)
+            while len(self._states) > self.maxEntries:
+                self._states.popitem(last=False)
+
+    def _ensureSubscribed(self):
+        with self._lock:
+            if self._subscription is None:
+                self._subscription = BlockFollower.forClient(self.client).subscribe(
+                    callback=self._onBlock, onError=self._onError
+                )
+
+    def _onError(self, error: Exception):
+        with self._lock:
+            if self._subscription is not None and self._subscription.dropped:
+                # Invalidations were missed, refetch everything and subscribe again
+                self._states.clear()
+                self._generation += 1
+                self._subscription = None
+
+    def _onBlock(self, event: BlockEvent):
+        for tx in event.transactions:
+            for address in tx.addresses:
+                self.invalidate(address)
@@ -0,0 +1,339 @@
+import base64
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, Iterable, List, Optional, Union
+
+import msgpack
+from algosdk import encoding
+from algosdk.v2client import algod
+from backend.services.suggestedParams import SuggestedParamsProvider
+
+
+# Transaction fields holding addresses an account is touched through
+_ADDRESS_FIELDS = ("snd", "rcv", "close", "arcv", "aclose", "asnd")
+
+
+@dataclass(frozen=True)
+class BlockTransaction:
+    """
+    A transaction confirmed in a block. txn holds the decoded transaction fields
+    under their msgpack keys ("snd", "rcv", "amt", ...)
+    """
+
+    txid: str
+    round: int
+    txn: dict
+
+    @property
+    def sender(self) -> str:
+        return encoding.encode_address(self.txn["snd"])
+
+    @property
+    def addresses(self) -> FrozenSet[str]:
+        return frozenset(
+            encoding.encode_address(self.txn[name]) for name in _ADDRESS_FIELDS if name in self.txn
+        )
+
+
+@dataclass(frozen=True)
+class BlockEvent:
+    """
+    Transactions of one round that matched a subscription. Every round is
+    published, even when no transaction matched
+    """
+
+    round: int
+    timestamp: int
+    transactions: List[BlockTransaction]
+
+
+class Subscription:
+    """
+    Bounded queue of block events for one consumer. The follower never waits on a
+    consumer: one that falls maxPending blocks behind is dropped, its iteration
+    ending with dropped set once it has read the queued events. Errors the follower
+    gives up retrying are raised from get and leave the subscription open
+    """
+
+    def __init__(self, follower: "BlockFollower", addresses: Optional[Iterable[str]], maxPending: int):
+        self.follower = follower
+        self.addresses = frozenset(addresses) if addresses is not None else None
+        self.closed = False
+        self.dropped = False
+
+        self._queue: "queue.Queue[Union[BlockEvent, Exception, None]]" = queue.Queue(maxPending)
+
+    def get(self, timeout: Optional[float] = None) -> BlockEvent:
+        """
+        Next block event. Raises queue.Empty on timeout, StopIteration once closed and
+        the follower's error if it can't reach algod
+        """
+        # A subscription dropped with a full queue gets no end marker
+        if self.closed and self._queue.empty():
+            raise StopIteration
+
+        item = self._queue.get(timeout=timeout)
+        if item is None:
+            raise StopIteration
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get()
+            except StopIteration:
+                return
+
+    def close(self):
+        self.follower.unsubscribe(self)
+
+    def _publish(self, item: Union[BlockEvent, Exception]):
+        if isinstance(item, BlockEvent) and self.addresses is not None:
+            item = BlockEvent(item.round, item.timestamp, [
+                tx for tx in item.transactions if not self.addresses.isdisjoint(tx.addresses)
+            ])
+
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            print(f"Dropping block subscriber {self._queue.maxsize} blocks behind")
+            self.dropped = True
+            self.close()
+
+    def _close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class BlockFollower:
+    """
+    Follows the chain one round at a time with status_after_block, fetches each
+    block once in msgpack form and publishes its transactions to every subscriber.
+    The last published round is checkpointed to disk when checkpointPath is set, so
+    a restarted process catches up on the rounds it missed
+    """
+
+    maxPending = 64             # [blocks] Default buffer per subscriber
+    maxCatchUp = 1000           # [rounds] Non-archival nodes keep about this many blocks
+    retryDelay = 1.0            # [s] Back off after algod errors
+    maxFailures = 5             # Consecutive algod errors before subscribers get the error
+
+    _followers = weakref.WeakKeyDictionary()
+    _followersLock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient, checkpointPath: Optional[str] = None):
+        self.client = client
+        self.checkpointPath = checkpointPath
+        self.latestRound = 0
+        self.blocksFetched = 0
+        self.failures = 0           # Consecutive algod errors
+
+        self._subscriptions: List[Subscription] = []
+        self._nextRound = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def forClient(client: algod.AlgodClient) -> "BlockFollower":
+        """
+        Return the follower shared by everything using client. It is checkpointed when
+        CHAD_BLOCK_CHECKPOINT names a file
+        """
+        follower = BlockFollower._followers.get(client)
+        if follower is None:
+            with BlockFollower._followersLock:
+                follower = BlockFollower._followers.get(client)
+                if follower is None:
+                    follower = BlockFollower(client, os.getenv("CHAD_BLOCK_CHECKPOINT"))
+                    BlockFollower._followers[client] = follower
+
+        return follower
+
+    def subscribe(self, addresses: Optional[Iterable[str]] = None,
+                  callback: Optional[Callable[[BlockEvent], None]] = None,
+                  maxPending: Optional[int] = None,
+                  onError: Optional[Callable[[Exception], None]] = None) -> Subscription:
+        """
+        Subscribe to new rounds, keeping only transactions that touch one of addresses
+        if given. With a callback, events are delivered on a thread of their own,
+        otherwise they are read from the returned subscription. onError is called on
+        that thread with the follower's error once algod has failed maxFailures times
+        in a row, and once more if the subscription is dropped for falling behind
+        """
+        subscription = Subscription(self, addresses, maxPending or BlockFollower.maxPending)
+
+        if callback is not None:
+            def consume():
+                while True:
+                    try:
+                        event = subscription.get()
+                    except StopIteration:
+                        break
+                    except Exception as e:
+                        if onError is not None:
+                            onError(e)
+                        continue
+
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        print(f"Block subscriber error: {e}")
+
+                if subscription.dropped and onError is not None:
+                    onError(ValueError("Block subscriber dropped after falling behind"))
+
+            threading.Thread(target=consume, name="BlockSubscriber", daemon=True).start()
+
+        with self._cond:
+            self._subscriptions.append(subscription)
+            self._ensureRunning()
+            self._cond.notify()
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._cond:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription._close()
+
+    def fetchBlock(self, round: int) -> BlockEvent:
+        """
+        Fetch and decode the block for round
+        """
+        raw = self.client.block_info(round, response_format="msgpack")
+        self.blocksFetched += 1
+        return BlockFollower.decodeBlock(raw)
+
+    @staticmethod
+    def decodeBlock(raw: bytes) -> BlockEvent:
+        """
+        Decode a msgpack block. Transactions in a block are stored without their
+        genesis hash and ID, which are restored to compute the txid
+        """
+        block = msgpack.unpackb(raw, raw=False, strict_map_key=False)["block"]
+        round = block.get("rnd", 0)
+
+        transactions = []
+        for stxn in block.get("txns", []):
+            txn = dict(stxn["txn"])
+            txn["gh"] = block["gh"]
+            if stxn.get("hgi"):
+                txn["gen"] = block["gen"]
+
+            transactions.append(BlockTransaction(BlockFollower.txid(txn), round, txn))
+
+        return BlockEvent(round, block.get("ts", 0), transactions)
+
+    @staticmethod
+    def txid(txn: dict) -> str:
+        """
+        Transaction ID of a decoded transaction
+        """
+        packed = base64.b64decode(encoding.msgpack_encode(txn))
+        digest = encoding.checksum(b"TX" + packed)
+        return base64.b32encode(digest).decode().strip("=")
+
+    def _ensureRunning(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="BlockFollower", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._subscriptions:
+                    self._cond.wait()
+
+                    # Rounds were not followed while idle
+                    self._nextRound = 0
+
+            try:
+                if self._nextRound == 0:
+                    self._nextRound = self._startRound()
+
+                # Returns at once while catching up, and without a new block on timeout
+                status = self.client.status_after_block(self._nextRound - 1)
+                if status.get("last-round", 0) < self._nextRound:
+                    continue
+
+                event = self.fetchBlock(self._nextRound)
+            except Exception as e:
+                print(f"Block follower error: {e}")
+                self.failures += 1
+                if self.failures % BlockFollower.maxFailures == 0:
+                    with self._cond:
+                        subscriptions = list(self._subscriptions)
+                    for subscription in subscriptions:
+                        subscription._publish(e)
+
+                time.sleep(BlockFollower.retryDelay)
+                continue
+
+            self.failures = 0
+
+            with self._cond:
+                subscriptions = list(self._subscriptions)
+
+            # Rounds fetched after the last subscriber left are not checkpointed
+            if not subscriptions:
+                continue
+
+            for subscription in subscriptions:
+                subscription._publish(event)
+
+            self._saveCheckpoint(event.round)
+            self.latestRound = event.round
+            self._nextRound = event.round + 1
+            SuggestedParamsProvider.forClient(self.client).notifyRound(event.round)
+
+    def _startRound(self) -> int:
+        """
+        Resume after the checkpoint, within maxCatchUp rounds of the chain, or start
+        from the latest round
+        """
+        lastRound = self.client.status().get("last-round")
+        checkpoint = self._loadCheckpoint()
+        if checkpoint is None:
+            return lastRound
+
+        return max(checkpoint + 1, lastRound - BlockFollower.maxCatchUp)
+
+    def _loadCheckpoint(self) -> Optional[int]:
+        if self.checkpointPath is None:
+            return None
+
+        try:
+            with open(self.checkpointPath, "r") as f:
+                return int(json.load(f)["round"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _saveCheckpoint(self, round: int):
+        """
+        Write the checkpoint through a temporary file so a crash never leaves it partial
+        """
+        if self.checkpointPath is None:
+            return
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.checkpointPath))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"round": round}, f)
+            os.replace(tmpPath, self.checkpointPath)
+        except OSError as e:
+            # Only costs a longer catch up after a restart
+            print(f"Failed to save block checkpoint: {e}")
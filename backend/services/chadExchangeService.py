@@ -1,58 +1,344 @@
 import algosdk
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
 from pyteal import compileTeal, Mode
-from backend.services.networkInteraction import NetworkInteraction
-from backend.services.transactionService import PaymentTransactionRepository, ASATransactionRepository
+from backend.services.accountState import AccountStateCache
+from backend.services.blockFollower import BlockEvent, BlockFollower, Subscription
+from backend.services.idempotency import IdempotencyCache
+from backend.services.liquidityLedger import LiquidityLedger, Reservation
+from backend.services.networkInteraction import NetworkInteraction, SubmitResult
+from backend.services.transactionService import PaymentTransactionRepository, ASATransactionRepository, ApplicationTransactionRepository
 from backend.services.keyPair import KeyPair
+from backend.services.programCache import ProgramCache, CompiledProgram
+from backend.services.pendingTransactions import PendingTransactionManager
+from backend.services.priceAttestation import PriceAttestor
+from backend.services.quoteEngine import QuoteEngine
+from backend.services.signer import Signer
+from backend.services.suggestedParams import SuggestedParamsProvider
+from backend.services.swapBatcher import SwapBatcher
+from backend.services.swapTemplates import SwapGroup, SwapTemplates
 from backend.contracts.chadExchange import ChadExchangeASC1
-from algosdk import logic
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.teal.assembler import TealAssembler
+from backend.teal.evaluator import TealEvaluator
 from algosdk.v2client import algod
 from algosdk.future import transaction as algo_txn
 
 class ChadExchangeService:
 
-    def __init__(self, client: algod.AlgodClient, admin: KeyPair, minChadTxThresh: int, chadID: int):
+    # Assemble programs with backend.teal instead of algod /compile. Off until algod
+    # output is recorded for every variant (tools/recordAlgodPrograms.py) and
+    # test_algodPrograms.py matches it
+    localAssembly = os.getenv("CHAD_LOCAL_ASSEMBLY") == "1"
+
+    def __init__(self, client: algod.AlgodClient, admin: KeyPair, minChadTxThresh: int, chadID: int,
+                 branchOrder: list = None, appID: int = None, attested: bool = False, batched: bool = False,
+                 requote: Callable[[str], float] = None, salt: int = 0):
         self.client = client
         self.admin = admin
         self.minChadtxThresh = minChadTxThresh
         self.chadID = chadID
-        self.contract = ChadExchangeASC1(adminAddr=self.admin.pubKey, chadID=self.chadID, minChadTxThresh=self.minChadtxThresh)
+        self.appID = appID
+        self.requote = requote
+        self.quoteEngine = QuoteEngine(minChadTxThresh)
+        self.contract = ChadExchangeASC1(
+            adminAddr=self.admin.pubKey, chadID=self.chadID, minChadTxThresh=self.minChadtxThresh,
+            branchOrder=branchOrder, appID=appID, attested=attested, batched=batched, salt=salt
+        )
+        self._escrowProgram = None
+        self._escrowEvaluator = None
+        self._publishedRate = None
+        self._publishedRound = 0
+        self._attestor = None
+        self._swapBatcher = None
+        self._pendingTransactions = None
+        self._idempotency = None
+        self._swapTemplates = None
+        self._liquidity = None
+        self._liquidityLock = threading.Lock()
+
+    @property
+    def escrowProgram(self) -> CompiledProgram:
+        """
+        Compiled escrow program. The PyTeal build happens once per service and the
+        compile happens at most once per process (or never if persisted to disk)
+        """
+        if self._escrowProgram is None:
+            exchangeCompiled = compileTeal(
+                self.contract.program(),
+                mode=Mode.Signature,
+                version=5,
+            )
+
+            params = {
+                "adminAddr": self.contract.adminAddr,
+                "chadID": self.contract.chadID,
+                "minChadTxThresh": self.contract.minChadTxThresh,
+            }
+            if self.contract.branchOrder is not None:
+                params["branchOrder"] = self.contract.branchOrder
+            if self.contract.appID is not None:
+                params["appID"] = self.contract.appID
+            if self.contract.attested:
+                params["attested"] = True
+            if self.contract.batched:
+                params["batched"] = True
+            if self.contract.salt:
+                params["salt"] = self.contract.salt
+            if ChadExchangeService.localAssembly:
+                params["localAssembly"] = True
+
+            self._escrowProgram = ProgramCache.get(
+                sourceCode=exchangeCompiled,
+                params=params,
+                compile=lambda source: ChadExchangeService.compileProgram(self.client, source)
+            )
+
+        return self._escrowProgram
+
+    @property
+    def escrowBytes(self) -> bytes:
+        return self.escrowProgram.programBytes
+
+    @property
+    def escrowAddress(self) -> str:
+        return self.escrowProgram.address
+
+    @property
+    def escrowLogicSig(self) -> algo_txn.LogicSig:
+        return self.escrowProgram.logicSig
+
+    def delegatedSignature(self, asset: int, noMoreThan: int) -> algo_txn.LogicSig:
+        """
+        Unsigned delegated signature letting the account that signs it pay up to
+        noMoreThan Algo (asset 0) or CHAD into the escrow. Programs are patched from a
+        template, so a user's signature costs no compile
+        """
+        if asset == LiquidityLedger.ALGO:
+            program = DelegatedSignature.algoSigProgram(self.escrowAddress, noMoreThan)
+        elif asset == self.chadID:
+            program = DelegatedSignature.chadSigProgram(self.escrowAddress, noMoreThan, self.chadID)
+        else:
+            raise ValueError(f"Asset {asset} is not traded by this exchange")
+
+        return algo_txn.LogicSig(program)
+
+    @property
+    def signer(self) -> Signer:
+        return Signer.instance()
+
+    @property
+    def escrowEvaluator(self) -> TealEvaluator:
+        if self._escrowEvaluator is None:
+            self._escrowEvaluator = TealEvaluator(self.escrowBytes)
+
+        return self._escrowEvaluator
 
     @property
-    def escrowBytes(self):
-        exchangeCompiled = compileTeal(
-            self.contract.program(),
-            mode=Mode.Signature,
-            version=5,
+    def attestor(self) -> PriceAttestor:
+        if self._attestor is None:
+            self._attestor = PriceAttestor(self.admin, self.escrowAddress)
+
+        return self._attestor
+
+    def subscribe(self, callback: Optional[Callable[[BlockEvent], None]] = None,
+                  onError: Optional[Callable[[Exception], None]] = None) -> Subscription:
+        """
+        Stream confirmed transactions touching the escrow, e.g. for a trade log. A
+        subscription read without a callback is dropped if it falls behind
+        """
+        return BlockFollower.forClient(self.client).subscribe(
+            addresses=[self.escrowAddress], callback=callback, onError=onError
         )
 
-        return NetworkInteraction.compile_program(
-            client=self.client, source_code=exchangeCompiled
+    def validateGroup(self, signedGroup: list):
+        """
+        Run the escrow logic against a signed group before it is sent, so groups the
+        network would reject fail here without a round-trip
+        """
+        result = self.escrowEvaluator.evaluateGroup(signedGroup)
+        if result is not None:
+            raise ValueError(f"Swap group rejected by exchange logic ({result.branch}): {result.reason}")
+
+    @staticmethod
+    def deployApp(client: algod.AlgodClient, admin: KeyPair, chadID: int, chadsPerAlgo: float) -> int:
+        """
+        Create the exchange app with an initial rate and return its app ID. Pass the ID
+        to ChadExchangeService to use an escrow whose swaps are approved by the app
+        """
+        app = ChadExchangeApp(chadID)
+        approval = ChadExchangeService.compileProgram(client, compileTeal(app.approvalProgram(), mode=Mode.Application, version=5))
+        clear = ChadExchangeService.compileProgram(client, compileTeal(app.clearProgram(), mode=Mode.Application, version=5))
+
+        createTxSigned = ApplicationTransactionRepository.create_application(
+            client=client,
+            creator_private_key=admin.privKey,
+            approval_program=approval,
+            clear_program=clear,
+            global_schema=algo_txn.StateSchema(num_uints=ChadExchangeApp.numInts, num_byte_slices=ChadExchangeApp.numBytes),
+            local_schema=algo_txn.StateSchema(num_uints=0, num_byte_slices=0),
+            app_args=[ChadExchangeApp.rateFor(chadsPerAlgo).to_bytes(8, "big")],
+            sign_transaction=True
         )
 
-    @property
-    def escrowAddress(self):
-        return logic.address(self.escrowBytes)
+        print(f"\nCreating exchange app at {chadsPerAlgo} CHAD per Algo")
+        appID, _ = NetworkInteraction.submit_app_creation(client, transaction=createTxSigned)
 
-    def depositChad(self, amount: int) -> str:
+        return appID
+
+    @staticmethod
+    def compileProgram(client: algod.AlgodClient, source: str) -> bytes:
         """
-        Transfer chads from admin address to exchange
+        Compile TEAL source with algod, or with the local assembler if localAssembly
+        is set. Without a client, e.g. for offline evaluation and fuzzing, the program
+        is always assembled locally
+        """
+        if ChadExchangeService.localAssembly or client is None:
+            return TealAssembler.assemble(source).bytecode
+
+        return NetworkInteraction.compile_program(client=client, source_code=source)
+
+    def publishRate(self, chadsPerAlgo: float) -> Optional[str]:
         """
-        # Send some chads to exchange
-        chadTxSigned = ASATransactionRepository.asa_transfer(
+        Store a new rate in the exchange app. Called once per price tick, and skipped
+        if the rate has not changed since the last update unless that update is half
+        way to the app's maxRateAge
+        """
+        if self.appID is None:
+            raise ValueError("Exchange is not app based, the rate is approved per swap")
+
+        rate = ChadExchangeApp.rateFor(chadsPerAlgo)
+        if rate == self._publishedRate:
+            currentRound = SuggestedParamsProvider.forClient(self.client).get().first
+            if currentRound - self._publishedRound < ChadExchangeApp.maxRateAge // 2:
+                return None
+
+        setRateTxSigned = ApplicationTransactionRepository.call_application(
+            client=self.client,
+            caller_private_key=self.admin.privKey,
+            app_id=self.appID,
+            on_complete=algo_txn.OnComplete.NoOpOC,
+            app_args=[b"setRate", rate.to_bytes(8, "big")],
+            sign_transaction=True
+        )
+
+        txID = NetworkInteraction.submit_transaction(self.client, transaction=setRateTxSigned)
+        self._publishedRate = rate
+        self._publishedRound = setRateTxSigned.transaction.first_valid_round
+
+        return txID
+
+    def swapApproval(self, buyerKey: KeyPair, action: str) -> Tuple[algo_txn.Transaction, str]:
+        """
+        Third transaction of a swap group and the key that signs it. App based exchanges
+        use a call to the app signed by the buyer, otherwise a 0 algo payment from the
+        admin approves the rate
+        """
+        if self.appID is not None:
+            approvalTx = ApplicationTransactionRepository.call_application(
+                client=self.client,
+                caller_private_key=buyerKey.privKey,
+                app_id=self.appID,
+                on_complete=algo_txn.OnComplete.NoOpOC,
+                app_args=[action.encode()],
+                sign_transaction=False
+            )
+            return approvalTx, buyerKey.privKey
+
+        approvalTx = PaymentTransactionRepository.payment(
             client=self.client,
             sender_address=self.admin.pubKey,
             receiver_address=self.escrowAddress,
+            amount=0,
+            sender_private_key=None,
+            sign_transaction=False
+        )
+        return approvalTx, self.admin.privKey
+
+    def optInChad(self) -> str:
+        """
+        Opt the escrow into ChadCoin. The escrow must hold its minimum balance first
+        """
+        print(f"\nOpting exchange {self.escrowAddress} into CHAD")
+        return NetworkInteraction.submit_transaction(self.client, transaction=self._optInTx())
+
+    def fund(self, fundAmount: int = 250000, algoAmount: int = 0, chadAmount: int = 0) -> List[SubmitResult]:
+        """
+        Fund the escrow's minimum balance, opt it into ChadCoin and deposit liquidity.
+        The transactions are pipelined in order so they can all confirm in one block
+        """
+        print(f"\nFunding exchange {self.escrowAddress} and opting into CHAD")
+        results = NetworkInteraction.submit_many(self.client, self.fundingTxns(fundAmount, algoAmount, chadAmount))
+
+        failed = [result.error for result in results if result.error is not None]
+        if failed:
+            raise ValueError(f"Funding exchange failed: {failed[0]}")
+
+        self.resetLiquidity()
+        return results
+
+    def fundingTxns(self, fundAmount: int = 250000, algoAmount: int = 0, chadAmount: int = 0) -> list:
+        """
+        Signed transactions funding the escrow, opting it in and depositing liquidity, in
+        the order they must confirm. The Algo deposit rides on the funding payment, two
+        payments of the same amount would be the same transaction
+        """
+        txns = [self._depositAlgoTx(fundAmount + algoAmount), self._optInTx()]
+        if chadAmount:
+            txns.append(self._depositChadTx(chadAmount))
+
+        return txns
+
+    def _optInTx(self) -> algo_txn.LogicSigTransaction:
+        optInTx = ASATransactionRepository.asa_transfer(
+            client=self.client,
+            sender_address=self.escrowAddress,
+            receiver_address=self.escrowAddress,
+            amount=0,
             asa_id=self.chadID,
-            amount=amount,
             revocation_target=None,
-            sender_private_key=self.admin.privKey,
-            sign_transaction=True
+            sender_private_key=None,
+            sign_transaction=False
         )
 
+        return self.signer.sign(optInTx, self.escrowLogicSig)
+
+    def migrateTo(self, target: "ChadExchangeService", fundAmount: int = 250000) -> Tuple[int, int]:
+        """
+        Move the liquidity of this escrow to target, e.g. from the admin approved escrow
+        to an app based one. The escrow can only pay the admin, so funds are withdrawn
+        to the admin and deposited into target. The minimum balance stays behind since
+        close-to is never approved. Returns the (uAlgo, uChad) moved
+        """
+        target.fund(fundAmount)
+
+        info = self.client.account_info(self.escrowAddress)
+        chadAmount = next((a["amount"] for a in info.get("assets", []) if a["asset-id"] == self.chadID), 0)
+        fee = NetworkInteraction.get_default_suggested_params(self.client).fee
+
+        # Chad withdrawal fee comes out of the Algo balance too
+        algoAmount = info["amount"] - info["min-balance"] - fee * (2 if chadAmount else 1)
+
+        if chadAmount:
+            self.withdrawChad(chadAmount)
+            target.depositChad(chadAmount)
+        if algoAmount > 0:
+            self.withdrawAlgo(algoAmount)
+            target.depositAlgo(algoAmount)
+
+        return max(algoAmount, 0), chadAmount
+
+    def depositChad(self, amount: int) -> str:
+        """
+        Transfer chads from admin address to exchange
+        """
         print(f"\nFunding exchange with {amount} CHADS")
-        txID = NetworkInteraction.submit_transaction(
-            self.client, transaction=chadTxSigned
-        )
+        txID = self._ledgerTransfer({}, {self.chadID: amount}, lambda: NetworkInteraction.submit_transaction(
+            self.client, transaction=self._depositChadTx(amount)
+        ))
 
         return txID
     
@@ -60,197 +346,425 @@ class ChadExchangeService:
         """
         Transfer Algos from admin address to exchange
         """
-        txSigned = PaymentTransactionRepository.payment(
-            client=self.client, 
-            sender_address=self.admin.pubKey, 
-            receiver_address=self.escrowAddress, 
-            amount=amount, 
-            sender_private_key=self.admin.privKey, 
-            sign_transaction=True
-        )
-        
         print(f"\nFunding contract {self.escrowAddress}")
-        txID = NetworkInteraction.submit_transaction(
-            self.client, transaction=txSigned
-        )
+        txID = self._ledgerTransfer({}, {LiquidityLedger.ALGO: amount}, lambda: NetworkInteraction.submit_transaction(
+            self.client, transaction=self._depositAlgoTx(amount)
+        ))
 
         return txID
 
-    def withdrawChad(self, amount: int) -> str:
-        withdrawChadTx = ASATransactionRepository.asa_transfer(
+    def _depositChadTx(self, amount: int) -> algo_txn.SignedTransaction:
+        return ASATransactionRepository.asa_transfer(
             client=self.client,
-            sender_address=self.escrowAddress,
-            receiver_address=self.admin.pubKey,
+            sender_address=self.admin.pubKey,
+            receiver_address=self.escrowAddress,
             asa_id=self.chadID,
             amount=amount,
             revocation_target=None,
-            sender_private_key=None,
-            sign_transaction=False
+            sender_private_key=self.admin.privKey,
+            sign_transaction=True
+        )
+
+    def _depositAlgoTx(self, amount: int) -> algo_txn.SignedTransaction:
+        return PaymentTransactionRepository.payment(
+            client=self.client, 
+            sender_address=self.admin.pubKey, 
+            receiver_address=self.escrowAddress, 
+            amount=amount, 
+            sender_private_key=self.admin.privKey, 
+            sign_transaction=True
         )
 
-        withdrawChadTxLogSig = algo_txn.LogicSig(self.escrowBytes)
-        withdrawChadTxSigned = algo_txn.LogicSigTransaction(withdrawChadTx, withdrawChadTxLogSig)
+    def withdrawChad(self, amount: int) -> str:
+        withdrawChadTxSigned = self.withdrawTx(self.chadID, amount)
 
         print(f"\nWithdrawing {amount} CHADs from exhange")
-        txID = NetworkInteraction.submit_transaction(
+        outgoing = {self.chadID: amount, LiquidityLedger.ALGO: withdrawChadTxSigned.transaction.fee}
+        txID = self._ledgerTransfer(outgoing, {}, lambda: NetworkInteraction.submit_transaction(
             self.client, transaction=withdrawChadTxSigned
-        )
+        ))
 
         return txID
 
     def withdrawAlgo(self, amount: int) -> str:
-        withdrawTx = PaymentTransactionRepository.payment(
-            client=self.client,
-            sender_address=self.escrowAddress, 
-            receiver_address=self.admin.pubKey, 
-            amount=amount, 
-            sender_private_key=None, 
-            sign_transaction=False
-        )
-
-        withdrawTxLogSig = algo_txn.LogicSig(self.escrowBytes)
-        withdrawTxSigned = algo_txn.LogicSigTransaction(withdrawTx, withdrawTxLogSig)
+        withdrawTxSigned = self.withdrawTx(LiquidityLedger.ALGO, amount)
 
         print(f"\nWithdrawing {amount} Algo from exhange")
-        txID = NetworkInteraction.submit_transaction(
+        outgoing = {LiquidityLedger.ALGO: amount + withdrawTxSigned.transaction.fee}
+        txID = self._ledgerTransfer(outgoing, {}, lambda: NetworkInteraction.submit_transaction(
             self.client, transaction=withdrawTxSigned
-        )
+        ))
 
         return txID
 
-    def swapAlgoForChad(self, algoAmount: float, chadsPerAlgo: float, buyerKey: KeyPair) -> str:
+    def depositTx(self, asset: int, amount: int) -> algo_txn.SignedTransaction:
+        """
+        Signed transfer of amount Algo (asset 0) or CHAD from the admin to the escrow
+        """
+        if asset == LiquidityLedger.ALGO:
+            return self._depositAlgoTx(amount)
+        return self._depositChadTx(amount)
 
-        # Convert amounts to native units
-        algoAmount = int(algoAmount * 1e6)
-        chadAmount = int(algoAmount * chadsPerAlgo)
+    def withdrawTx(self, asset: int, amount: int) -> algo_txn.LogicSigTransaction:
+        """
+        Transfer of amount Algo (asset 0) or CHAD from the escrow to the admin, signed
+        by the escrow LogicSig
+        """
+        if asset == LiquidityLedger.ALGO:
+            withdrawTx = PaymentTransactionRepository.payment(
+                client=self.client,
+                sender_address=self.escrowAddress, 
+                receiver_address=self.admin.pubKey, 
+                amount=amount, 
+                sender_private_key=None, 
+                sign_transaction=False
+            )
+        else:
+            withdrawTx = ASATransactionRepository.asa_transfer(
+                client=self.client,
+                sender_address=self.escrowAddress,
+                receiver_address=self.admin.pubKey,
+                asa_id=self.chadID,
+                amount=amount,
+                revocation_target=None,
+                sender_private_key=None,
+                sign_transaction=False
+            )
+
+        return self.signer.sign(withdrawTx, self.escrowLogicSig)
+
+    def _ledgerTransfer(self, outgoing: dict, incoming: dict, submit: Callable[[], str]) -> str:
+        """
+        Run a deposit or withdrawal the liquidity ledger must see, holding outgoing
+        amounts until it confirms. Nothing is recorded before the ledger is loaded
+        """
+        if self._liquidity is None:
+            return submit()
 
-        # First transaction is payment of algoAmount to contract
-        algoPaymentTx = PaymentTransactionRepository.payment(
-            client=self.client,
-            sender_address=buyerKey.pubKey,
-            receiver_address=self.escrowAddress,
-            amount=algoAmount,
-            sender_private_key=None,
-            sign_transaction=False
-        )
+        reservation = self._liquidity.reserve(outgoing, incoming)
+        try:
+            txID = submit()
+        except Exception:
+            self._liquidity.release(reservation)
+            raise
 
-        # Second transaction is transfer of algo to buyer
-        chadPaymentTx = ASATransactionRepository.asa_transfer(
-            client=self.client,
-            sender_address=self.escrowAddress,
-            receiver_address=buyerKey.pubKey,
-            amount=chadAmount,
-            asa_id=self.chadID,
-            sender_private_key=None,
-            revocation_target=None,
-            sign_transaction=False
-        )
+        self._liquidity.commit(reservation)
+        return txID
 
-        # Third transaction is 0 algo tx from admin approving exchange rate
-        approvalTx = PaymentTransactionRepository.payment(
-            client=self.client,
-            sender_address=self.admin.pubKey,
-            receiver_address=self.escrowAddress,
-            amount=0,
-            sender_private_key=None,
-            sign_transaction=False
-        )
+    def swapAlgoForChad(self, algoAmount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+                        idempotencyKey: Optional[str] = None) -> str:
+        print(f"\nSending swap ({algoAmount} algo for CHAD at {chadsPerAlgo} CHAD/algo)")
+        return self.requestSwap("swapAlgoForChad", algoAmount, chadsPerAlgo, buyerKey, idempotencyKey).result()
 
-        # Atomic transfer
-        gid = algo_txn.calculate_group_id([
-            algoPaymentTx,
-            chadPaymentTx,
-            approvalTx
-        ])
+    def swapChadForAlgo(self, chadAmount: int, chadsPerAlgo: int, buyerKey: KeyPair,
+                        idempotencyKey: Optional[str] = None) -> str:
+        print(f"\nSending swap ({chadAmount} CHAD for Algo at {chadsPerAlgo} CHAD/algo)")
+        return self.requestSwap("swapChadForAlgo", chadAmount, chadsPerAlgo, buyerKey, idempotencyKey).result()
 
-        algoPaymentTx.group = gid
-        chadPaymentTx.group = gid
-        approvalTx.group = gid
+    def requestSwap(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+                    idempotencyKey: Optional[str] = None) -> Future:
+        """
+        Send a swap through the pending transaction manager. Requests repeating a
+        buyer's idempotencyKey get the future of the first request, and the escrow
+        transaction carries a lease derived from the key so algod rejects a duplicate
+        group while the first one is valid
+        """
+        if idempotencyKey is None:
+            return self.pendingTransactions.submit(action, amount, chadsPerAlgo, buyerKey)
 
-        # Sign transcations
-        algoPaymentTxSigned = algoPaymentTx.sign(buyerKey.privKey)
+        key = f"{buyerKey.pubKey}:{idempotencyKey}"
+        currentRound = NetworkInteraction.get_default_suggested_params(self.client).first
+        lastRound = currentRound + PendingTransactionManager.validRounds * PendingTransactionManager.maxAttempts
 
-        chadPaymentTxLogSig = algo_txn.LogicSig(self.escrowBytes)
-        chadPaymentTxSigned = algo_txn.LogicSigTransaction(chadPaymentTx, chadPaymentTxLogSig)
+        return self.idempotency.submit(key, currentRound, lastRound, lambda: self.pendingTransactions.submit(
+            action, amount, chadsPerAlgo, buyerKey, lease=IdempotencyCache.lease(key)
+        ))
 
-        approvalTxSigned = approvalTx.sign(self.admin.privKey)
+    @property
+    def idempotency(self) -> IdempotencyCache:
+        if self._idempotency is None:
+            self._idempotency = IdempotencyCache()
 
-        signedGroup = [
-            algoPaymentTxSigned,
-            chadPaymentTxSigned,
-            approvalTxSigned
-        ]
+        return self._idempotency
 
-        print(f"\nSending swap ({algoAmount/1e6} algo for {chadAmount/1e6} CHAD)")
-        txID = self.client.send_transactions(signedGroup)
-        NetworkInteraction.wait_for_confirmation(self.client, txID)
+    @property
+    def pendingTransactions(self) -> PendingTransactionManager:
+        """
+        Manager following every swap sent through swapAlgoForChad/swapChadForAlgo,
+        resubmitting expired groups
+        """
+        if self._pendingTransactions is None:
+            self._pendingTransactions = PendingTransactionManager(self, requote=self.requote)
 
-        return txID
+        return self._pendingTransactions
 
-    def swapChadForAlgo(self, chadAmount: int, chadsPerAlgo: int, buyerKey: KeyPair) -> str:
-        # Convert amounts to native units
-        chadAmount = int(chadAmount * 1e6)
-        algoAmount = int(chadAmount / chadsPerAlgo)
+    def buildSwap(self, action: str, amount: float, chadsPerAlgo: float,
+                  buyerKey: KeyPair) -> Tuple[algo_txn.Transaction, algo_txn.Transaction]:
+        """
+        Build the buyer's payment into the escrow and the escrow's payout for a swap of
+        amount Algo (swapAlgoForChad) or CHAD (swapChadForAlgo)
+        """
+        amountIn, amountOut = self.quoteSwap(action, amount, chadsPerAlgo)
+
+        if action == "swapAlgoForChad":
+            algoAmount, chadAmount = amountIn, amountOut
+
+            # First transaction is payment of algoAmount to contract
+            algoPaymentTx = PaymentTransactionRepository.payment(
+                client=self.client,
+                sender_address=buyerKey.pubKey,
+                receiver_address=self.escrowAddress,
+                amount=algoAmount,
+                sender_private_key=None,
+                sign_transaction=False
+            )
+
+            # Second transaction is transfer of algo to buyer
+            chadPaymentTx = ASATransactionRepository.asa_transfer(
+                client=self.client,
+                sender_address=self.escrowAddress,
+                receiver_address=buyerKey.pubKey,
+                amount=chadAmount,
+                asa_id=self.chadID,
+                sender_private_key=None,
+                revocation_target=None,
+                sign_transaction=False
+            )
+
+            return algoPaymentTx, chadPaymentTx
+
+        else:
+            chadAmount, algoAmount = amountIn, amountOut
+
+            # First transaction is transfer of chad to contract
+            chadPaymentTx = ASATransactionRepository.asa_transfer(
+                client=self.client,
+                sender_address=buyerKey.pubKey,
+                receiver_address=self.escrowAddress,
+                amount=chadAmount,
+                asa_id=self.chadID,
+                revocation_target=None,
+                sender_private_key=None,
+                sign_transaction=False
+            )
+
+            # Second transaction is payment of algoAmount to buyer
+            algoPaymentTx = PaymentTransactionRepository.payment(
+                client=self.client,
+                sender_address=self.escrowAddress,
+                receiver_address=buyerKey.pubKey,
+                amount=algoAmount,
+                sender_private_key=None,
+                sign_transaction=False
+            )
+
+            return chadPaymentTx, algoPaymentTx
 
-        # First transaction is transfer of chad to contract
-        chadPaymentTx = ASATransactionRepository.asa_transfer(
-            client=self.client,
-            sender_address=buyerKey.pubKey,
-            receiver_address=self.escrowAddress,
-            amount=chadAmount,
-            asa_id=self.chadID,
-            revocation_target=None,
-            sender_private_key=None,
-            sign_transaction=False
-        )
+    @property
+    def swapTemplates(self) -> Optional[SwapTemplates]:
+        """
+        Group templates for the escrow, None unless swaps are approved by an admin payment
+        """
+        if self.appID is not None or self.contract.attested or self.contract.batched:
+            return None
 
-        # Second transaction is payment of algoAmount to buyer
-        algoPaymentTx = PaymentTransactionRepository.payment(
-            client=self.client,
-            sender_address=self.escrowAddress,
-            receiver_address=buyerKey.pubKey,
-            amount=algoAmount,
-            sender_private_key=None,
-            sign_transaction=False
-        )
+        if self._swapTemplates is None:
+            self._swapTemplates = SwapTemplates(self.escrowAddress, self.admin.pubKey, self.chadID)
 
-        # Third transaction is 0 algo tx from admin approving exchange rate
-        approvalTx = PaymentTransactionRepository.payment(
-            client=self.client,
-            sender_address=self.admin.pubKey,
-            receiver_address=self.escrowAddress,
-            amount=0,
-            sender_private_key=None,
-            sign_transaction=False
-        )
+        return self._swapTemplates
 
-        # Atomic transfer
-        gid = algo_txn.calculate_group_id([
-            chadPaymentTx,
-            algoPaymentTx,
-            approvalTx
-        ])
+    def buildSwapGroup(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+                       validRounds: Optional[int] = None, lease: Optional[bytes] = None) -> SwapGroup:
+        """
+        Build a whole swap group, approval included, from this round's templates. Same
+        group as buildSwap followed by submitSwap would send
+        """
+        amountIn, amountOut = self.quoteSwap(action, amount, chadsPerAlgo)
+        params = SuggestedParamsProvider.forClient(self.client).get()
+        if validRounds is not None:
+            params.last = min(params.last, params.first + validRounds)
+
+        return self.swapTemplates.build(action, amountIn, amountOut, buyerKey.pubKey, params, lease)
+
+    def quoteSwap(self, action: str, amount: float, chadsPerAlgo: float) -> Tuple[int, int]:
+        """
+        Native amounts (paid in, paid out) for a swap of amount Algo (swapAlgoForChad)
+        or CHAD (swapChadForAlgo). Raises ValueError below minChadTxThresh
+        """
+        quote = self.quoteEngine.quote(action, amount, chadsPerAlgo)
+        return quote.amountIn, quote.amountOut
+
+    @property
+    def liquidity(self) -> LiquidityLedger:
+        """
+        Reservation ledger for the escrow, loaded from its balances on first use
+        """
+        if self._liquidity is None:
+            with self._liquidityLock:
+                if self._liquidity is None:
+                    self._liquidity = LiquidityLedger.fromAccountInfo(
+                        self.client.account_info(self.escrowAddress), self.chadID
+                    )
+
+        return self._liquidity
+
+    def resetLiquidity(self):
+        """
+        Reload the ledger from the escrow's balances when next needed, e.g. after the
+        opt-in changed its minimum balance. Outstanding reservations are forgotten
+        """
+        self._liquidity = None
+
+    @property
+    def accountState(self) -> AccountStateCache:
+        return AccountStateCache.forClient(self.client)
+
+    def preflightSwap(self, action: str, amount: float, chadsPerAlgo: float, buyerAddr: str):
+        """
+        Check against cached account state that the buyer and the escrow can take part
+        in a swap, raising ValueError before anything is signed or sent if not
+        """
+        amountIn, _ = self.quoteSwap(action, amount, chadsPerAlgo)
+        buyer, escrow = self.accountState.getMany([buyerAddr, self.escrowAddress])
+        fee = SuggestedParamsProvider.fee
+
+        if not escrow.isOptedIn(self.chadID):
+            raise ValueError("Exchange escrow has not opted into CHAD")
+        if not buyer.isOptedIn(self.chadID):
+            raise ValueError(f"Buyer {buyerAddr} has not opted into CHAD")
+
+        if action == "swapAlgoForChad":
+            if buyer.spendable < amountIn + fee:
+                raise ValueError(f"Buyer {buyerAddr} can not pay {amountIn} uAlgo plus fee")
+        else:
+            if buyer.assetBalance(self.chadID) < amountIn:
+                raise ValueError(f"Buyer {buyerAddr} holds less than {amountIn} uChad")
+            if buyer.spendable < fee:
+                raise ValueError(f"Buyer {buyerAddr} can not pay the fee")
+
+    def reserveSwap(self, action: str, amount: float, chadsPerAlgo: float) -> Reservation:
+        """
+        Reserve the escrow's payout and fee for a swap. Raises ValueError without
+        touching the network if the escrow cannot fill it
+        """
+        amountIn, amountOut = self.quoteSwap(action, amount, chadsPerAlgo)
+        fee = SuggestedParamsProvider.fee
 
-        chadPaymentTx.group = gid
-        algoPaymentTx.group = gid
-        approvalTx.group = gid
+        if action == "swapAlgoForChad":
+            return self.liquidity.reserve(
+                {self.chadID: amountOut, LiquidityLedger.ALGO: fee}, {LiquidityLedger.ALGO: amountIn}
+            )
+
+        return self.liquidity.reserve({LiquidityLedger.ALGO: amountOut + fee}, {self.chadID: amountIn})
+
+    def sendSwap(self, buyerTx: algo_txn.Transaction, escrowTx: algo_txn.Transaction, buyerKey: KeyPair,
+                 action: str, chadsPerAlgo: float) -> str:
+        """
+        Send a swap group and wait for it to confirm
+        """
+        txID, lastValid = self.submitSwap(buyerTx, escrowTx, buyerKey, action, chadsPerAlgo)
+        NetworkInteraction.wait_for_confirmation(self.client, txID, lastValid)
+        return txID
+
+    def submitSwap(self, buyerTx: algo_txn.Transaction, escrowTx: algo_txn.Transaction, buyerKey: KeyPair,
+                   action: str, chadsPerAlgo: float) -> Tuple[str, int]:
+        """
+        Group the buyer's payment and the escrow payout with the rate approval, sign,
+        validate and send the group. Returns the txID of the group and its last valid
+        round without waiting for confirmation
+        """
+        if self.contract.batched:
+            return self.sendSwapBatch([(buyerTx, escrowTx, buyerKey)])
+
+        transactions = [buyerTx, escrowTx]
+        escrowLogicSig = self.escrowLogicSig
+        approvalTx = None
+
+        if self.contract.attested:
+            # Rate approval rides on the escrow LogicSig, signed once per price tick
+            attestation = self.attestor.attest(ChadExchangeApp.rateFor(chadsPerAlgo), buyerTx.first_valid_round)
+            for tx in transactions:
+                tx.last_valid_round = min(tx.last_valid_round, attestation.expiryRound)
+            escrowLogicSig = attestation.logicSig(escrowLogicSig)
+        else:
+            # Third transaction approves the exchange rate
+            approvalTx, approvalKey = self.swapApproval(buyerKey, action)
+            transactions.append(approvalTx)
+
+        # Atomic transfer
+        gid = algo_txn.calculate_group_id(transactions)
+        for tx in transactions:
+            tx.group = gid
 
         # Sign transcations
-        chadPaymentTxSigned = chadPaymentTx.sign(buyerKey.privKey)
+        authorizers = [(buyerTx, buyerKey.privKey), (escrowTx, escrowLogicSig)]
+        if approvalTx is not None:
+            authorizers.append((approvalTx, approvalKey))
+        signedGroup = self.signer.signMany(authorizers)
 
-        algoPaymentTxLogSig = algo_txn.LogicSig(self.escrowBytes)
-        algoPaymentTxSigned = algo_txn.LogicSigTransaction(algoPaymentTx, algoPaymentTxLogSig)
+        self.validateGroup(signedGroup)
+        txID = self.client.send_transactions(signedGroup)
 
-        approvalTxSigned = approvalTx.sign(self.admin.privKey)
+        return txID, min(tx.last_valid_round for tx in transactions)
 
-        signedGroup = [
-            chadPaymentTxSigned,
-            algoPaymentTxSigned,
-            approvalTxSigned
-        ]
+    def submitSwapGroup(self, group: SwapGroup, buyerKey: KeyPair) -> Tuple[str, int]:
+        """
+        Sign, validate and send a group from buildSwapGroup. Returns the txID of the
+        group and its last valid round without waiting for confirmation
+        """
+        buyerTx, escrowTx, approvalTx = group.transactions
+        signedGroup = self.signer.signMany(
+            [(buyerTx, buyerKey.privKey), (escrowTx, self.escrowLogicSig), (approvalTx, self.admin.privKey)],
+            messages=group.messages
+        )
 
-        print(f"\nSending swap ({chadAmount / 1e6} CHAD for {algoAmount / 1e6} Algo)")
+        self.validateGroup(signedGroup)
         txID = self.client.send_transactions(signedGroup)
-        NetworkInteraction.wait_for_confirmation(self.client, txID)
 
-        return txID
\ No newline at end of file
+        return txID, group.lastValid
+
+    def sendSwapBatch(self, swaps: List[Tuple[algo_txn.Transaction, algo_txn.Transaction, KeyPair]]) -> Tuple[str, int]:
+        """
+        Send up to maxBatchSwaps swaps, each a (buyer payment, escrow payout, buyer key),
+        as one group sharing a single admin approval. Returns the txID of the group and
+        its last valid round without waiting for confirmation
+        """
+        if not self.contract.batched:
+            raise ValueError("Exchange escrow does not accept batched swaps")
+        if not 0 < len(swaps) <= ChadExchangeASC1.maxBatchSwaps:
+            raise ValueError(f"A batch holds 1 to {ChadExchangeASC1.maxBatchSwaps} swaps")
+
+        approvalTx, approvalKey = self.swapApproval(None, "swapBatch")
+        transactions = [tx for buyerTx, escrowTx, _ in swaps for tx in (buyerTx, escrowTx)] + [approvalTx]
+
+        # Atomic transfer
+        gid = algo_txn.calculate_group_id(transactions)
+        for tx in transactions:
+            tx.group = gid
+
+        authorizers = []
+        for buyerTx, escrowTx, buyerKey in swaps:
+            authorizers += [(buyerTx, buyerKey.privKey), (escrowTx, self.escrowLogicSig)]
+        authorizers.append((approvalTx, approvalKey))
+        signedGroup = self.signer.signMany(authorizers)
+
+        print(f"\nSending batch of {len(swaps)} swaps")
+        self.validateGroup(signedGroup)
+        txID = self.client.send_transactions(signedGroup)
+
+        return txID, min(tx.last_valid_round for tx in transactions)
+
+    @property
+    def swapBatcher(self) -> SwapBatcher:
+        if self._swapBatcher is None:
+            self._swapBatcher = SwapBatcher(self)
+
+        return self._swapBatcher
+
+    def queueSwap(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair) -> Future:
+        """
+        Queue a swap to be sent in a batch with other swaps requested around the same
+        time. The future resolves to the txID of the group once it is confirmed
+        """
+        return self.swapBatcher.submit(action, amount, chadsPerAlgo, buyerKey)
+
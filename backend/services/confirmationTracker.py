@@ -0,0 +1,205 @@
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from algosdk.v2client import algod
+from backend.services.blockFollower import BlockEvent, BlockFollower, Subscription
+
+
+@dataclass
+class _PendingTransaction:
+    txid: str
+    lastValid: int
+    checkedRound: int = 0
+    future: Future = field(default_factory=Future)
+
+
+class ConfirmationTracker:
+    """
+    Waits for many transactions at once. The tracker subscribes to the client's
+    BlockFollower while anything is pending and resolves each future when its
+    transaction shows up in a block, is rejected from the pool or passes its last
+    valid round. If the follower gives up reaching algod every pending future fails
+    with its error
+    """
+
+    defaultValidity = 1000      # [rounds] Used when a transaction's last valid round is unknown
+    poolCheckRounds = 4         # [rounds] How often transactions missing from blocks are checked for pool errors
+    recentRounds = 2            # [rounds] Confirmed txids remembered for transactions tracked late
+
+    _trackers = weakref.WeakKeyDictionary()
+    _trackersLock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient):
+        self.client = client
+        self.currentRound = 0
+
+        self._pending: Dict[str, _PendingTransaction] = {}
+        self._recent: "OrderedDict[str, int]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._subscription: Optional[Subscription] = None
+
+    @staticmethod
+    def forClient(client: algod.AlgodClient) -> "ConfirmationTracker":
+        """
+        Return the tracker shared by everything using client
+        """
+        tracker = ConfirmationTracker._trackers.get(client)
+        if tracker is None:
+            with ConfirmationTracker._trackersLock:
+                tracker = ConfirmationTracker._trackers.get(client)
+                if tracker is None:
+                    tracker = ConfirmationTracker(client)
+                    ConfirmationTracker._trackers[client] = tracker
+
+        return tracker
+
+    @property
+    def pendingCount(self) -> int:
+        return len(self._pending)
+
+    def track(self, txid: str, lastValid: Optional[int] = None,
+              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """
+        Start tracking txid. Returns a future that resolves to the confirmed round and
+        transaction fields once confirmed. The future raises ValueError if the
+        transaction was rejected and TimeoutError if it was not confirmed by its last
+        valid round
+        """
+        with self._cond:
+            pending = self._pending.get(txid)
+            if pending is None:
+                if lastValid is None:
+                    lastValid = self._latestRound() + ConfirmationTracker.defaultValidity
+
+                pending = _PendingTransaction(txid, lastValid)
+
+                # Already published before it was tracked
+                confirmedRound = self._recent.get(txid)
+                if confirmedRound is not None:
+                    pending.future.set_result({"confirmed-round": confirmedRound})
+                else:
+                    self._pending[txid] = pending
+                    self._ensureSubscribed()
+
+        if callback is not None:
+            pending.future.add_done_callback(callback)
+
+        return pending.future
+
+    def wait(self, txid: str, lastValid: Optional[int] = None) -> dict:
+        """
+        Block until txid is confirmed and return its confirmation
+        """
+        return self.track(txid, lastValid).result()
+
+    def _latestRound(self) -> int:
+        if self.currentRound == 0:
+            self.currentRound = self.client.status().get('last-round')
+
+        return self.currentRound
+
+    def _ensureSubscribed(self):
+        if self._subscription is None:
+            self._subscription = BlockFollower.forClient(self.client).subscribe(
+                callback=self._onBlock, onError=self._onError
+            )
+
+    def _onError(self, error: Exception):
+        """
+        Fail every pending transaction when algod can't be reached. If the subscription
+        was dropped for falling behind, subscribe again and ask the node about each
+        pending transaction on the next block, as rounds were missed
+        """
+        with self._cond:
+            subscription = self._subscription
+            if subscription is not None and subscription.dropped:
+                self._subscription = None
+                for tx in self._pending.values():
+                    tx.checkedRound = 0
+                if self._pending:
+                    self._ensureSubscribed()
+                return
+
+            failed = list(self._pending.values())
+            self._pending.clear()
+            self._subscription = None
+
+        if subscription is not None:
+            subscription.close()
+
+        for tx in failed:
+            self._resolve(tx, error=ConnectionError(f"Transaction {tx.txid} not tracked, algod unreachable: {error}"))
+
+    def _onBlock(self, event: BlockEvent):
+        """
+        Resolve every pending transaction that has reached a final state by round
+        """
+        self.currentRound = event.round
+        resolved = []
+
+        with self._cond:
+            for tx in event.transactions:
+                self._recent[tx.txid] = event.round
+                pending = self._pending.pop(tx.txid, None)
+                if pending is not None:
+                    resolved.append((pending, {"confirmed-round": event.round, "txn": tx.txn}))
+
+            while self._recent and next(iter(self._recent.values())) <= event.round - ConfirmationTracker.recentRounds:
+                self._recent.popitem(last=False)
+
+            remaining: List[_PendingTransaction] = list(self._pending.values())
+
+        for pending, result in resolved:
+            print(f"Transaction {pending.txid} confirmed in round {event.round}.")
+            self._resolve(pending, result=result)
+
+        for tx in remaining:
+            if (tx.checkedRound == 0 or event.round >= tx.lastValid
+                    or event.round - tx.checkedRound >= ConfirmationTracker.poolCheckRounds):
+                tx.checkedRound = event.round
+                self._checkPool(tx)
+
+        with self._cond:
+            if not self._pending and self._subscription is not None:
+                self._subscription.close()
+                self._subscription = None
+
+    def _checkPool(self, tx: _PendingTransaction):
+        """
+        Ask the node about a transaction that has not shown up in a block. Done on the
+        first round it is tracked for, in case it confirmed before, and once its last
+        valid round is committed
+        """
+        try:
+            txinfo = self.client.pending_transaction_info(tx.txid)
+        except Exception as e:
+            # Unknown to the node for now, the last valid round bounds the wait
+            print(f"Failed to get info for transaction {tx.txid}: {e}")
+            txinfo = {}
+
+        if txinfo.get('confirmed-round', 0) > 0:
+            print(f"Transaction {tx.txid} confirmed in round {txinfo.get('confirmed-round')}.")
+            self._resolve(tx, result=txinfo)
+        elif txinfo.get('pool-error'):
+            self._resolve(tx, error=ValueError(f"Transaction {tx.txid} rejected: {txinfo['pool-error']}"))
+        elif self.currentRound >= tx.lastValid:
+            # Its last valid block is committed without it, so it can never confirm
+            self._resolve(tx, error=TimeoutError(
+                f"Transaction {tx.txid} not confirmed by last valid round {tx.lastValid}"
+            ))
+
+    def _resolve(self, tx: _PendingTransaction, result: Optional[dict] = None, error: Optional[Exception] = None):
+        with self._cond:
+            self._pending.pop(tx.txid, None)
+
+        if tx.future.done():
+            return
+
+        if error is not None:
+            tx.future.set_exception(error)
+        else:
+            tx.future.set_result(result)
@@ -0,0 +1,104 @@
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Deque, Tuple
+
+
+@dataclass
+class _Submission:
+    future: Future
+    expiresRound: int
+
+
+class IdempotencyCache:
+    """
+    Remembers submissions by a client supplied idempotency key so a retried request
+    gets the original submission's future instead of building and signing a new
+    group. Entries are evicted once expiresRound passes or, least recently used
+    first, when more than maxEntries are held. The lease derived from the key keeps
+    algod from accepting a second group for the same key while the first is valid,
+    even if the cache is lost
+    """
+
+    maxEntries = 10000
+    retainRounds = 1000         # [rounds] How long after its last possible confirmation a key is remembered
+
+    def __init__(self, maxEntries: int = None, retainRounds: int = None):
+        self.maxEntries = maxEntries or IdempotencyCache.maxEntries
+        self.retainRounds = IdempotencyCache.retainRounds if retainRounds is None else retainRounds
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, _Submission]" = OrderedDict()
+        self._expiries: Deque[Tuple[int, str]] = deque()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def lease(key: str) -> bytes:
+        """
+        32 byte transaction lease for key
+        """
+        return hashlib.sha256(key.encode()).digest()
+
+    def submit(self, key: str, currentRound: int, lastRound: int, send: Callable[[], Future]) -> Future:
+        """
+        Return the future of the submission for key, calling send only if key is not
+        known. lastRound is the last round the submission can confirm in. A failed
+        submission is forgotten so the request can be retried
+        """
+        with self._lock:
+            self._evict(currentRound)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.future
+
+            self.misses += 1
+            while len(self._entries) >= self.maxEntries:
+                self._entries.popitem(last=False)
+
+            entry = _Submission(Future(), lastRound + self.retainRounds)
+            self._entries[key] = entry
+            self._expiries.append((entry.expiresRound, key))
+
+        try:
+            submitted = send()
+        except Exception as e:
+            self._forget(key, entry)
+            entry.future.set_exception(e)
+            return entry.future
+
+        def resolve(done: Future):
+            error = done.exception()
+            if error is not None:
+                self._forget(key, entry)
+                entry.future.set_exception(error)
+            else:
+                entry.future.set_result(done.result())
+
+        submitted.add_done_callback(resolve)
+        return entry.future
+
+    def _forget(self, key: str, entry: _Submission):
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+    def _evict(self, currentRound: int):
+        # Entries are added with non-decreasing expiry rounds
+        while self._expiries and self._expiries[0][0] < currentRound:
+            expiresRound, key = self._expiries.popleft()
+            entry = self._entries.get(key)
+            if entry is not None and entry.expiresRound == expiresRound:
+                del self._entries[key]
+
+        # Drop expiry records of entries already evicted or forgotten
+        if len(self._expiries) > 2 * self.maxEntries:
+            self._expiries = deque(sorted((entry.expiresRound, key) for key, entry in self._entries.items()))
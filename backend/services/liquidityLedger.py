@@ -0,0 +1,93 @@
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """
+    Amounts held for one swap group, keyed by asset ID with 0 for Algo. incoming is
+    credited to the escrow once the group confirms
+    """
+
+    id: int
+    outgoing: Dict[int, int]
+    incoming: Dict[int, int] = field(default_factory=dict)
+
+
+class LiquidityLedger:
+    """
+    Tracks escrow balances in memory so concurrent swaps cannot promise the same
+    liquidity. Building a group reserves what the escrow pays out; the reservation is
+    committed when the group confirms or released when it fails or expires. Every
+    operation is a few integer updates under one lock
+    """
+
+    ALGO = 0
+
+    def __init__(self, balances: Dict[int, int]):
+        self.balances = dict(balances)
+        self.reserved = {asset: 0 for asset in balances}
+        self.rejected = 0
+
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fromAccountInfo(accountInfo: dict, chadID: int) -> "LiquidityLedger":
+        """
+        Ledger for the spendable balances in an algod account_info response. Algo held
+        for the minimum balance can never be paid out
+        """
+        chads = next((a["amount"] for a in accountInfo.get("assets", []) if a["asset-id"] == chadID), 0)
+        algos = accountInfo["amount"] - accountInfo.get("min-balance", 0)
+        return LiquidityLedger({LiquidityLedger.ALGO: max(algos, 0), chadID: chads})
+
+    def available(self, asset: int) -> int:
+        with self._lock:
+            return self.balances.get(asset, 0) - self.reserved.get(asset, 0)
+
+    def reserve(self, outgoing: Dict[int, int], incoming: Dict[int, int] = None) -> Reservation:
+        """
+        Hold outgoing amounts for a swap. Raises ValueError, holding nothing, if any of
+        them exceeds what is not already reserved
+        """
+        with self._lock:
+            for asset, amount in outgoing.items():
+                if amount > self.balances.get(asset, 0) - self.reserved.get(asset, 0):
+                    self.rejected += 1
+                    raise ValueError(f"Insufficient escrow liquidity for asset {asset}")
+
+            for asset, amount in outgoing.items():
+                self.reserved[asset] = self.reserved.get(asset, 0) + amount
+
+            return Reservation(next(self._ids), dict(outgoing), dict(incoming or {}))
+
+    def commit(self, reservation: Reservation):
+        """
+        The swap confirmed, so the reserved amounts have left the escrow and the
+        incoming ones arrived
+        """
+        with self._lock:
+            for asset, amount in reservation.outgoing.items():
+                self.reserved[asset] -= amount
+                self.balances[asset] -= amount
+            for asset, amount in reservation.incoming.items():
+                self.balances[asset] = self.balances.get(asset, 0) + amount
+
+    def release(self, reservation: Reservation):
+        """
+        The swap failed or expired, so nothing moved
+        """
+        with self._lock:
+            for asset, amount in reservation.outgoing.items():
+                self.reserved[asset] -= amount
+
+    def credit(self, asset: int, amount: int):
+        """
+        Record a deposit, or a withdrawal with a negative amount
+        """
+        with self._lock:
+            self.balances[asset] = self.balances.get(asset, 0) + amount
+            self.reserved.setdefault(asset, 0)
@@ -1,26 +1,44 @@
 import base64
-from typing import Optional
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Union
 
 from algosdk.future.transaction import SignedTransaction
 from algosdk.v2client import algod
+from backend.services.suggestedParams import SuggestedParamsProvider
+from backend.services.confirmationTracker import ConfirmationTracker
+
+@dataclass
+class SubmitResult:
+    """
+    Outcome of one item passed to NetworkInteraction.submit_many
+    """
+
+    txid: Optional[str] = None
+    confirmed_round: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.confirmed_round is not None
+
 
 class NetworkInteraction:
 
+    max_in_flight = 16      # Default limit on unconfirmed items in submit_many
+
     @staticmethod
-    def wait_for_confirmation(client: algod.AlgodClient, txid):
+    def wait_for_confirmation(client: algod.AlgodClient, txid, last_valid: Optional[int] = None):
         """
         Utility function to wait until the transaction is
-        confirmed before proceeding.
+        confirmed before proceeding. Waiting is shared with every other pending
+        transaction through the client's ConfirmationTracker.
+        :param client:
+        :param txid:
+        :param last_valid: last valid round of the transaction, the wait fails with TimeoutError after it
+        :return:
         """
-        last_round = client.status().get('last-round')
-        txinfo = client.pending_transaction_info(txid)
-        while not (txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0):
-            print("Waiting for confirmation")
-            last_round += 1
-            client.status_after_block(last_round)
-            txinfo = client.pending_transaction_info(txid)
-        print(f"Transaction {txid} confirmed in round {txinfo.get('confirmed-round')}.")
-        return txinfo
+        return ConfirmationTracker.forClient(client).wait(txid, lastValid=last_valid)
 
     @staticmethod
     def get_default_suggested_params(client: algod.AlgodClient):
@@ -29,12 +47,7 @@ class NetworkInteraction:
         :param client:
         :return:
         """
-        suggested_params = client.suggested_params()
-
-        suggested_params.flat_fee = True
-        suggested_params.fee = 1000
-
-        return suggested_params
+        return SuggestedParamsProvider.forClient(client).get()
 
     @staticmethod
     def submit_asa_creation(client: algod.AlgodClient, transaction: SignedTransaction) -> (Optional[int], str):
@@ -46,7 +59,7 @@ class NetworkInteraction:
         """
         txid = client.send_transaction(transaction)
 
-        NetworkInteraction.wait_for_confirmation(client, txid)
+        NetworkInteraction.wait_for_confirmation(client, txid, transaction.transaction.last_valid_round)
 
         try:
             ptx = client.pending_transaction_info(txid)
@@ -56,14 +69,78 @@ class NetworkInteraction:
             print(e)
             print('Unsuccessful creation of Algorand Standard Asset.')
 
+    @staticmethod
+    def submit_app_creation(client: algod.AlgodClient, transaction: SignedTransaction) -> (Optional[int], str):
+        """
+        Submits an application creation transaction to the network. If the transaction is successful the app's id is returned.
+        :param client:
+        :param transaction:
+        :return:
+        """
+        txid = client.send_transaction(transaction)
+
+        NetworkInteraction.wait_for_confirmation(client, txid, transaction.transaction.last_valid_round)
+
+        try:
+            ptx = client.pending_transaction_info(txid)
+            return ptx["application-index"], txid
+        except Exception as e:
+            # TODO: Proper logging needed.
+            print(e)
+            print('Unsuccessful creation of application.')
+
     @staticmethod
     def submit_transaction(client: algod.AlgodClient, transaction: SignedTransaction) -> Optional[str]:
         txid = client.send_transaction(transaction)
 
-        NetworkInteraction.wait_for_confirmation(client, txid)
+        NetworkInteraction.wait_for_confirmation(client, txid, transaction.transaction.last_valid_round)
 
         return txid
 
+    @staticmethod
+    def submit_many(client: algod.AlgodClient,
+                    items: Sequence[Union[SignedTransaction, List[SignedTransaction]]],
+                    max_in_flight: Optional[int] = None) -> List[SubmitResult]:
+        """
+        Submits transactions and atomic groups back to back without waiting for each to
+        confirm, so items sent in order can land in the same block. Waiting is shared
+        through the client's ConfirmationTracker.
+        :param client:
+        :param items: signed transactions, or lists of signed transactions sent as a group
+        :param max_in_flight: most items sent but not yet confirmed at once
+        :return:
+            A SubmitResult per item, in order, with the txid and confirmed round or the rejection reason
+        """
+        results = [SubmitResult() for _ in items]
+        slots = threading.BoundedSemaphore(max_in_flight or NetworkInteraction.max_in_flight)
+        tracker = ConfirmationTracker.forClient(client)
+        futures = []
+
+        def on_done(future):
+            slots.release()
+
+        for item, result in zip(items, results):
+            group = item if isinstance(item, (list, tuple)) else [item]
+            slots.acquire()
+            try:
+                result.txid = client.send_transactions(group)
+            except Exception as e:
+                result.error = str(e)
+                slots.release()
+                continue
+
+            last_valid = min(tx.transaction.last_valid_round for tx in group)
+            futures.append((result, tracker.track(result.txid, last_valid, callback=on_done)))
+
+        # Done callbacks run after waiters wake, so results are filled in here
+        for result, future in futures:
+            try:
+                result.confirmed_round = future.result().get("confirmed-round")
+            except Exception as e:
+                result.error = str(e)
+
+        return results
+
     @staticmethod
     def compile_program(client: algod.AlgodClient, source_code):
         """
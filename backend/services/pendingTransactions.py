@@ -0,0 +1,175 @@
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from backend.services.confirmationTracker import ConfirmationTracker
+from backend.services.keyPair import KeyPair
+from backend.services.liquidityLedger import Reservation
+
+
+@dataclass(eq=False)
+class InFlightSwap:
+    """
+    A swap the manager is responsible for until it confirms or gives up. txID and
+    lastValid describe the group currently in the pool
+    """
+
+    action: str
+    amount: float
+    chadsPerAlgo: float
+    buyerKey: KeyPair
+    lease: Optional[bytes] = None
+    reservation: Optional[Reservation] = None
+    txID: Optional[str] = None
+    lastValid: int = 0
+    attempts: int = 0
+    createdAt: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.createdAt
+
+
+class PendingTransactionManager:
+    """
+    Sends swaps for an exchange with a short validity window and follows each group
+    until it confirms. A group that is still missing once the block of its last valid
+    round is committed can never confirm, so it is rebuilt with fresh params and a
+    re-quoted rate and sent again, up to maxAttempts times. The escrow payout is
+    reserved in the exchange's liquidity ledger for as long as an attempt is pending,
+    including while algod can't be reached to tell whether it confirmed
+    """
+
+    validRounds = 10        # [rounds] Validity window of managed swap groups
+    maxAttempts = 3
+
+    def __init__(self, exchange, requote: Optional[Callable[[str], float]] = None):
+        """
+        :param requote: returns the chadsPerAlgo rate for an action when a swap is rebuilt,
+            the original rate is kept when not given
+        """
+        self.exchange = exchange
+        self.requote = requote
+        self.expired = 0
+        self.resubmitted = 0
+        self.trackingErrors = 0
+
+        self._inFlight: List[InFlightSwap] = []
+        self._lock = threading.Lock()
+
+    @property
+    def queueDepth(self) -> int:
+        return len(self._inFlight)
+
+    @property
+    def ages(self) -> List[float]:
+        """
+        [s] Time since each in-flight swap was first submitted, oldest first
+        """
+        with self._lock:
+            return [swap.age for swap in self._inFlight]
+
+    @property
+    def oldestAge(self) -> float:
+        ages = self.ages
+        return ages[0] if ages else 0.0
+
+    def submit(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+               lease: Optional[bytes] = None) -> Future:
+        """
+        Send a swap. The future resolves to the txID of the group that confirmed. A
+        lease is set on the escrow transaction of every attempt, which is safe since an
+        attempt is only rebuilt once the previous one can no longer confirm
+        """
+        swap = InFlightSwap(action, amount, chadsPerAlgo, buyerKey, lease)
+        with self._lock:
+            self._inFlight.append(swap)
+
+        self._send(swap)
+        return swap.future
+
+    def _send(self, swap: InFlightSwap):
+        swap.reservation = None
+        try:
+            self.exchange.preflightSwap(swap.action, swap.amount, swap.chadsPerAlgo, swap.buyerKey.pubKey)
+            swap.reservation = self.exchange.reserveSwap(swap.action, swap.amount, swap.chadsPerAlgo)
+
+            if self.exchange.swapTemplates is not None:
+                group = self.exchange.buildSwapGroup(
+                    swap.action, swap.amount, swap.chadsPerAlgo, swap.buyerKey, self.validRounds, swap.lease
+                )
+                swap.txID, swap.lastValid = self.exchange.submitSwapGroup(group, swap.buyerKey)
+            else:
+                buyerTx, escrowTx = self.exchange.buildSwap(swap.action, swap.amount, swap.chadsPerAlgo, swap.buyerKey)
+                for tx in (buyerTx, escrowTx):
+                    tx.last_valid_round = min(tx.last_valid_round, tx.first_valid_round + self.validRounds)
+                if swap.lease is not None:
+                    escrowTx.lease = swap.lease
+
+                swap.txID, swap.lastValid = self.exchange.submitSwap(
+                    buyerTx, escrowTx, swap.buyerKey, swap.action, swap.chadsPerAlgo
+                )
+        except Exception as e:
+            if swap.reservation is not None:
+                self.exchange.liquidity.release(swap.reservation)
+            self._finish(swap, error=e)
+            return
+
+        swap.attempts += 1
+        self._track(swap)
+
+    def _track(self, swap: InFlightSwap):
+        ConfirmationTracker.forClient(self.exchange.client).track(
+            swap.txID, lastValid=swap.lastValid, callback=lambda confirmation: self._onConfirmation(swap, confirmation)
+        )
+
+    def _onConfirmation(self, swap: InFlightSwap, confirmation: Future):
+        error = confirmation.exception()
+        if error is not None and not isinstance(error, (ValueError, TimeoutError)):
+            # Tracking failed but the group may still confirm, so the payout stays
+            # reserved. Once algod is back the tracker sees the group confirm, or
+            # expire if its last valid round passed without it
+            self.trackingErrors += 1
+            print(f"Lost track of swap group {swap.txID}, tracking again: {error}")
+            self._track(swap)
+            return
+
+        if error is None:
+            self.exchange.liquidity.commit(swap.reservation)
+        else:
+            self.exchange.liquidity.release(swap.reservation)
+
+        if isinstance(error, TimeoutError):
+            self.expired += 1
+            if swap.attempts < self.maxAttempts:
+                self.resubmitted += 1
+                print(f"Swap group {swap.txID} expired at round {swap.lastValid}, resubmitting")
+
+                # Rebuilding asks algod for params, which must not hold up the tracker
+                threading.Thread(target=self._resend, args=(swap,), daemon=True).start()
+                return
+
+        self._finish(swap, error=error)
+
+    def _resend(self, swap: InFlightSwap):
+        try:
+            if self.requote is not None:
+                swap.chadsPerAlgo = self.requote(swap.action)
+        except Exception as e:
+            self._finish(swap, error=e)
+            return
+
+        self._send(swap)
+
+    def _finish(self, swap: InFlightSwap, error: Optional[BaseException] = None):
+        with self._lock:
+            if swap in self._inFlight:
+                self._inFlight.remove(swap)
+
+        if error is not None:
+            swap.future.set_exception(error)
+        else:
+            swap.future.set_result(swap.txID)
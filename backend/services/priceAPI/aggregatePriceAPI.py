@@ -0,0 +1,223 @@
+from backend.services.priceAPI.priceAPIInterface import PriceAPIInterface, PriceReturn
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+import json
+import os
+import queue
+import statistics
+import threading
+import time
+import requests
+
+class JSONPriceSource:
+    """
+    A price endpoint returning JSON, with the price found by following path through
+    the response, e.g. ["algorand", "nzd"]. A hedged source is asked a second time
+    when its first response is slow
+    """
+
+    def __init__(self, name: str, url: str, path: Sequence[str], timeout: float = 2.0, hedge: bool = False):
+        self.name = name
+        self.url = url
+        self.path = list(path)
+        self.timeout = timeout      # [s] Per request
+        self.hedge = hedge
+
+    @staticmethod
+    def fromDict(config: dict) -> "JSONPriceSource":
+        return JSONPriceSource(
+            config["name"], config["url"], config["path"],
+            config.get("timeout", 2.0), config.get("hedge", False)
+        )
+
+    def fetchPrice(self) -> float:
+        res = requests.get(self.url, timeout=self.timeout, headers={"accept": "application/json"})
+        res.raise_for_status()
+
+        value = res.json()
+        for key in self.path:
+            value = value[key]
+
+        price = float(value)
+        if not price > 0:
+            raise ValueError(f"{self.name} returned price {price}")
+        return price
+
+class SourceStats:
+    """
+    Latency and outcome counts of one price source
+    """
+
+    window = 100        # Latencies kept for the percentiles
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.late = 0       # Answers that missed the latency budget
+        self.hedges = 0
+        self.latencies = deque(maxlen=SourceStats.window)
+
+    @property
+    def errorRate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def latency(self, percentile: float) -> Optional[float]:
+        """
+        [s] Latency percentile (0 - 100) of recent successful requests
+        """
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+    def toDict(self) -> dict:
+        return {
+            "requests": self.requests, "errors": self.errors, "late": self.late, "hedges": self.hedges,
+            "errorRate": self.errorRate, "p50": self.latency(50), "p95": self.latency(95),
+        }
+
+class _Round:
+    """
+    One aggregation: answers from the attempts on every source arrive on a queue
+    """
+
+    def __init__(self, sources: int, deadline: float):
+        self.deadline = deadline
+        self.answers: "queue.Queue" = queue.Queue()
+        self.attempts = [0] * sources
+        self.pending = [0] * sources
+        self.prices: Dict[int, float] = {}
+
+class AggregatePriceAPI(PriceAPIInterface):
+    """
+    Queries every source concurrently and returns the median of the prices that
+    arrive within latencyBudget. A hedged source that has not answered once its
+    usual (p95) latency has passed gets a second request, so a single slow response
+    does not cost the source its vote. Each request is bounded by its source's
+    timeout and requests still running when the budget runs out are left to finish
+    in the pool without holding up the caller
+    """
+
+    latencyBudget = 1.5     # [s]
+    minHedgeDelay = 0.2     # [s] Never hedge sooner than this
+    minSources = 1          # Answers needed for a successful price
+    configPath = os.getenv(
+        "CHAD_PRICE_SOURCES",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "priceSources.json")
+    )
+
+    def __init__(self, sources: List[JSONPriceSource], latencyBudget: Optional[float] = None,
+                 minSources: Optional[int] = None):
+        if not sources:
+            raise ValueError("An aggregate price needs at least one source")
+
+        self.sources = sources
+        self.latencyBudget = AggregatePriceAPI.latencyBudget if latencyBudget is None else latencyBudget
+        self.minSources = AggregatePriceAPI.minSources if minSources is None else minSources
+        self.stats = {source.name: SourceStats() for source in sources}
+        self.currPrice = 0
+
+        # Room for each source's request and hedge while the last round's stragglers time out
+        self._pool = ThreadPoolExecutor(4 * len(sources), thread_name_prefix="PriceSource")
+        self._statsLock = threading.Lock()
+
+    @staticmethod
+    def fromConfig(path: Optional[str] = None) -> "AggregatePriceAPI":
+        """
+        Aggregate of the sources listed in the JSON config at path, by default
+        configPath. Each source gives its name, url, path and optionally timeout and
+        hedge. latencyBudget and minSources may be set at the top level
+        """
+        with open(path or AggregatePriceAPI.configPath, "r") as f:
+            config = json.load(f)
+
+        return AggregatePriceAPI(
+            [JSONPriceSource.fromDict(source) for source in config["sources"]],
+            latencyBudget=config.get("latencyBudget"), minSources=config.get("minSources")
+        )
+
+    def requestAlgoPrice(self) -> PriceReturn:
+        """
+        Median price of the sources answering within the latency budget. success is
+        False, with the last good price, if fewer than minSources answered
+        """
+        start = time.monotonic()
+        deadline = start + self.latencyBudget
+        current = _Round(len(self.sources), deadline)
+
+        for i in range(len(self.sources)):
+            self._attempt(current, i)
+
+        hedgeAt = [start + self._hedgeDelay(source) if source.hedge else None for source in self.sources]
+        while True:
+            waiting = [i for i in range(len(self.sources)) if i not in current.prices and current.pending[i] > 0]
+            if not waiting:
+                break
+
+            hedging = [i for i in waiting if hedgeAt[i] is not None and current.attempts[i] == 1]
+            now = time.monotonic()
+            for i in hedging:
+                if now >= hedgeAt[i]:
+                    with self._statsLock:
+                        self.stats[self.sources[i].name].hedges += 1
+                    self._attempt(current, i)
+
+            wakeAt = min([deadline] + [hedgeAt[i] for i in hedging if current.attempts[i] == 1])
+            try:
+                i, price = current.answers.get(timeout=max(wakeAt - time.monotonic(), 0))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    break
+                continue
+
+            current.pending[i] -= 1
+            if price is not None:
+                current.prices.setdefault(i, price)
+
+        if len(current.prices) < self.minSources:
+            print(f"Only {len(current.prices)} of {len(self.sources)} price sources answered in time")
+            return PriceReturn(self.currPrice, False)
+
+        self.currPrice = statistics.median(current.prices.values())
+        return PriceReturn(self.currPrice, True)
+
+    def sourceStats(self) -> Dict[str, dict]:
+        with self._statsLock:
+            return {name: stats.toDict() for name, stats in self.stats.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+    def _hedgeDelay(self, source: JSONPriceSource) -> float:
+        with self._statsLock:
+            p95 = self.stats[source.name].latency(95)
+        # Until a source has answered, hedge halfway through the budget
+        return max(p95 if p95 is not None else self.latencyBudget / 2, self.minHedgeDelay)
+
+    def _attempt(self, current: _Round, i: int):
+        current.attempts[i] += 1
+        current.pending[i] += 1
+        self._pool.submit(self._fetch, current, i)
+
+    def _fetch(self, current: _Round, i: int):
+        source = self.sources[i]
+        stats = self.stats[source.name]
+        start = time.monotonic()
+        try:
+            price = source.fetchPrice()
+        except Exception as e:
+            with self._statsLock:
+                stats.requests += 1
+                stats.errors += 1
+            print(f"Price source {source.name} failed: {e}")
+            current.answers.put((i, None))
+            return
+
+        finished = time.monotonic()
+        with self._statsLock:
+            stats.requests += 1
+            stats.latencies.append(finished - start)
+            if finished > current.deadline:
+                stats.late += 1
+        current.answers.put((i, price))
@@ -0,0 +1,165 @@
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.services.blockFollower import BlockEvent, Subscription
+
+
+class CandleSeries:
+    """
+    OHLC, volume and trade count candles of one interval, oldest first in parallel
+    arrays. Candles are only kept for intervals that saw a sample, and the oldest
+    half is dropped when the arrays fill up, so appending is amortised O(1) and a
+    time range is found by binary search over the candle start times
+    """
+
+    def __init__(self, interval: int, capacity: int):
+        self.interval = interval
+        self.capacity = capacity
+        self.size = 0
+
+        self.start = np.zeros(capacity, dtype=np.int64)         # [s] Unix time the candle opens
+        self.ohlc = np.full((capacity, 4), np.nan)
+        self.volume = np.zeros(capacity, dtype=np.int64)        # [uAlgo] Swapped through the escrow
+        self.trades = np.zeros(capacity, dtype=np.int64)
+
+    def addPrice(self, price: float, timestamp: float):
+        i = self._candle(timestamp, price)
+        if i is None:
+            return
+
+        candle = self.ohlc[i]
+        if math.isnan(candle[0]):
+            candle[:] = price
+            return
+
+        candle[1] = max(candle[1], price)
+        candle[2] = min(candle[2], price)
+        if i == self.size - 1:
+            candle[3] = price
+
+    def addSwap(self, algoAmount: int, timestamp: float):
+        i = self._candle(timestamp)
+        if i is not None:
+            self.volume[i] += algoAmount
+            self.trades[i] += 1
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None,
+              limit: Optional[int] = None) -> slice:
+        """
+        Slice of the candles overlapping [start, end), the latest limit of them if given
+        """
+        starts = self.start[:self.size]
+        lo = 0 if start is None else int(np.searchsorted(starts, start // self.interval * self.interval, side="left"))
+        hi = self.size if end is None else int(np.searchsorted(starts, end, side="left"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+
+        return slice(lo, max(lo, hi))
+
+    def _candle(self, timestamp: float, opening: Optional[float] = None) -> Optional[int]:
+        """
+        Index of the candle timestamp falls in, opening a new one at opening if it is
+        newer than every candle. None for a late sample whose interval has no candle
+        """
+        start = int(timestamp // self.interval) * self.interval
+        n = self.size
+        if n and self.start[n - 1] == start:
+            return n - 1
+
+        if n == 0 or start > self.start[n - 1]:
+            if n == self.capacity:
+                self._dropOldest()
+                n = self.size
+
+            # A candle opened by a swap starts from the last close
+            if opening is None:
+                opening = self.ohlc[n - 1, 3] if n else np.nan
+            self.start[n] = start
+            self.ohlc[n] = opening
+            self.volume[n] = 0
+            self.trades[n] = 0
+            self.size += 1
+            return n
+
+        i = int(np.searchsorted(self.start[:n], start))
+        return i if self.start[i] == start else None
+
+    def _dropOldest(self):
+        keep = self.capacity // 2
+        for array in (self.start, self.ohlc, self.volume, self.trades):
+            array[:keep] = array[self.size - keep:self.size]
+        self.size = keep
+
+
+class Candles:
+    """
+    Price candles for charting, kept in memory for each of a fixed set of intervals.
+    Every price sample and confirmed swap updates the current candle of each
+    interval in place, so serving a chart never recomputes from raw samples
+    """
+
+    intervals = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}     # [s]
+    capacity = 2048             # Candles kept per interval
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.series: Dict[str, CandleSeries] = {
+            name: CandleSeries(seconds, capacity or Candles.capacity) for name, seconds in Candles.intervals.items()
+        }
+        self._lock = threading.Lock()
+
+    def addPrice(self, price: float, timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for series in self.series.values():
+                series.addPrice(price, timestamp)
+
+    def addSwap(self, algoAmount: int, timestamp: Optional[float] = None):
+        """
+        Count a swap moving algoAmount uAlgo through the escrow
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            for series in self.series.values():
+                series.addSwap(algoAmount, timestamp)
+
+    def follow(self, exchange) -> Subscription:
+        """
+        Add the Algo leg of every swap through exchange's escrow as it confirms. Swaps
+        are the grouped payments with an amount, which leaves out the 0 Algo
+        approvals and the admin's ungrouped deposits and withdrawals
+        """
+        def onBlock(event: BlockEvent):
+            for tx in event.transactions:
+                if tx.txn.get("type") == "pay" and "grp" in tx.txn and tx.txn.get("amt", 0) > 0:
+                    self.addSwap(tx.txn["amt"], event.timestamp)
+
+        return exchange.subscribe(onBlock)
+
+    def query(self, interval: str, start: Optional[float] = None, end: Optional[float] = None,
+              limit: Optional[int] = None) -> dict:
+        """
+        Candles of interval ("1m", "5m", "1h" or "1d") from start to end (Unix times),
+        as parallel lists. Prices are None for candles that only saw swaps
+        """
+        series = self.series.get(interval)
+        if series is None:
+            raise ValueError(f"Unknown candle interval {interval}, expected one of {list(self.series)}")
+
+        with self._lock:
+            span = series.range(start, end, limit)
+            ohlc = series.ohlc[span]
+            ohlc = np.where(np.isnan(ohlc), None, ohlc)
+            return {
+                "interval": interval,
+                "start": series.start[span].tolist(),
+                "open": ohlc[:, 0].tolist(),
+                "high": ohlc[:, 1].tolist(),
+                "low": ohlc[:, 2].tolist(),
+                "close": ohlc[:, 3].tolist(),
+                "volume": series.volume[span].tolist(),
+                "trades": series.trades[span].tolist(),
+            }
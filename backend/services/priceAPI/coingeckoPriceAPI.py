@@ -5,15 +5,16 @@ import time
 class CoingeckoPriceAPI(PriceAPIInterface):
 
     requestPeriod = 10 # [s]
+    timeout = 5 # [s]
     request = 'https://api.coingecko.com/api/v3/simple/price?ids=algorand&vs_currencies=nzd&include_last_updated_at=true'
     headers = 'accept: application/json'
 
-    def __init__(self):
+    def __init__(self, probe: bool = True):
         self.currPrice = 0
         self.lastUpdated = 0
 
         # Test that we can reach the API endpoint
-        if self.requestAlgoPrice().success == False:
+        if probe and self.requestAlgoPrice().success == False:
             raise ValueError("CoingeckoAPI was unable to connect")
 
     def requestAlgoPrice(self) -> PriceReturn:
@@ -28,7 +29,11 @@ class CoingeckoPriceAPI(PriceAPIInterface):
             return PriceReturn(self.currPrice, True)
 
         # Otherwise, get a new price
-        res = requests.get(CoingeckoPriceAPI.request)
+        try:
+            res = requests.get(CoingeckoPriceAPI.request, timeout=CoingeckoPriceAPI.timeout)
+        except requests.RequestException as e:
+            print(f"Price request failed: {e}")
+            return PriceReturn(self.currPrice, False)
 
         if res.status_code != requests.codes.OK:
             print(f"Got status code: {res.status_code}")
@@ -0,0 +1,205 @@
+import math
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class _Window:
+    """
+    Running sums over the samples of the last `seconds`. tail is the sequence number
+    of the oldest sample inside the window
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.tail = 0
+        self.area = 0.0         # Integral of the stepped price from the tail sample to the latest
+        self.returns = 0.0      # Sums over the log returns between samples in the window
+        self.squares = 0.0
+        self.ema: Optional[float] = None
+
+
+class PriceHistory:
+    """
+    Fixed size ring buffer of (timestamp, price) samples. TWAP, EMA and volatility
+    are kept up to date for every configured window as samples arrive: a sample adds
+    its terms to each window's running sums and the samples that fell out of the
+    window subtract theirs, so a query never rescans history. The price is treated
+    as holding from one sample until the next
+    """
+
+    capacity = 4096
+    windows = (60.0, 300.0, 3600.0)     # [s]
+
+    def __init__(self, capacity: Optional[int] = None, windows: Optional[Sequence[float]] = None):
+        self.capacity = capacity or PriceHistory.capacity
+        self.windows = tuple(windows or PriceHistory.windows)
+
+        self._times = np.zeros(self.capacity, dtype=np.float64)
+        self._prices = np.zeros(self.capacity, dtype=np.float64)
+        self._returns = np.zeros(self.capacity, dtype=np.float64)   # Log return into each sample
+        self._count = 0         # Samples ever added, the sequence number of the next one
+        self._stats: Dict[float, _Window] = {seconds: _Window(seconds) for seconds in self.windows}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def add(self, price: float, timestamp: Optional[float] = None):
+        """
+        Record price at timestamp (wall clock, default now). Samples must arrive in
+        time order, and non-positive prices are ignored
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if price <= 0:
+            return
+
+        with self._lock:
+            seq = self._count
+            if seq > 0:
+                last = (seq - 1) % self.capacity
+                lastTime, lastPrice = self._times[last], self._prices[last]
+                if timestamp < lastTime:
+                    raise ValueError(f"Price sample at {timestamp} is older than the latest at {lastTime}")
+                area = lastPrice * (timestamp - lastTime)
+                logReturn = math.log(price / lastPrice)
+            else:
+                lastTime, area, logReturn = timestamp, 0.0, 0.0
+
+            # The sample about to be overwritten leaves every window first
+            for window in self._stats.values():
+                self._evict(window, seq + 1 - self.capacity)
+
+            i = seq % self.capacity
+            self._times[i], self._prices[i], self._returns[i] = timestamp, price, logReturn
+            self._count += 1
+
+            for window in self._stats.values():
+                if seq > 0:
+                    window.area += area
+                    window.returns += logReturn
+                    window.squares += logReturn * logReturn
+                self._evict(window, 0, timestamp)
+
+                alpha = 1.0 - math.exp(-(timestamp - lastTime) / window.seconds)
+                window.ema = price if window.ema is None else window.ema + alpha * (price - window.ema)
+
+    @property
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """
+        (timestamp, price) of the newest sample
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+            i = (self._count - 1) % self.capacity
+            return float(self._times[i]), float(self._prices[i])
+
+    def twap(self, window: float) -> Optional[float]:
+        """
+        Time weighted average price over the window seconds up to the latest sample, or
+        since the oldest sample if the history is shorter than the window
+        """
+        with self._lock:
+            stats = self._window(window)
+            if self._count == 0:
+                return None
+
+            latest, tail = (self._count - 1) % self.capacity, stats.tail % self.capacity
+            now, tailTime = self._times[latest], self._times[tail]
+
+            # The tail sample can predate the window, only its price from the window start counts
+            start = max(tailTime, now - window)
+            span = now - start
+            if span <= 0:
+                return float(self._prices[latest])
+            return float((stats.area - self._prices[tail] * (start - tailTime)) / span)
+
+    def ema(self, window: float) -> Optional[float]:
+        """
+        Exponential moving average with a time constant of window seconds
+        """
+        with self._lock:
+            return self._window(window).ema
+
+    def volatility(self, window: float) -> float:
+        """
+        Standard deviation of the log returns between samples in window
+        """
+        with self._lock:
+            stats = self._window(window)
+            n = self._count - 1 - stats.tail
+            if n < 2:
+                return 0.0
+
+            mean = stats.returns / n
+            return math.sqrt(max(stats.squares / n - mean * mean, 0.0))
+
+    def samples(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copies of the buffered (timestamps, prices), oldest first
+        """
+        with self._lock:
+            order = (np.arange(len(self)) + max(self._count - self.capacity, 0)) % self.capacity
+            return self._times[order].copy(), self._prices[order].copy()
+
+    def save(self, path: str):
+        """
+        Snapshot the buffered samples to path, atomically replacing any earlier one
+        """
+        times, prices = self.samples()
+        directory = os.path.dirname(os.path.abspath(path))
+
+        tmpPath = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=directory, suffix=".npz")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, times=times, prices=prices)
+            os.replace(tmpPath, path)
+        except OSError as e:
+            print(f"Failed to save price history to {path}: {e}")
+            if tmpPath is not None and os.path.exists(tmpPath):
+                os.remove(tmpPath)
+
+    @staticmethod
+    def load(path: str, capacity: Optional[int] = None, windows: Optional[Sequence[float]] = None) -> "PriceHistory":
+        """
+        History warm started from a snapshot at path. The samples are replayed to
+        rebuild the window statistics. A missing or unreadable snapshot gives an
+        empty history
+        """
+        history = PriceHistory(capacity, windows)
+        try:
+            with np.load(path) as snapshot:
+                times, prices = snapshot["times"], snapshot["prices"]
+        except (OSError, KeyError, ValueError):
+            return history
+
+        for timestamp, price in zip(times[-history.capacity:].tolist(), prices[-history.capacity:].tolist()):
+            history.add(price, timestamp)
+
+        return history
+
+    def _window(self, seconds: float) -> _Window:
+        stats = self._stats.get(seconds)
+        if stats is None:
+            raise ValueError(f"Price history does not track a {seconds}s window")
+        return stats
+
+    def _evict(self, window: _Window, before: int, now: float = -math.inf):
+        """
+        Drop samples from the front of window that come before sequence number before,
+        or that the next sample supersedes as the price at the start of the window
+        """
+        while window.tail < self._count - 1 and (
+                window.tail < before or self._times[(window.tail + 1) % self.capacity] <= now - window.seconds):
+            i, j = window.tail % self.capacity, (window.tail + 1) % self.capacity
+            window.area -= self._prices[i] * (self._times[j] - self._times[i])
+            window.returns -= self._returns[j]
+            window.squares -= self._returns[j] * self._returns[j]
+            window.tail += 1
@@ -0,0 +1,183 @@
+from backend.services.priceAPI.priceAPIInterface import PriceAPIInterface, PriceReturn
+from backend.services.priceAPI.aggregatePriceAPI import AggregatePriceAPI
+from backend.services.priceAPI.candles import Candles
+from backend.services.priceAPI.priceHistory import PriceHistory
+from typing import Optional
+import os
+import threading
+import time
+
+class _Fetch:
+    """
+    An upstream request that concurrent callers can wait on
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[PriceReturn] = None
+
+class PriceService(PriceAPIInterface):
+    """
+    Long lived price service shared by the whole process. The price is refreshed
+    from an upstream PriceAPIInterface in a background thread, concurrent refreshes
+    are collapsed into a single upstream request and the last good price keeps
+    being served while the upstream is failing. Requests never wait on the network.
+    Every good price is recorded in a PriceHistory, snapshotted to historyPath when
+    given so a restart keeps its smoothed prices, and in the chart candles
+    """
+
+    refreshPeriod = 10      # [s]
+    maxStaleness = 300      # [s] Serve the last good price for this long after upstream errors
+
+    _instance = None
+    _instanceLock = threading.Lock()
+
+    def __init__(self, source: PriceAPIInterface, refreshPeriod: Optional[float] = None, maxStaleness: Optional[float] = None,
+                 history: Optional[PriceHistory] = None, historyPath: Optional[str] = None):
+        self.source = source
+        self.history = history if history is not None else PriceHistory()
+        self.historyPath = historyPath
+        self.candles = Candles()
+        self.refreshPeriod = PriceService.refreshPeriod if refreshPeriod is None else refreshPeriod
+        self.maxStaleness = PriceService.maxStaleness if maxStaleness is None else maxStaleness
+
+        self.currPrice = 0
+        self.lastUpdated = None     # Monotonic time of the last successful refresh
+        self.upstreamRequests = 0
+        self.upstreamErrors = 0
+
+        self._lock = threading.Lock()
+        self._fetch: Optional[_Fetch] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def instance() -> "PriceService":
+        """
+        Return the process wide price service, starting it on first use. Prices come
+        from the sources configured in CHAD_PRICE_SOURCES, priceSources.json by default
+        """
+        if PriceService._instance is None:
+            with PriceService._instanceLock:
+                if PriceService._instance is None:
+                    historyPath = os.getenv("CHAD_PRICE_HISTORY")
+                    history = PriceHistory.load(historyPath) if historyPath else None
+                    source = AggregatePriceAPI.fromConfig()
+                    service = PriceService(source, history=history, historyPath=historyPath)
+                    service.start()
+                    PriceService._instance = service
+
+        return PriceService._instance
+
+    def start(self):
+        """
+        Start refreshing the price in the background
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="PriceService", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def requestAlgoPrice(self) -> PriceReturn:
+        """
+        Return the most recent price in NZD without blocking. success is False if no
+        price has been fetched yet or the last good price is older than maxStaleness
+        """
+        if self.lastUpdated is None:
+            return PriceReturn(self.currPrice, False)
+
+        age = time.monotonic() - self.lastUpdated
+
+        # Covers the background thread falling behind or not being started
+        if age >= self.refreshPeriod:
+            self._refreshAsync()
+
+        return PriceReturn(self.currPrice, age < self.maxStaleness)
+
+    def refresh(self) -> PriceReturn:
+        """
+        Fetch the price from upstream. Callers that arrive while a fetch is in flight
+        wait for and share its result instead of making their own request
+        """
+        with self._lock:
+            fetch = self._fetch
+            isLeader = fetch is None
+            if isLeader:
+                fetch = self._fetch = _Fetch()
+
+        if not isLeader:
+            fetch.done.wait()
+            return fetch.result
+
+        result = PriceReturn(self.currPrice, False)
+        try:
+            self.upstreamRequests += 1
+            result = self.source.requestAlgoPrice()
+        except Exception as e:
+            print(f"Price refresh failed: {e}")
+
+        try:
+            if result.success:
+                self.currPrice = result.price
+                self.lastUpdated = time.monotonic()
+                try:
+                    self._record(result.price)
+                except Exception as e:
+                    print(f"Price not recorded: {e}")
+            else:
+                self.upstreamErrors += 1
+        finally:
+            # Waiters and later callers must never be left on a fetch that won't finish
+            with self._lock:
+                self._fetch = None
+
+            fetch.result = result
+            fetch.done.set()
+
+        return result
+
+    def requestSmoothedPrice(self, window: float = 300.0) -> PriceReturn:
+        """
+        Time weighted average of the price over window seconds, one of the history's
+        windows, with the same success rules as requestAlgoPrice
+        """
+        latest = self.requestAlgoPrice()
+        twap = self.history.twap(window)
+        if twap is None:
+            return PriceReturn(latest.price, False)
+
+        return PriceReturn(twap, latest.success)
+
+    def _record(self, price: float):
+        """
+        Add price to the candles and history. A failure here never stops the price
+        being served
+        """
+        now = time.time()
+        try:
+            self.candles.addPrice(price, now)
+            self.history.add(price, now)
+        except ValueError as e:
+            # Wall clock stepped back, keep the history as it is
+            print(f"Price not recorded: {e}")
+            return
+
+        if self.historyPath is not None:
+            try:
+                self.history.save(self.historyPath)
+            except Exception as e:
+                print(f"Failed to save price history: {e}")
+
+    def _refreshAsync(self):
+        with self._lock:
+            inFlight = self._fetch is not None
+        if not inFlight:
+            threading.Thread(target=self.refresh, name="PriceServiceRefresh", daemon=True).start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refreshPeriod)
@@ -0,0 +1,76 @@
+import copy
+import threading
+from dataclasses import dataclass
+from typing import List
+
+from algosdk import encoding, logic
+from algosdk.future import transaction as algo_txn
+from backend.services.keyPair import KeyPair
+
+@dataclass(frozen=True)
+class PriceAttestation:
+    """
+    Rate signed by the admin for one escrow, valid for swaps whose last valid round
+    is no later than expiryRound
+    """
+
+    rate: int
+    expiryRound: int
+    exchangeAddr: str
+    signature: bytes
+
+    @staticmethod
+    def encode(rate: int, expiryRound: int, exchangeAddr: str) -> bytes:
+        return rate.to_bytes(8, "big") + expiryRound.to_bytes(8, "big") + encoding.decode_address(exchangeAddr)
+
+    @property
+    def data(self) -> bytes:
+        return PriceAttestation.encode(self.rate, self.expiryRound, self.exchangeAddr)
+
+    @property
+    def args(self) -> List[bytes]:
+        return [self.data, self.signature]
+
+    def logicSig(self, escrowLogicSig: algo_txn.LogicSig) -> algo_txn.LogicSig:
+        """
+        Escrow LogicSig carrying this attestation. Copied rather than rebuilt, since
+        building a LogicSig re-checks the program
+        """
+        lsig = copy.copy(escrowLogicSig)
+        lsig.args = self.args
+        return lsig
+
+class PriceAttestor:
+    """
+    Signs price attestations for an attested escrow. An attestation is reused for
+    every swap until the rate changes or it is about to expire, so signing work
+    scales with price ticks rather than swaps
+    """
+
+    validRounds = 30        # [rounds] Lifetime of an attestation
+    renewMargin = 5         # [rounds] Re-sign when fewer rounds than this remain
+
+    def __init__(self, signer: KeyPair, exchangeAddr: str):
+        self.signer = signer
+        self.exchangeAddr = exchangeAddr
+        self.signatures = 0
+        self._current = None
+        self._lock = threading.Lock()
+
+    def attest(self, rate: int, currentRound: int) -> PriceAttestation:
+        """
+        Return an attestation for rate that is valid for at least renewMargin rounds
+        after currentRound
+        """
+        with self._lock:
+            current = self._current
+            if current is not None and current.rate == rate and currentRound + self.renewMargin <= current.expiryRound:
+                return current
+
+            expiryRound = currentRound + self.validRounds
+            data = PriceAttestation.encode(rate, expiryRound, self.exchangeAddr)
+            signature = logic.teal_sign(self.signer.privKey, data, self.exchangeAddr)
+
+            self._current = PriceAttestation(rate, expiryRound, self.exchangeAddr, signature)
+            self.signatures += 1
+            return self._current
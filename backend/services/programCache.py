@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from algosdk import logic
+from algosdk.future import transaction as algo_txn
+
+
+@dataclass
+class CompiledProgram:
+    """
+    A compiled stateless program along with everything derived from it that
+    is needed to sign transactions from the program's account
+    """
+
+    key: str
+    programBytes: bytes
+    address: str
+    logicSig: algo_txn.LogicSig
+
+
+class ProgramCache:
+    """
+    Process wide cache of compiled TEAL programs. Programs are keyed by a hash of
+    the TEAL source and the parameters used to build it, held in memory and
+    persisted to disk so that a restarted worker never needs to compile again.
+    """
+
+    cacheDir = os.getenv(
+        "CHAD_PROGRAM_CACHE",
+        os.path.join(os.path.expanduser("~"), ".chadExchange", "programs")
+    )
+
+    _programs: Dict[str, CompiledProgram] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def programKey(sourceCode: str, params: dict) -> str:
+        """
+        Return the cache key for a TEAL program built with params
+        """
+        hasher = hashlib.sha256()
+        hasher.update(sourceCode.encode())
+        hasher.update(json.dumps(params, sort_keys=True).encode())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def get(sourceCode: str, params: dict, compile: Callable[[str], bytes]) -> CompiledProgram:
+        """
+        Return the compiled program for sourceCode. The compile callable is only
+        invoked if the program is in neither the memory nor the disk cache
+        """
+        key = ProgramCache.programKey(sourceCode, params)
+
+        program = ProgramCache._programs.get(key)
+        if program is not None:
+            return program
+
+        with ProgramCache._lock:
+            # Another thread may have compiled the program while we waited
+            program = ProgramCache._programs.get(key)
+            if program is not None:
+                return program
+
+            programBytes = ProgramCache._load(key)
+            if programBytes is None:
+                programBytes = compile(sourceCode)
+                ProgramCache._store(key, programBytes)
+
+            program = CompiledProgram(
+                key=key,
+                programBytes=programBytes,
+                address=logic.address(programBytes),
+                logicSig=algo_txn.LogicSig(programBytes)
+            )
+            ProgramCache._programs[key] = program
+
+        return program
+
+    @staticmethod
+    def clear(disk: bool = False):
+        """
+        Empty the in-memory cache and optionally remove persisted programs
+        """
+        with ProgramCache._lock:
+            ProgramCache._programs.clear()
+
+            if disk and os.path.isdir(ProgramCache.cacheDir):
+                for fileName in os.listdir(ProgramCache.cacheDir):
+                    if fileName.endswith(".json"):
+                        os.remove(os.path.join(ProgramCache.cacheDir, fileName))
+
+    @staticmethod
+    def _path(key: str) -> str:
+        return os.path.join(ProgramCache.cacheDir, f"{key}.json")
+
+    @staticmethod
+    def _load(key: str) -> Optional[bytes]:
+        """
+        Load a persisted program, ignoring missing or corrupt cache entries
+        """
+        try:
+            with open(ProgramCache._path(key), "r") as f:
+                entry = json.load(f)
+            programBytes = base64.b64decode(entry["program"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Guard against a truncated or tampered cache file
+        if logic.address(programBytes) != entry.get("address"):
+            return None
+
+        return programBytes
+
+    @staticmethod
+    def _store(key: str, programBytes: bytes):
+        """
+        Persist a program. Writes go to a temporary file first so that concurrent
+        workers never read a partially written entry
+        """
+        entry = {
+            "program": base64.b64encode(programBytes).decode(),
+            "address": logic.address(programBytes),
+        }
+
+        try:
+            os.makedirs(ProgramCache.cacheDir, exist_ok=True)
+            fd, tmpPath = tempfile.mkstemp(dir=ProgramCache.cacheDir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmpPath, ProgramCache._path(key))
+        except OSError as e:
+            # The cache is an optimisation, failing to persist is not fatal
+            print(f"Failed to persist compiled program: {e}")
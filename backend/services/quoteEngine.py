@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Sequence, Union
+
+import numpy as np
+
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.services.suggestedParams import SuggestedParamsProvider
+
+Amounts = Union[int, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Quote:
+    """
+    Native amounts of a swap: amountIn paid into the escrow, amountOut paid to the
+    buyer at rate uChads per uAlgo scaled by RATE_SCALE. fee is the uAlgo network fee
+    the buyer pays on top
+    """
+
+    action: str
+    amountIn: int
+    amountOut: int
+    rate: int
+    fee: int
+
+
+@dataclass(frozen=True)
+class QuoteLadder:
+    """
+    Quotes for a range of amounts at one rate. valid is False where a swap would be
+    rejected by the escrow, i.e. below minChadTxThresh or paying out nothing
+    """
+
+    action: str
+    rate: int
+    fee: int
+    amountIn: np.ndarray
+    amountOut: np.ndarray
+    valid: np.ndarray
+
+    def toDict(self) -> dict:
+        return {
+            "action": self.action,
+            "rate": self.rate,
+            "fee": self.fee,
+            "amountIn": self.amountIn.tolist(),
+            "amountOut": self.amountOut.tolist(),
+            "valid": self.valid.tolist(),
+        }
+
+
+class QuoteEngine:
+    """
+    Prices swaps in integer micro-units at a fixed point rate, rounding payouts down
+    exactly as the exchange app does. The same integer expressions run on a single
+    amount or a NumPy array of them, so a price ladder and the quote a swap is built
+    from always agree. Products are split into whole and fractional parts so no
+    intermediate overflows int64 unless the payout itself would
+    """
+
+    MICRO = 1000000                                 # Native units per Algo or CHAD
+    RATE_SCALE = ChadExchangeApp.RATE_SCALE
+    maxRate = np.iinfo(np.int64).max // RATE_SCALE  # Keeps remainder * RATE_SCALE in int64
+
+    actions = ("swapAlgoForChad", "swapChadForAlgo")
+
+    def __init__(self, minChadTxThresh: int, fee: int = SuggestedParamsProvider.fee):
+        self.minChadTxThresh = minChadTxThresh
+        self.fee = fee
+
+    @staticmethod
+    def toMicro(amount: Union[float, Sequence[float], np.ndarray]) -> Amounts:
+        """
+        Whole Algo or CHAD to native units, rounded to the nearest unit so 0.29 Algo
+        is 290000 uAlgo rather than the 289999 truncation gives
+        """
+        if np.ndim(amount) == 0:
+            return int(round(amount * QuoteEngine.MICRO))
+
+        return np.rint(np.asarray(amount, dtype=np.float64) * QuoteEngine.MICRO).astype(np.int64)
+
+    @staticmethod
+    def fromMicro(amount: Union[int, Sequence[int], np.ndarray]) -> Union[float, np.ndarray]:
+        if np.ndim(amount) == 0:
+            return amount / QuoteEngine.MICRO
+
+        return np.asarray(amount, dtype=np.int64) / QuoteEngine.MICRO
+
+    @staticmethod
+    def rateFor(chadsPerAlgo: float) -> int:
+        """
+        Fixed point rate, as stored by the exchange app
+        """
+        rate = ChadExchangeApp.rateFor(chadsPerAlgo)
+        if not 0 < rate <= QuoteEngine.maxRate:
+            raise ValueError(f"Rate {chadsPerAlgo} CHAD per Algo is out of range")
+
+        return rate
+
+    @staticmethod
+    def payout(action: str, amountIn: Amounts, rate: int) -> Amounts:
+        """
+        Native amount paid out for amountIn at rate, rounded down. Equal to
+        ChadExchangeApp.chadsFor/algosFor, for an int or an int64 array
+        """
+        if action == "swapAlgoForChad":
+            whole, part = amountIn // QuoteEngine.RATE_SCALE, amountIn % QuoteEngine.RATE_SCALE
+            return whole * rate + part * rate // QuoteEngine.RATE_SCALE
+
+        if action == "swapChadForAlgo":
+            whole, part = amountIn // rate, amountIn % rate
+            return whole * QuoteEngine.RATE_SCALE + part * QuoteEngine.RATE_SCALE // rate
+
+        raise ValueError(f"Unknown swap {action}")
+
+    def quote(self, action: str, amount: float, chadsPerAlgo: float) -> Quote:
+        """
+        Quote a swap of amount Algo (swapAlgoForChad) or CHAD (swapChadForAlgo).
+        Raises ValueError if the escrow would reject it
+        """
+        rate = self.rateFor(chadsPerAlgo)
+        amountIn = self.toMicro(amount)
+        if amountIn <= 0:
+            raise ValueError(f"Swap amount must be positive, got {amount}")
+
+        amountOut = self.payout(action, amountIn, rate)
+        chads = amountOut if action == "swapAlgoForChad" else amountIn
+        if chads < self.minChadTxThresh:
+            raise ValueError(f"Swap of {chads} uChad is below the minimum of {self.minChadTxThresh}")
+        if amountOut <= 0:
+            raise ValueError(f"Swap of {amount} pays out nothing at {chadsPerAlgo} CHAD per Algo")
+
+        return Quote(action, amountIn, amountOut, rate, self.fee)
+
+    def ladder(self, action: str, amounts: Union[Sequence[float], np.ndarray], chadsPerAlgo: float) -> QuoteLadder:
+        """
+        Quote every amount of Algo (swapAlgoForChad) or CHAD (swapChadForAlgo) in one
+        pass. Amounts the escrow would reject are marked rather than raised
+        """
+        if action not in self.actions:
+            raise ValueError(f"Unknown swap {action}")
+
+        rate = self.rateFor(chadsPerAlgo)
+        amountIn = self.toMicro(np.atleast_1d(np.asarray(amounts, dtype=np.float64)))
+        if (amountIn < 0).any():
+            raise ValueError("Swap amounts must not be negative")
+
+        amountOut = self.payout(action, amountIn, rate)
+        chads = amountOut if action == "swapAlgoForChad" else amountIn
+        valid = (chads >= self.minChadTxThresh) & (amountIn > 0) & (amountOut > 0)
+
+        return QuoteLadder(action, rate, self.fee, amountIn, amountOut, valid)
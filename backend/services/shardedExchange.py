@@ -0,0 +1,168 @@
+import hashlib
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from algosdk import encoding
+from algosdk.v2client import algod
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from backend.services.liquidityLedger import LiquidityLedger
+from backend.services.networkInteraction import NetworkInteraction, SubmitResult
+from backend.services.suggestedParams import SuggestedParamsProvider
+
+
+class ShardedExchange:
+    """
+    Exchange spread over several escrow shards. Each shard is a ChadExchangeService
+    whose escrow program differs only by its salt, so it has its own address,
+    liquidity ledger and pending transaction manager. Users are routed to a shard by
+    a hash of their address, so all of a user's swaps hit the same escrow. Shard 0
+    keeps salt 0, i.e. the escrow of an unsharded exchange
+    """
+
+    rebalanceThreshold = 0.2    # Rebalance a shard once it is this far off an even share
+
+    def __init__(self, client: algod.AlgodClient, admin: KeyPair, minChadTxThresh: int, chadID: int,
+                 shards: int, **kwargs):
+        """
+        :param kwargs: passed on to every shard's ChadExchangeService
+        """
+        if shards < 1:
+            raise ValueError("An exchange needs at least one shard")
+
+        self.client = client
+        self.admin = admin
+        self.chadID = chadID
+        self.shards = [
+            ChadExchangeService(client, admin, minChadTxThresh, chadID=chadID, salt=salt, **kwargs)
+            for salt in range(shards)
+        ]
+
+    @staticmethod
+    def shardIndex(address: str, shards: int) -> int:
+        """
+        Shard serving address
+        """
+        digest = hashlib.sha256(encoding.decode_address(address)).digest()
+        return int.from_bytes(digest[:8], "big") % shards
+
+    def shardFor(self, address: str) -> ChadExchangeService:
+        return self.shards[ShardedExchange.shardIndex(address, len(self.shards))]
+
+    def requestSwap(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+                    idempotencyKey: Optional[str] = None) -> Future:
+        return self.shardFor(buyerKey.pubKey).requestSwap(action, amount, chadsPerAlgo, buyerKey, idempotencyKey)
+
+    def swapAlgoForChad(self, algoAmount: float, chadsPerAlgo: float, buyerKey: KeyPair,
+                        idempotencyKey: Optional[str] = None) -> str:
+        return self.shardFor(buyerKey.pubKey).swapAlgoForChad(algoAmount, chadsPerAlgo, buyerKey, idempotencyKey)
+
+    def swapChadForAlgo(self, chadAmount: int, chadsPerAlgo: int, buyerKey: KeyPair,
+                        idempotencyKey: Optional[str] = None) -> str:
+        return self.shardFor(buyerKey.pubKey).swapChadForAlgo(chadAmount, chadsPerAlgo, buyerKey, idempotencyKey)
+
+    def fund(self, fundAmount: int = 250000) -> List[SubmitResult]:
+        """
+        Fund and opt in every shard, pipelined so they all confirm in one block
+        """
+        txns = [tx for shard in self.shards for tx in shard.fundingTxns(fundAmount)]
+
+        print(f"\nFunding {len(self.shards)} exchange shards")
+        results = NetworkInteraction.submit_many(self.client, txns)
+
+        failed = [result.error for result in results if result.error is not None]
+        if failed:
+            raise ValueError(f"Funding exchange shards failed: {failed[0]}")
+
+        for shard in self.shards:
+            shard.resetLiquidity()
+
+        return results
+
+    def available(self, asset: int) -> List[int]:
+        """
+        Unreserved balance of asset (0 for Algo) in each shard
+        """
+        return [shard.liquidity.available(asset) for shard in self.shards]
+
+    def rebalancePlan(self, asset: int) -> List[Tuple[int, int]]:
+        """
+        (shard index, amount) moves that even out asset (0 for Algo) across the shards,
+        negative for withdrawals. Shards within rebalanceThreshold of an even share are
+        left alone, and deposits never exceed what the withdrawals free up
+        """
+        available = self.available(asset)
+        target = sum(available) // len(available)
+        tolerance = target * self.rebalanceThreshold
+
+        # An Algo withdrawal also pays its fee out of the shard
+        fee = SuggestedParamsProvider.fee if asset == LiquidityLedger.ALGO else 0
+
+        plan, supply = [], 0
+        for i, held in enumerate(available):
+            amount = held - target - fee
+            if held - target > tolerance and amount > 0:
+                plan.append((i, -amount))
+                supply += amount
+
+        for i, held in enumerate(available):
+            amount = min(target - held, supply)
+            if target - held > tolerance and amount > 0:
+                plan.append((i, amount))
+                supply -= amount
+
+        return plan
+
+    def rebalance(self) -> Dict[int, List[Tuple[int, int]]]:
+        """
+        Even out Algo and CHAD across the shards through the admin account. Every
+        withdrawal is sent in one pipelined batch and every deposit in a second, so a
+        rebalance takes two blocks however many shards move. Returns the moves made
+        per asset
+        """
+        plans = {asset: self.rebalancePlan(asset) for asset in (LiquidityLedger.ALGO, self.chadID)}
+
+        withdrawals, txns = [], []
+        for asset, plan in plans.items():
+            for i, amount in plan:
+                if amount < 0:
+                    shard = self.shards[i]
+                    tx = shard.withdrawTx(asset, -amount)
+                    outgoing = {asset: -amount}
+                    outgoing[LiquidityLedger.ALGO] = outgoing.get(LiquidityLedger.ALGO, 0) + tx.transaction.fee
+                    try:
+                        reservation = shard.liquidity.reserve(outgoing)
+                    except ValueError:
+                        # Liquidity was reserved for swaps since the plan was made
+                        continue
+                    withdrawals.append((asset, i, -amount, reservation))
+                    txns.append(tx)
+
+        print(f"\nRebalancing exchange shards: {len(txns)} withdrawals")
+        supply = {asset: 0 for asset in plans}
+        moves = {asset: [] for asset in plans}
+        for (asset, i, amount, reservation), result in zip(withdrawals, NetworkInteraction.submit_many(self.client, txns)):
+            ledger = self.shards[i].liquidity
+            if result.ok:
+                ledger.commit(reservation)
+                supply[asset] += amount
+                moves[asset].append((i, -amount))
+            else:
+                ledger.release(reservation)
+
+        deposits, txns = [], []
+        for asset, plan in plans.items():
+            for i, amount in plan:
+                amount = min(amount, supply[asset])
+                if amount > 0:
+                    supply[asset] -= amount
+                    deposits.append((asset, i, amount))
+                    txns.append(self.shards[i].depositTx(asset, amount))
+
+        print(f"\nRebalancing exchange shards: {len(txns)} deposits")
+        for (asset, i, amount), result in zip(deposits, NetworkInteraction.submit_many(self.client, txns)):
+            if result.ok:
+                self.shards[i].liquidity.credit(asset, amount)
+                moves[asset].append((i, amount))
+
+        return moves
@@ -0,0 +1,165 @@
+import base64
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple, Union
+
+from algosdk import constants, encoding
+from algosdk.future import transaction as algo_txn
+from nacl.signing import SigningKey
+
+# A private key signs the transaction, a LogicSig authorises it
+Authorizer = Union[str, algo_txn.LogicSig]
+
+# Signing keys decoded in a pool worker, keyed by base64 private key, least recently
+# used first
+_workerKeys: "OrderedDict[str, SigningKey]" = OrderedDict()
+_maxWorkerKeys = 1024
+
+
+def _decodeKey(privKey: str) -> SigningKey:
+    return SigningKey(base64.b64decode(privKey)[:constants.key_len_bytes])
+
+
+def _signingMessage(txn: algo_txn.Transaction) -> bytes:
+    return constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+
+
+def _signChunk(chunk: List[Tuple[Union[algo_txn.Transaction, bytes], str]]) -> List[bytes]:
+    """
+    Pool worker: sign (transaction or its signing message, private key) pairs.
+    Encoding costs about twice the signature itself, so it is done here rather than
+    in the parent
+    """
+    signatures = []
+    for txn, privKey in chunk:
+        key = _workerKeys.get(privKey)
+        if key is None:
+            key = _workerKeys[privKey] = _decodeKey(privKey)
+            if len(_workerKeys) > _maxWorkerKeys:
+                _workerKeys.popitem(last=False)
+        else:
+            _workerKeys.move_to_end(privKey)
+        signatures.append(key.sign(txn if isinstance(txn, bytes) else _signingMessage(txn)).signature)
+
+    return signatures
+
+
+class Signer:
+    """
+    Signs transactions with decoded signing keys held in memory, so a key is only
+    decoded once per process rather than on every Transaction.sign. The maxKeys most
+    recently used keys are kept, so one-off buyer keys don't pile up. Batches of at
+    least poolThreshold transactions are split across a process pool
+    """
+
+    poolThreshold = 256         # Smaller batches are signed in process
+    maxKeys = 1024              # Decoded keys kept in memory
+    workers = os.cpu_count() or 1
+
+    _instance = None
+    _instanceLock = threading.Lock()
+
+    def __init__(self, workers: Optional[int] = None, poolThreshold: Optional[int] = None,
+                 maxKeys: Optional[int] = None):
+        self.workers = workers or Signer.workers
+        self.poolThreshold = Signer.poolThreshold if poolThreshold is None else poolThreshold
+        self.maxKeys = Signer.maxKeys if maxKeys is None else maxKeys
+        self.signatures = 0
+
+        self._keys: "OrderedDict[str, Tuple[SigningKey, str]]" = OrderedDict()
+        self._keysLock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def instance() -> "Signer":
+        """
+        Return the process wide signer
+        """
+        if Signer._instance is None:
+            with Signer._instanceLock:
+                if Signer._instance is None:
+                    Signer._instance = Signer()
+
+        return Signer._instance
+
+    def signingKey(self, privKey: str) -> Tuple[SigningKey, str]:
+        """
+        Decoded signing key and address for a base64 private key
+        """
+        with self._keysLock:
+            entry = self._keys.get(privKey)
+            if entry is not None:
+                self._keys.move_to_end(privKey)
+                return entry
+
+        key = _decodeKey(privKey)
+        entry = (key, encoding.encode_address(bytes(key.verify_key)))
+
+        with self._keysLock:
+            self._keys[privKey] = entry
+            while len(self._keys) > self.maxKeys:
+                self._keys.popitem(last=False)
+
+        return entry
+
+    def sign(self, txn: algo_txn.Transaction, authorizer: Authorizer) -> Union[algo_txn.SignedTransaction, algo_txn.LogicSigTransaction]:
+        return self.signMany([(txn, authorizer)])[0]
+
+    def signMany(self, items: Sequence[Tuple[algo_txn.Transaction, Authorizer]],
+                 messages: Optional[Sequence[bytes]] = None) -> list:
+        """
+        Sign each transaction with its private key, or wrap it with its LogicSig, in
+        order. Admin approvals, buyer payments and escrow payouts of a group can all
+        go through one call
+
+        :param messages: the bytes each transaction signs, when already encoded
+        """
+        results: list = [None] * len(items)
+        pending = []        # (index, transaction, private key, signing message)
+
+        for i, (txn, authorizer) in enumerate(items):
+            if isinstance(authorizer, algo_txn.LogicSig):
+                results[i] = algo_txn.LogicSigTransaction(txn, authorizer)
+            else:
+                pending.append((i, txn, authorizer, messages[i] if messages is not None else None))
+
+        if len(pending) >= self.poolThreshold and self.workers > 1:
+            signatures = self._signInPool([(txn if message is None else message, privKey)
+                                           for _, txn, privKey, message in pending])
+        else:
+            signatures = [
+                self.signingKey(privKey)[0].sign(_signingMessage(txn) if message is None else message).signature
+                for _, txn, privKey, message in pending
+            ]
+
+        for (i, txn, privKey, _), signature in zip(pending, signatures):
+            address = self.signingKey(privKey)[1]
+            authAddr = address if txn.sender != address else None
+            results[i] = algo_txn.SignedTransaction(txn, base64.b64encode(signature).decode(), authAddr)
+
+        self.signatures += len(pending)
+        return results
+
+    def close(self):
+        """
+        Shut the pool down and forget the decoded keys
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        with self._keysLock:
+            self._keys.clear()
+
+    def _signInPool(self, work: List[Tuple[Union[algo_txn.Transaction, bytes], str]]) -> List[bytes]:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.workers)
+
+        size = -(-len(work) // self.workers)
+        chunks = [work[i:i + size] for i in range(0, len(work), size)]
+        return [signature for signatures in self._pool.map(_signChunk, chunks) for signature in signatures]
@@ -0,0 +1,100 @@
+import copy
+import threading
+import time
+import weakref
+from typing import Optional
+
+from algosdk.future.transaction import SuggestedParams
+from algosdk.v2client import algod
+
+
+class SuggestedParamsProvider:
+    """
+    Shares suggested params between transaction builders. Params are fetched from
+    algod at most once per round (when told about new rounds) or once per ttl, and
+    every caller gets its own copy with a flat 1000 uAlgo fee and a validity window
+    starting at the cached first valid round
+    """
+
+    ttl = 4.0                   # [s] Roughly one block
+    validityWindow = 1000       # [rounds] Maximum allowed by the protocol
+    fee = 1000                  # [uAlgo]
+
+    _providers = weakref.WeakKeyDictionary()
+    _providersLock = threading.Lock()
+
+    def __init__(self, client: algod.AlgodClient, ttl: Optional[float] = None, validityWindow: Optional[int] = None):
+        self.client = client
+        self.ttl = SuggestedParamsProvider.ttl if ttl is None else ttl
+        self.validityWindow = SuggestedParamsProvider.validityWindow if validityWindow is None else validityWindow
+        self.hits = 0
+        self.misses = 0
+
+        self._params: Optional[SuggestedParams] = None
+        self._fetchedAt = 0.0
+        self._latestRound = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def forClient(client: algod.AlgodClient) -> "SuggestedParamsProvider":
+        """
+        Return the provider shared by everything using client
+        """
+        provider = SuggestedParamsProvider._providers.get(client)
+        if provider is None:
+            with SuggestedParamsProvider._providersLock:
+                provider = SuggestedParamsProvider._providers.get(client)
+                if provider is None:
+                    provider = SuggestedParamsProvider(client)
+                    SuggestedParamsProvider._providers[client] = provider
+
+        return provider
+
+    def get(self) -> SuggestedParams:
+        """
+        Return suggested params, refreshing them from algod if they are stale
+        """
+        with self._lock:
+            if self._isStale():
+                self.misses += 1
+                self._params = self.client.suggested_params()
+                self._fetchedAt = time.monotonic()
+            else:
+                self.hits += 1
+
+            params = copy.copy(self._params)
+
+        params.flat_fee = True
+        params.fee = SuggestedParamsProvider.fee
+        params.last = params.first + self.validityWindow
+
+        return params
+
+    def notifyRound(self, round: int):
+        """
+        Tell the provider that round has been reached. Cached params from an earlier
+        round are refreshed on the next request
+        """
+        with self._lock:
+            self._latestRound = max(self._latestRound, round)
+
+    def invalidate(self):
+        """
+        Force the next request to fetch fresh params
+        """
+        with self._lock:
+            self._params = None
+
+    @property
+    def hitRate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def _isStale(self) -> bool:
+        if self._params is None:
+            return True
+
+        if self._latestRound > self._params.first:
+            return True
+
+        return time.monotonic() - self._fetchedAt >= self.ttl
@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from backend.contracts.chadExchange import ChadExchangeASC1
+from backend.services.confirmationTracker import ConfirmationTracker
+from backend.services.keyPair import KeyPair
+
+
+@dataclass
+class _SwapRequest:
+    action: str
+    amount: float
+    chadsPerAlgo: float
+    buyerKey: KeyPair
+    future: Future = field(default_factory=Future)
+
+
+class SwapBatcher:
+    """
+    Micro-batches swap requests for a batched exchange. Requests arriving within
+    window of the first queued one are packed, up to maxSwaps, into one group with a
+    single admin approval. Groups are sent without waiting for the previous one to
+    confirm, and each request's future resolves through the ConfirmationTracker
+    """
+
+    window = 0.05                                   # [s] How long to hold a batch open
+    maxSwaps = ChadExchangeASC1.maxBatchSwaps
+
+    def __init__(self, exchange):
+        if not exchange.contract.batched:
+            raise ValueError("Exchange escrow does not accept batched swaps")
+
+        self.exchange = exchange
+        self.batches = 0
+        self.swaps = 0
+
+        self._queue: "queue.Queue[_SwapRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def swapsPerBatch(self) -> float:
+        return self.swaps / self.batches if self.batches else 0.0
+
+    def submit(self, action: str, amount: float, chadsPerAlgo: float, buyerKey: KeyPair) -> Future:
+        request = _SwapRequest(action, amount, chadsPerAlgo, buyerKey)
+        self._queue.put(request)
+        self._ensureRunning()
+        return request.future
+
+    def _ensureRunning(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="SwapBatcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._sendBatch(batch)
+            except Exception as e:
+                # Keep the batcher alive and never leave a caller waiting
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _collect(self) -> List[_SwapRequest]:
+        """
+        Block for the first request, then gather more until the window closes or the
+        batch is full
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.maxSwaps:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _sendBatch(self, batch: List[_SwapRequest]):
+        try:
+            ledger = self.exchange.liquidity
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        swaps, requests, reservations = [], [], []
+        for request in batch:
+            reservation = None
+            try:
+                self.exchange.preflightSwap(request.action, request.amount, request.chadsPerAlgo, request.buyerKey.pubKey)
+                reservation = self.exchange.reserveSwap(request.action, request.amount, request.chadsPerAlgo)
+                buyerTx, escrowTx = self.exchange.buildSwap(
+                    request.action, request.amount, request.chadsPerAlgo, request.buyerKey
+                )
+
+                swaps.append((buyerTx, escrowTx, request.buyerKey))
+                requests.append(request)
+                reservations.append(reservation)
+                reservation = None      # Released or committed with the batch
+            except Exception as e:
+                request.future.set_exception(e)
+            finally:
+                if reservation is not None:
+                    ledger.release(reservation)
+
+        if not swaps:
+            return
+
+        try:
+            txID, lastValid = self.exchange.sendSwapBatch(swaps)
+        except Exception as e:
+            for request, reservation in zip(requests, reservations):
+                ledger.release(reservation)
+                request.future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.swaps += len(swaps)
+
+        def resolve(confirmation: Future):
+            error = confirmation.exception()
+            for request, reservation in zip(requests, reservations):
+                if error is not None:
+                    ledger.release(reservation)
+                    request.future.set_exception(error)
+                else:
+                    ledger.commit(reservation)
+                    request.future.set_result(txID)
+
+        ConfirmationTracker.forClient(self.exchange.client).track(txID, lastValid=lastValid, callback=resolve)
@@ -0,0 +1,210 @@
+import base64
+import copy
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import msgpack
+from algosdk import constants, encoding
+from algosdk.future import transaction as algo_txn
+
+# Transaction attribute holding each msgpack field a template fills in
+_ATTRIBUTES = {"amt": "amt", "aamt": "amount", "snd": "sender", "rcv": "receiver", "arcv": "receiver",
+               "lx": "lease", "grp": "group"}
+
+_TXLIST = b"\x81" + msgpack.packb("txlist")
+
+
+def _checksum(data: bytes) -> bytes:
+    return hashlib.new("sha512_256", data).digest()
+
+
+@functools.lru_cache(maxsize=4096)
+def _addressBytes(address: str) -> bytes:
+    return encoding.decode_address(address)
+
+
+class _Layout:
+    """
+    Canonical msgpack of one transaction with some fields left open. Runs of fixed
+    fields are packed once, in the sorted key order algosdk encodes them in, and the
+    open fields are packed between them on every encode. As in algosdk, an open field
+    given a zero or empty value is left out
+    """
+
+    def __init__(self, fields: dict):
+        self.segments: List[Tuple[bytes, bytes, str]] = []   # (fixed run before, packed key, open field)
+        self.fixed = 0
+
+        run = b""
+        for key in sorted(fields):
+            packedKey = msgpack.packb(key)
+            if fields[key] is None:
+                self.segments.append((run, packedKey, key))
+                run = b""
+            else:
+                run += packedKey + msgpack.packb(fields[key], use_bin_type=True)
+                self.fixed += 1
+        self.tail = run
+
+        if self.fixed + len(self.segments) > 15:
+            raise ValueError("Transaction layouts are limited to fixmap sized transactions")
+
+    def encode(self, values: dict) -> bytes:
+        parts, count = [], self.fixed
+        for run, packedKey, key in self.segments:
+            parts.append(run)
+            value = values.get(key)
+            if value:
+                parts.append(packedKey)
+                parts.append(msgpack.packb(value, use_bin_type=True))
+                count += 1
+        parts.append(self.tail)
+
+        return bytes((0x80 | count,)) + b"".join(parts)
+
+
+class _Member:
+    """
+    One transaction of a group shape: a prototype to copy and the layout of its
+    encoding, with the amount and buyer address fields open
+    """
+
+    def __init__(self, prototype: algo_txn.Transaction, amountKey: Optional[str] = None,
+                 buyerKey: Optional[str] = None, leased: bool = False):
+        self.prototype = prototype
+        self.amountKey = amountKey
+        self.buyerKey = buyerKey
+        self.leased = leased
+
+        fields = prototype.dictify()
+        for key in (amountKey, buyerKey, "lx" if leased else None, "grp"):
+            if key is not None:
+                fields[key] = None
+        self.layout = _Layout(fields)
+
+    def values(self, amount: int, buyerBytes: bytes, lease: Optional[bytes]) -> dict:
+        values = {}
+        if self.amountKey is not None:
+            values[self.amountKey] = amount
+        if self.buyerKey is not None:
+            values[self.buyerKey] = buyerBytes
+        if self.leased:
+            values["lx"] = lease
+        return values
+
+    def transaction(self, values: dict, buyerAddress: str) -> algo_txn.Transaction:
+        txn = copy.copy(self.prototype)
+        for key, value in values.items():
+            setattr(txn, _ATTRIBUTES[key], buyerAddress if key == self.buyerKey else value)
+        return txn
+
+
+@dataclass
+class SwapGroup:
+    """
+    Grouped transactions of a swap: buyer payment, escrow payout and admin approval,
+    with the exact bytes each one signs
+    """
+
+    transactions: List[algo_txn.Transaction]
+    messages: List[bytes]
+    groupID: bytes
+
+    @property
+    def lastValid(self) -> int:
+        return min(tx.last_valid_round for tx in self.transactions)
+
+    @property
+    def txIDs(self) -> List[str]:
+        return [base64.b32encode(_checksum(message)).decode().strip("=") for message in self.messages]
+
+
+class SwapTemplates:
+    """
+    Builds swap groups for an escrow approved by an admin payment. The fixed parts of
+    both group shapes, i.e. params, escrow and admin addresses, CHAD ID and the whole
+    approval, are encoded once per round and shape, so a swap only packs its amounts
+    and buyer address. Transaction IDs and the group ID are hashed straight from
+    those bytes rather than through calculate_group_id, which encodes every
+    transaction from its object again
+    """
+
+    maxTemplates = 16           # Shapes kept, two per (params, validity window) in use
+
+    def __init__(self, escrowAddress: str, adminAddress: str, chadID: int):
+        self.escrowAddress = escrowAddress
+        self.adminAddress = adminAddress
+        self.chadID = chadID
+        self.compiled = 0
+        self.built = 0
+
+        self._templates: "OrderedDict[tuple, List[_Member]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def build(self, action: str, amountIn: int, amountOut: int, buyerAddress: str,
+              params: algo_txn.SuggestedParams, lease: Optional[bytes] = None) -> SwapGroup:
+        """
+        Group for a swap paying amountIn native units of Algo (swapAlgoForChad) or CHAD
+        (swapChadForAlgo) into the escrow for amountOut of the other. lease is set on
+        the escrow payout
+        """
+        members = self._template(action, params)
+        buyerBytes = _addressBytes(buyerAddress)
+        amounts = (amountIn, amountOut, 0)
+
+        values = [member.values(amount, buyerBytes, lease) for member, amount in zip(members, amounts)]
+        txids = [_checksum(constants.txid_prefix + member.layout.encode(v)) for member, v in zip(members, values)]
+        groupID = _checksum(
+            constants.tgid_prefix + _TXLIST + bytes((0x90 | len(txids),)) + b"".join(b"\xc4\x20" + t for t in txids)
+        )
+
+        transactions, messages = [], []
+        for member, v in zip(members, values):
+            v["grp"] = groupID
+            messages.append(constants.txid_prefix + member.layout.encode(v))
+            transactions.append(member.transaction(v, buyerAddress))
+
+        self.built += 1
+        return SwapGroup(transactions, messages, groupID)
+
+    def _template(self, action: str, params: algo_txn.SuggestedParams) -> List[_Member]:
+        key = (action, params.first, params.last, params.gh, params.gen, params.fee, params.flat_fee)
+        with self._lock:
+            members = self._templates.get(key)
+            if members is not None:
+                self._templates.move_to_end(key)
+                return members
+
+        members = self._compile(action, params)
+        with self._lock:
+            self._templates[key] = members
+            while len(self._templates) > self.maxTemplates:
+                self._templates.popitem(last=False)
+            self.compiled += 1
+
+        return members
+
+    def _compile(self, action: str, params: algo_txn.SuggestedParams) -> List[_Member]:
+        # The escrow stands in for the buyer, whose fields are left open
+        escrow, placeholder = self.escrowAddress, self.escrowAddress
+        approval = _Member(algo_txn.PaymentTxn(self.adminAddress, params, escrow, 0))
+
+        if action == "swapAlgoForChad":
+            return [
+                _Member(algo_txn.PaymentTxn(placeholder, params, escrow, 1), "amt", "snd"),
+                _Member(algo_txn.AssetTransferTxn(escrow, params, placeholder, 1, self.chadID), "aamt", "arcv", leased=True),
+                approval,
+            ]
+
+        if action == "swapChadForAlgo":
+            return [
+                _Member(algo_txn.AssetTransferTxn(placeholder, params, escrow, 1, self.chadID), "aamt", "snd"),
+                _Member(algo_txn.PaymentTxn(escrow, params, placeholder, 1), "amt", "rcv", leased=True),
+                approval,
+            ]
+
+        raise ValueError(f"Unknown swap {action}")
@@ -4,20 +4,18 @@ from algosdk.future import transaction as algo_txn
 from typing import List, Any, Optional, Union
 from algosdk import account as algo_acc
 from algosdk.future.transaction import Transaction, SignedTransaction
+from backend.services.signer import Signer
+from backend.services.suggestedParams import SuggestedParamsProvider
 
 
 def get_default_suggested_params(client: algod.AlgodClient):
     """
     Gets default suggested params with flat transaction fee and fee amount of 1000.
+    Params are shared between all builders using client and refreshed once per round.
     :param client:
     :return:
     """
-    suggested_params = client.suggested_params()
-
-    suggested_params.flat_fee = True
-    suggested_params.fee = 1000
-
-    return suggested_params
+    return SuggestedParamsProvider.forClient(client).get()
 
 
 class ApplicationTransactionRepository:
@@ -51,7 +49,7 @@ class ApplicationTransactionRepository:
                                             foreign_assets=foreign_assets)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            txn = Signer.instance().sign(txn, creator_private_key)
 
         return txn
 
@@ -86,7 +84,7 @@ class ApplicationTransactionRepository:
                                           on_complete=on_complete)
 
         if sign_transaction:
-            txn = txn.sign(private_key=caller_private_key)
+            txn = Signer.instance().sign(txn, caller_private_key)
 
         return txn
 
@@ -149,7 +147,7 @@ class ASATransactionRepository:
                                       note=note)
 
         if sign_transaction:
-            txn = txn.sign(private_key=creator_private_key)
+            txn = Signer.instance().sign(txn, creator_private_key)
 
         return txn
 
@@ -223,7 +221,7 @@ class ASATransactionRepository:
                                         index=asa_id)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            txn = Signer.instance().sign(txn, sender_private_key)
 
         return txn
 
@@ -258,7 +256,7 @@ class ASATransactionRepository:
                                         revocation_target=revocation_target)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            txn = Signer.instance().sign(txn, sender_private_key)
 
         return txn
 
@@ -302,7 +300,7 @@ class ASATransactionRepository:
             strict_empty_address_check=strict_empty_address_check)
 
         if sign_transaction:
-            txn = txn.sign(private_key=current_manager_pk)
+            txn = Signer.instance().sign(txn, current_manager_pk)
 
         return txn
 
@@ -335,6 +333,6 @@ class PaymentTransactionRepository:
                                   amt=amount)
 
         if sign_transaction:
-            txn = txn.sign(private_key=sender_private_key)
+            txn = Signer.instance().sign(txn, sender_private_key)
 
         return txn
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Recorded algod /compile output for every program variant the exchange deploys. The
+local assembler replaces algod only once it reproduces these bytes exactly
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from pyteal import compileTeal, Mode
+from backend.contracts.chadExchange import ChadExchangeASC1
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.teal.assembler import TealAssembler
+from backend.teal.profiler import ContractProfiler
+
+@dataclass
+class ProgramVariant:
+    """
+    One program as deployed, with the parameters it was built from
+    """
+
+    name: str
+    source: str
+    params: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def sourceHash(self) -> str:
+        return hashlib.sha256(self.source.encode()).hexdigest()
+
+class AlgodPrograms:
+    """
+    Programs built from the profiler's reference parameters, so recordings are
+    reproducible. Recorded entries are keyed by variant name and hold the hash of the
+    TEAL they were compiled from, so a contract change shows up as a stale entry
+    rather than a bytecode mismatch
+    """
+
+    fixturePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "algodPrograms.json")
+
+    @staticmethod
+    def variants() -> List[ProgramVariant]:
+        """
+        Every escrow configuration, the exchange app and the delegated signatures,
+        including limits that collide with other constants in the signature programs
+        """
+        admin, chadID, thresh = ContractProfiler.adminAddr, ContractProfiler.chadID, ContractProfiler.minChadTxThresh
+
+        escrows = {
+            "escrow": {},
+            "escrowAppID": {"appID": 1234},
+            "escrowAttested": {"attested": True},
+            "escrowBatched": {"batched": True},
+            "escrowSalted": {"salt": 7},
+        }
+        variants = [
+            ProgramVariant(name, compileTeal(
+                ChadExchangeASC1(admin, chadID, thresh, **kwargs).program(), mode=Mode.Signature, version=5
+            ), dict(kwargs))
+            for name, kwargs in escrows.items()
+        ]
+
+        app = ChadExchangeApp(chadID)
+        variants += [
+            ProgramVariant("appApproval", compileTeal(app.approvalProgram(), mode=Mode.Application, version=5)),
+            ProgramVariant("appClear", compileTeal(app.clearProgram(), mode=Mode.Application, version=5)),
+        ]
+
+        for noMoreThan in [ContractProfiler.noMoreThan, 1000]:
+            params = {"exchangeAddr": admin, "noMoreThan": noMoreThan}
+            variants.append(ProgramVariant(
+                f"algoSig{noMoreThan}", DelegatedSignature.algoSig(admin, noMoreThan), params
+            ))
+            variants.append(ProgramVariant(
+                f"chadSig{noMoreThan}", DelegatedSignature.chadSig(admin, noMoreThan, chadID), {**params, "chadID": chadID}
+            ))
+
+        return variants
+
+    @staticmethod
+    def record(compile: Callable[[str], bytes]) -> Dict[str, dict]:
+        """
+        Compile every variant, e.g. with NetworkInteraction.compile_program against
+        a sandbox algod
+        """
+        return {
+            variant.name: {"sourceSha256": variant.sourceHash, "bytecode": compile(variant.source).hex()}
+            for variant in AlgodPrograms.variants()
+        }
+
+    @staticmethod
+    def load(path: Optional[str] = None) -> Dict[str, dict]:
+        """
+        Recorded entries, or none if nothing has been recorded yet
+        """
+        try:
+            with open(path or AlgodPrograms.fixturePath) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    @staticmethod
+    def save(recorded: Dict[str, dict], path: Optional[str] = None):
+        with open(path or AlgodPrograms.fixturePath, "w") as f:
+            json.dump(recorded, f, indent=4, sort_keys=True)
+            f.write("\n")
+
+    @staticmethod
+    def mismatches(recorded: Dict[str, dict],
+                   assemble: Callable[[ProgramVariant], bytes] = lambda v: TealAssembler.assemble(v.source).bytecode
+                   ) -> List[str]:
+        """
+        Describe every variant whose recording is missing, stale, or differs from the
+        locally assembled bytes
+        """
+        found = []
+        for variant in AlgodPrograms.variants():
+            expected = recorded.get(variant.name)
+            if expected is None:
+                found.append(f"{variant.name}: not recorded")
+            elif expected["sourceSha256"] != variant.sourceHash:
+                found.append(f"{variant.name}: recording is stale, TEAL changed since it was compiled")
+            elif assemble(variant).hex() != expected["bytecode"]:
+                found.append(f"{variant.name}: assembled bytecode differs from algod")
+
+        return found
@@ -0,0 +1,434 @@
+"""
+Pure Python TEAL assembler. Produces the same bytecode as algod's /compile endpoint
+for the programs emitted by compileTeal, so contracts can be compiled without a
+network round-trip
+"""
+
+import base64
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from algosdk import encoding, logic
+from backend.teal.spec import OPS_BY_NAME, FIELD_NAMES, NAMED_INTS, TXN_ARRAY_FIELDS, MAX_VERSION
+
+TEMPLATE_PREFIX = "TMPL_"
+
+@dataclass
+class TemplateSlot:
+    """
+    Location of a template variable's pushint/pushbytes immediate in the bytecode
+    """
+
+    name: str
+    kind: str           # "int" or "bytes"
+    offset: int         # Start of the encoded immediate
+    length: int         # Length of the encoded immediate
+
+@dataclass
+class AssembledProgram:
+    """
+    Bytecode and the metadata needed to patch, evaluate and profile it
+    """
+
+    bytecode: bytes
+    version: int
+    labels: Dict[str, int] = field(default_factory=dict)                 # Label -> pc
+    sourceMap: Dict[int, int] = field(default_factory=dict)              # pc -> source line number
+    branches: List[Tuple[int, int]] = field(default_factory=list)        # (pc of branch op, target pc)
+    templateSlots: List[TemplateSlot] = field(default_factory=list)
+    intConstants: List[int] = field(default_factory=list)                # Values of int pseudo-ops
+    byteConstants: List[bytes] = field(default_factory=list)             # Values of byte/addr pseudo-ops
+
+    @property
+    def address(self) -> str:
+        return logic.address(self.bytecode)
+
+@dataclass
+class _Instruction:
+    line: int
+    op: str
+    args: List[str]
+    label: Optional[str] = None     # Branch target
+    template: Optional[TemplateSlot] = None
+    encoded: bytes = b""
+
+class TealAssembler:
+    """
+    Assembles TEAL source into bytecode
+    """
+
+    @staticmethod
+    def assemble(source: str) -> AssembledProgram:
+        """
+        Assemble TEAL source. int, byte and addr pseudo-ops are laid out the way
+        algod does: before v4 every constant goes into intcblock/bytecblock in order
+        of first use. From v4 only constants used more than once go into the blocks,
+        sorted by use count (ties in order of first use), and constants used once
+        are pushed with pushint/pushbytes. Raises ValueError on invalid source
+        """
+        version, lines = TealAssembler._parse(source)
+
+        instructions: List[_Instruction] = []
+        labelIndex: Dict[str, int] = {}
+        for lineNo, tokens in lines:
+            while tokens and tokens[0].endswith(":"):
+                name = tokens.pop(0)[:-1]
+                if name in labelIndex:
+                    raise ValueError(f"Line {lineNo}: duplicate label {name}")
+                labelIndex[name] = len(instructions)
+
+            if tokens:
+                instructions.append(_Instruction(lineNo, tokens[0], tokens[1:]))
+
+        ints, byteStrings = TealAssembler._constants(instructions)
+        intBlock = TealAssembler._constantBlock(ints, version)
+        byteBlock = TealAssembler._constantBlock(byteStrings, version)
+        header = bytes(_varuint(version))
+        if intBlock:
+            header += bytes([OPS_BY_NAME["intcblock"].opcode]) + _encodeIntBlock(intBlock)
+        if byteBlock:
+            header += bytes([OPS_BY_NAME["bytecblock"].opcode]) + _encodeByteBlock(byteBlock)
+
+        # Encode every instruction. Branches are a fixed size so offsets can be filled
+        # in once all label positions are known
+        pc = len(header)
+        pcs = []
+        for ins in instructions:
+            ins.encoded = TealAssembler._encode(ins, version, intBlock, byteBlock)
+            if ins.template is not None:
+                ins.template.offset += pc
+            pcs.append(pc)
+            pc += len(ins.encoded)
+
+        labels = {name: (pcs[index] if index < len(pcs) else pc) for name, index in labelIndex.items()}
+
+        program = AssembledProgram(
+            bytecode=b"", version=version, labels=labels, intConstants=ints, byteConstants=byteStrings
+        )
+        body = bytearray(header)
+        for ins, insPc in zip(instructions, pcs):
+            encoded = ins.encoded
+            if ins.label is not None:
+                if ins.label not in labels:
+                    raise ValueError(f"Line {ins.line}: reference to undefined label {ins.label}")
+                target = labels[ins.label]
+                encoded = encoded[:1] + _branchOffset(insPc, target, version, ins.line)
+                program.branches.append((insPc, target))
+
+            if ins.template is not None:
+                program.templateSlots.append(ins.template)
+
+            program.sourceMap[insPc] = ins.line
+            body += encoded
+
+        program.bytecode = bytes(body)
+        return program
+
+    @staticmethod
+    def _parse(source: str) -> Tuple[int, List[Tuple[int, List[str]]]]:
+        """
+        Split source into tokenised lines and read the version pragma
+        """
+        version = 1
+        lines = []
+        for lineNo, line in enumerate(source.splitlines(), start=1):
+            stripped = line.strip()
+            if stripped.startswith("#pragma"):
+                parts = stripped.split()
+                if len(parts) != 3 or parts[1] != "version":
+                    raise ValueError(f"Line {lineNo}: unsupported pragma {stripped}")
+                if lines:
+                    raise ValueError(f"Line {lineNo}: #pragma version must come before any instructions")
+                version = int(parts[2])
+                if not 1 <= version <= MAX_VERSION:
+                    raise ValueError(f"Line {lineNo}: unsupported TEAL version {version}")
+                continue
+
+            tokens = _tokenize(line)
+            if tokens:
+                lines.append((lineNo, tokens))
+
+        return version, lines
+
+    @staticmethod
+    def _constants(instructions: List[_Instruction]) -> Tuple[List[int], List[bytes]]:
+        """
+        Values referenced by the int and byte/addr pseudo-ops, in order of use
+        """
+        ints = []
+        byteStrings = []
+        for ins in instructions:
+            if ins.op == "int" and not _isTemplate(ins):
+                ints.append(_parseInt(ins))
+            elif ins.op in ("byte", "addr") and not _isTemplate(ins):
+                byteStrings.append(_parseBytes(ins))
+
+        return ints, byteStrings
+
+    @staticmethod
+    def _constantBlock(values: list, version: int) -> list:
+        """
+        Lay out a constant block for values
+        """
+        # Counter preserves first-use order and sorted is stable
+        freqs = Counter(values)
+        if version < 4:
+            return list(freqs)
+
+        ordered = sorted(freqs, key=lambda v: freqs[v], reverse=True)
+        return [v for v in ordered if freqs[v] > 1]
+
+    @staticmethod
+    def _encode(ins: _Instruction, version: int, intBlock: List[int], byteBlock: List[bytes]) -> bytes:
+        if ins.op == "int":
+            _expectArgs(ins, 1)
+            if _isTemplate(ins):
+                _expectPush(ins, version)
+                ins.template = TemplateSlot(ins.args[0], "int", 1, 1)
+                return bytes([OPS_BY_NAME["pushint"].opcode]) + _varuint(0)
+            return _constantRef(_parseInt(ins), intBlock, "intc", "pushint", _varuint)
+
+        if ins.op in ("byte", "addr"):
+            if _isTemplate(ins):
+                _expectPush(ins, version)
+                placeholder = bytes(32)
+                encoded = _lengthPrefixed(placeholder)
+                ins.template = TemplateSlot(ins.args[0], "bytes", 1, len(encoded))
+                return bytes([OPS_BY_NAME["pushbytes"].opcode]) + encoded
+            return _constantRef(_parseBytes(ins), byteBlock, "bytec", "pushbytes", _lengthPrefixed)
+
+        if ins.op == "arg":
+            _expectArgs(ins, 1)
+            index = _parseUint8(ins, ins.args[0])
+            if index < 4:
+                return bytes([OPS_BY_NAME[f"arg_{index}"].opcode])
+
+        spec = OPS_BY_NAME.get(ins.op)
+        if spec is None:
+            raise ValueError(f"Line {ins.line}: unknown opcode {ins.op}")
+        if spec.version > version:
+            raise ValueError(f"Line {ins.line}: {ins.op} requires TEAL version {spec.version}")
+
+        out = bytearray([spec.opcode])
+        imm = spec.immediates
+        if imm == "":
+            _expectArgs(ins, 0)
+        elif imm == "u8":
+            _expectArgs(ins, 1)
+            out.append(_parseUint8(ins, ins.args[0]))
+        elif imm == "u8u8":
+            _expectArgs(ins, 2)
+            out += bytes(_parseUint8(ins, a) for a in ins.args)
+        elif imm in FIELD_NAMES:
+            _expectArgs(ins, 1)
+            out.append(_fieldIndex(ins, imm, ins.args[0]))
+        elif imm == "gtxn":
+            _expectArgs(ins, 2)
+            out.append(_parseUint8(ins, ins.args[0]))
+            out.append(_fieldIndex(ins, "txn", ins.args[1]))
+        elif imm == "txna":
+            _expectArgs(ins, 2)
+            out.append(_fieldIndex(ins, "txn", ins.args[0], array=True))
+            out.append(_parseUint8(ins, ins.args[1]))
+        elif imm == "gtxna":
+            _expectArgs(ins, 3)
+            out.append(_parseUint8(ins, ins.args[0]))
+            out.append(_fieldIndex(ins, "txn", ins.args[1], array=True))
+            out.append(_parseUint8(ins, ins.args[2]))
+        elif imm == "label":
+            _expectArgs(ins, 1)
+            ins.label = ins.args[0]
+            out += b"\x00\x00"
+        elif imm == "varuint":
+            _expectArgs(ins, 1)
+            out += _varuint(_parseInt(ins))
+        elif imm == "bytes":
+            out += _lengthPrefixed(_parseBytes(ins))
+        elif imm == "intc":
+            out += _encodeIntBlock([_parseIntToken(ins, a) for a in ins.args])
+        elif imm == "bytec":
+            out += _encodeByteBlock([_parseBytesToken(ins, [a]) for a in ins.args])
+        else:
+            raise ValueError(f"Line {ins.line}: cannot encode {ins.op}")
+
+        return bytes(out)
+
+def _tokenize(line: str) -> List[str]:
+    """
+    Split a line on whitespace, keeping quoted strings whole and dropping comments
+    """
+    tokens = []
+    i = 0
+    n = len(line)
+    while i < n:
+        c = line[i]
+        if c.isspace():
+            i += 1
+        elif line.startswith("//", i):
+            break
+        elif c == '"':
+            j = i + 1
+            while j < n and line[j] != '"':
+                j += 2 if line[j] == "\\" else 1
+            if j >= n:
+                raise ValueError(f"Unterminated string in: {line}")
+            tokens.append(line[i:j + 1])
+            i = j + 1
+        else:
+            j = i
+            while j < n and not line[j].isspace() and not line.startswith("//", j):
+                j += 1
+            tokens.append(line[i:j])
+            i = j
+
+    return tokens
+
+def _varuint(value: int) -> bytes:
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}")
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _lengthPrefixed(value: bytes) -> bytes:
+    return _varuint(len(value)) + value
+
+def _encodeIntBlock(values: List[int]) -> bytes:
+    return _varuint(len(values)) + b"".join(_varuint(v) for v in values)
+
+def _encodeByteBlock(values: List[bytes]) -> bytes:
+    return _varuint(len(values)) + b"".join(_lengthPrefixed(v) for v in values)
+
+def _constantRef(value: Union[int, bytes], block: list, refOp: str, pushOp: str, encodePush) -> bytes:
+    if value not in block:
+        return bytes([OPS_BY_NAME[pushOp].opcode]) + encodePush(value)
+
+    index = block.index(value)
+    if index < 4:
+        return bytes([OPS_BY_NAME[f"{refOp}_{index}"].opcode])
+    return bytes([OPS_BY_NAME[refOp].opcode, index])
+
+def _branchOffset(pc: int, target: int, version: int, line: int) -> bytes:
+    offset = target - (pc + 3)
+    if offset < 0 and version < 4:
+        raise ValueError(f"Line {line}: backward branches require TEAL version 4")
+    if not -0x8000 <= offset <= 0x7fff:
+        raise ValueError(f"Line {line}: branch target out of range")
+    return offset.to_bytes(2, "big", signed=True)
+
+def _expectArgs(ins: _Instruction, count: int):
+    if len(ins.args) != count:
+        raise ValueError(f"Line {ins.line}: {ins.op} expects {count} arguments, got {len(ins.args)}")
+
+def _expectPush(ins: _Instruction, version: int):
+    # Template variables are pushed so they can be patched without moving the blocks
+    if version < OPS_BY_NAME["pushint"].version:
+        raise ValueError(f"Line {ins.line}: template variables require TEAL version {OPS_BY_NAME['pushint'].version}")
+
+def _isTemplate(ins: _Instruction) -> bool:
+    return len(ins.args) == 1 and ins.args[0].startswith(TEMPLATE_PREFIX)
+
+def _parseUint8(ins: _Instruction, token: str) -> int:
+    value = _parseIntToken(ins, token)
+    if value > 0xff:
+        raise ValueError(f"Line {ins.line}: {ins.op} immediate {token} does not fit in a byte")
+    return value
+
+def _fieldIndex(ins: _Instruction, kind: str, name: str, array: bool = False) -> int:
+    names = FIELD_NAMES[kind]
+    if name not in names:
+        raise ValueError(f"Line {ins.line}: unknown {kind} field {name}")
+    if array and name not in TXN_ARRAY_FIELDS:
+        raise ValueError(f"Line {ins.line}: {name} is not an array field")
+    return names.index(name)
+
+def _parseInt(ins: _Instruction) -> int:
+    _expectArgs(ins, 1)
+    return _parseIntToken(ins, ins.args[0])
+
+def _parseIntToken(ins: _Instruction, token: str) -> int:
+    if token in NAMED_INTS:
+        return NAMED_INTS[token]
+
+    try:
+        if token.startswith(("0x", "0X")):
+            value = int(token[2:], 16)
+        elif len(token) > 1 and token.startswith("0"):
+            value = int(token[1:], 8)
+        else:
+            value = int(token, 10)
+    except ValueError:
+        raise ValueError(f"Line {ins.line}: invalid integer {token}")
+
+    if not 0 <= value < 2 ** 64:
+        raise ValueError(f"Line {ins.line}: integer {token} out of range")
+
+    return value
+
+def _parseBytes(ins: _Instruction) -> bytes:
+    if ins.op == "addr":
+        _expectArgs(ins, 1)
+        try:
+            return encoding.decode_address(ins.args[0])
+        except Exception:
+            raise ValueError(f"Line {ins.line}: invalid address {ins.args[0]}")
+
+    return _parseBytesToken(ins, ins.args)
+
+def _parseBytesToken(ins: _Instruction, args: List[str]) -> bytes:
+    """
+    Parse the byte constant forms accepted by the byte pseudo-op
+    """
+    try:
+        if len(args) == 2 and args[0] in ("base64", "b64"):
+            return base64.b64decode(args[1], validate=True)
+        if len(args) == 2 and args[0] in ("base32", "b32"):
+            return _b32decode(args[1])
+
+        if len(args) == 1:
+            token = args[0]
+            if token.startswith('"'):
+                return _unescape(token[1:-1])
+            if token.startswith("0x"):
+                return bytes.fromhex(token[2:])
+            for prefix in ("base64(", "b64("):
+                if token.startswith(prefix) and token.endswith(")"):
+                    return base64.b64decode(token[len(prefix):-1], validate=True)
+            for prefix in ("base32(", "b32("):
+                if token.startswith(prefix) and token.endswith(")"):
+                    return _b32decode(token[len(prefix):-1])
+    except ValueError:
+        pass
+
+    raise ValueError(f"Line {ins.line}: invalid byte constant {' '.join(args)}")
+
+def _b32decode(value: str) -> bytes:
+    return base64.b32decode(value + "=" * (-len(value) % 8))
+
+def _unescape(value: str) -> bytes:
+    out = bytearray()
+    i = 0
+    while i < len(value):
+        c = value[i]
+        if c != "\\":
+            out += c.encode()
+            i += 1
+            continue
+
+        nxt = value[i + 1]
+        if nxt == "x":
+            out.append(int(value[i + 2:i + 4], 16))
+            i += 4
+            continue
+
+        escapes = {"n": "\n", "r": "\r", "t": "\t", "\\": "\\", '"': '"'}
+        if nxt not in escapes:
+            raise ValueError(f"Invalid escape \\{nxt}")
+        out += escapes[nxt].encode()
+        i += 2
+
+    return bytes(out)
@@ -0,0 +1,845 @@
+"""
+In-process TEAL evaluator. Runs a compiled program against a candidate transaction
+group so that groups the program would reject can be caught before they are sent
+"""
+
+import base64
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+from nacl.exceptions import BadSignatureError
+from nacl.signing import VerifyKey
+
+from backend.teal.assembler import AssembledProgram
+from backend.teal.spec import (
+    OPS_BY_CODE, FIELD_NAMES, TXN_FIELDS, TXN_FIELD_TYPES, ADDRESS_FIELDS, FIXED_BYTES_FIELDS,
+    TXN_TYPE_ENUM, LOGIC_SIG_BUDGET, APP_BUDGET,
+)
+
+ZERO_ADDRESS = bytes(32)
+MAX_UINT = 2 ** 64 - 1
+
+TxnFields = Dict[str, Any]
+
+@dataclass
+class EvalResult:
+    """
+    Outcome of evaluating a program. branch is the label of the code block whose
+    result the program returned ("main" if no branch was taken) and path is every
+    label entered in order
+    """
+
+    passed: bool
+    reason: str = ""
+    branch: str = "main"
+    path: List[str] = field(default_factory=list)
+    pc: int = 0
+    line: Optional[int] = None
+    cost: int = 0
+    opcodeCounts: Optional[Dict[str, int]] = None
+
+class EvalError(Exception):
+    """
+    Raised when a program fails during evaluation
+    """
+
+@dataclass
+class _Op:
+    pc: int
+    name: str
+    cost: int
+    imm: Any
+    next: int
+    fn: Callable
+    label: Optional[str] = None         # Set if a label points at this op
+    isExit: bool = False                # Op is a bare return shared by several branches
+
+class _State:
+    __slots__ = ("stack", "group", "index", "args", "globals", "scratch", "intc", "bytec",
+                 "callstack", "appGlobals", "programHash", "result")
+
+    def __init__(self, group, index, args, globals, appGlobals, programHash):
+        self.stack = []
+        self.group = group
+        self.index = index
+        self.args = args
+        self.globals = globals
+        self.appGlobals = appGlobals
+        self.programHash = programHash
+        self.scratch = [0] * 256
+        self.intc = []
+        self.bytec = []
+        self.callstack = []
+        self.result = None
+
+class TealEvaluator:
+    """
+    Evaluates a compiled TEAL program. The bytecode is decoded once so the same
+    evaluator can check many groups cheaply
+    """
+
+    def __init__(self, program: Union[bytes, AssembledProgram], mode: str = "signature"):
+        if isinstance(program, AssembledProgram):
+            self.bytecode = program.bytecode
+            labels = {pc: name for name, pc in program.labels.items()}
+            self.sourceMap = program.sourceMap
+        else:
+            self.bytecode = program
+            labels = {}
+            self.sourceMap = {}
+
+        self.mode = mode
+        self.budget = LOGIC_SIG_BUDGET if mode == "signature" else APP_BUDGET
+        self.programHash = encoding.decode_address(_programAddress(self.bytecode))
+        self.ops = _decode(self.bytecode, labels)
+        self.entry = _readVaruint(self.bytecode, 0)[1]
+
+    def evaluate(self, group: List[TxnFields], index: int, args: Optional[List[bytes]] = None,
+                 globals: Optional[Dict[str, Any]] = None, appGlobals: Optional[Dict[bytes, Any]] = None,
+                 countOpcodes: bool = False) -> EvalResult:
+        """
+        Run the program for transaction index of group. Transactions are dicts of
+        TEAL field name to value, see TealEvaluator.fields
+        """
+        globalFields = {
+            "MinTxnFee": 1000,
+            "MinBalance": 100000,
+            "MaxTxnLife": 1000,
+            "ZeroAddress": ZERO_ADDRESS,
+            "GroupSize": len(group),
+            "LogicSigVersion": 5,
+            "Round": 0,
+            "LatestTimestamp": 0,
+            "CurrentApplicationID": 0,
+            "CreatorAddress": ZERO_ADDRESS,
+            "CurrentApplicationAddress": ZERO_ADDRESS,
+            "GroupID": group[index].get("_Group", ZERO_ADDRESS),
+        }
+        if globals:
+            globalFields.update(globals)
+
+        state = _State(group, index, args or [], globalFields, appGlobals, self.programHash)
+        ops = self.ops
+        end = len(self.bytecode)
+        counts = {} if countOpcodes else None
+        path = []
+        cost = 0
+        pc = self.entry
+        op = None
+
+        try:
+            while True:
+                op = ops.get(pc)
+                if op is None:
+                    if pc == end:
+                        break
+                    raise EvalError(f"Branch to invalid pc {pc}")
+
+                if op.label is not None and not op.isExit:
+                    path.append(op.label)
+
+                cost += op.cost
+                if cost > self.budget:
+                    raise EvalError(f"Cost budget of {self.budget} exceeded")
+                if counts is not None:
+                    counts[op.name] = counts.get(op.name, 0) + 1
+
+                jump = op.fn(state, op.imm)
+                if state.result is not None:
+                    break
+
+                pc = op.next if jump is None else jump
+
+            if state.result is None:
+                if len(state.stack) != 1:
+                    raise EvalError(f"Stack has {len(state.stack)} values at end of program")
+                state.result = state.stack.pop()
+
+            if not isinstance(state.result, int):
+                raise EvalError("Program returned a byte string")
+        except EvalError as e:
+            return self._result(False, str(e), path, op, cost, counts)
+        except IndexError:
+            return self._result(False, "Stack underflow or index out of range", path, op, cost, counts)
+        except KeyError as e:
+            return self._result(False, f"Missing field {e}", path, op, cost, counts)
+
+        if state.result == 0:
+            return self._result(False, "Program returned 0", path, op, cost, counts)
+
+        return self._result(True, "", path, op, cost, counts)
+
+    def evaluateGroup(self, transactions: List[Any]) -> Optional[EvalResult]:
+        """
+        Evaluate the program for every LogicSigTransaction in a signed group that is
+        signed by this program. Returns the first failing result, or None if all pass
+        """
+        group = TealEvaluator.groupFields([_unsigned(tx) for tx in transactions])
+        for i, tx in enumerate(transactions):
+            if isinstance(tx, algo_txn.LogicSigTransaction) and tx.lsig.logic == self.bytecode:
+                result = self.evaluate(group, i, args=tx.lsig.args)
+                if not result.passed:
+                    return result
+
+        return None
+
+    def _result(self, passed, reason, path, op, cost, counts) -> EvalResult:
+        pc = op.pc if op is not None else 0
+        return EvalResult(
+            passed=passed,
+            reason=reason,
+            branch=path[-1] if path else "main",
+            path=path,
+            pc=pc,
+            line=self.sourceMap.get(pc),
+            cost=cost,
+            opcodeCounts=counts,
+        )
+
+    @staticmethod
+    def fields(txn: algo_txn.Transaction, groupIndex: int = 0) -> TxnFields:
+        """
+        Convert an algosdk transaction into the TEAL fields the evaluator reads
+        """
+        f: TxnFields = {
+            "Sender": _address(txn.sender),
+            "Fee": txn.fee,
+            "FirstValid": txn.first_valid_round,
+            "LastValid": txn.last_valid_round,
+            "Note": txn.note or b"",
+            "Lease": txn.lease or bytes(32),
+            "Type": txn.type.encode(),
+            "TypeEnum": TXN_TYPE_ENUM.get(txn.type, 0),
+            "GroupIndex": groupIndex,
+            "TxID": base64.b32decode(txn.get_txid() + "===="),
+            "RekeyTo": _address(txn.rekey_to),
+            "_Group": txn.group or ZERO_ADDRESS,
+        }
+
+        if isinstance(txn, algo_txn.PaymentTxn):
+            f["Receiver"] = _address(txn.receiver)
+            f["Amount"] = txn.amt
+            f["CloseRemainderTo"] = _address(txn.close_remainder_to)
+        elif isinstance(txn, algo_txn.AssetTransferTxn):
+            f["AssetReceiver"] = _address(txn.receiver)
+            f["AssetAmount"] = txn.amount
+            f["XferAsset"] = txn.index
+            f["AssetSender"] = _address(txn.revocation_target)
+            f["AssetCloseTo"] = _address(txn.close_assets_to)
+        elif isinstance(txn, algo_txn.ApplicationCallTxn):
+            f["ApplicationID"] = txn.index
+            f["OnCompletion"] = txn.on_complete
+            f["ApplicationArgs"] = list(txn.app_args or [])
+            f["NumAppArgs"] = len(f["ApplicationArgs"])
+            f["Accounts"] = [_address(a) for a in (txn.accounts or [])]
+            f["NumAccounts"] = len(f["Accounts"])
+            f["Assets"] = list(txn.foreign_assets or [])
+            f["NumAssets"] = len(f["Assets"])
+            f["Applications"] = list(txn.foreign_apps or [])
+            f["NumApplications"] = len(f["Applications"])
+
+        return f
+
+    @staticmethod
+    def groupFields(txns: List[algo_txn.Transaction]) -> List[TxnFields]:
+        return [TealEvaluator.fields(txn, i) for i, txn in enumerate(txns)]
+
+def _unsigned(tx):
+    return tx.transaction if hasattr(tx, "transaction") else tx
+
+def _address(addr: Optional[str]) -> bytes:
+    return encoding.decode_address(addr) if addr else ZERO_ADDRESS
+
+def _programAddress(bytecode: bytes) -> str:
+    digest = hashlib.new("sha512_256", b"Program" + bytecode).digest()
+    return encoding.encode_address(digest)
+
+def _fieldDefault(name: str):
+    if name in ADDRESS_FIELDS:
+        return ZERO_ADDRESS
+    if name in FIXED_BYTES_FIELDS:
+        return bytes(FIXED_BYTES_FIELDS[name])
+    if name in ("ApplicationArgs", "Accounts", "Assets", "Applications", "Logs"):
+        return []
+    return 0 if TXN_FIELD_TYPES[TXN_FIELDS.index(name)] == "U" else b""
+
+# Default for every transaction field that a converted transaction may not set
+_FIELD_DEFAULTS = {name: _fieldDefault(name) for name in TXN_FIELDS}
+
+def _readVaruint(code: bytes, pc: int):
+    value, shift = 0, 0
+    while True:
+        if pc >= len(code):
+            raise ValueError("Truncated varuint")
+        b = code[pc]
+        value |= (b & 0x7f) << shift
+        shift += 7
+        pc += 1
+        if not b & 0x80:
+            return value, pc
+
+def _decode(code: bytes, labels: Dict[int, str]) -> Dict[int, _Op]:
+    """
+    Decode bytecode into ops keyed by pc
+    """
+    ops = {}
+    _, pc = _readVaruint(code, 0)
+    while pc < len(code):
+        start = pc
+        spec = OPS_BY_CODE.get(code[pc])
+        if spec is None:
+            raise ValueError(f"Unknown opcode {code[pc]:#x} at pc {pc}")
+        pc += 1
+
+        kind = spec.immediates
+        imm = None
+        if kind == "u8":
+            imm = code[pc]
+            pc += 1
+        elif kind == "u8u8":
+            imm = (code[pc], code[pc + 1])
+            pc += 2
+        elif kind in FIELD_NAMES:
+            imm = FIELD_NAMES[kind][code[pc]]
+            pc += 1
+        elif kind == "gtxn":
+            imm = (code[pc], TXN_FIELDS[code[pc + 1]])
+            pc += 2
+        elif kind == "txna":
+            imm = (TXN_FIELDS[code[pc]], code[pc + 1])
+            pc += 2
+        elif kind == "gtxna":
+            imm = (code[pc], TXN_FIELDS[code[pc + 1]], code[pc + 2])
+            pc += 3
+        elif kind == "label":
+            offset = int.from_bytes(code[pc:pc + 2], "big", signed=True)
+            pc += 2
+            imm = pc + offset
+            if spec.name == "callsub":
+                imm = (imm, pc)
+        elif kind == "varuint":
+            imm, pc = _readVaruint(code, pc)
+        elif kind == "bytes":
+            length, pc = _readVaruint(code, pc)
+            imm = bytes(code[pc:pc + length])
+            pc += length
+        elif kind == "intc":
+            count, pc = _readVaruint(code, pc)
+            imm = []
+            for _ in range(count):
+                value, pc = _readVaruint(code, pc)
+                imm.append(value)
+        elif kind == "bytec":
+            count, pc = _readVaruint(code, pc)
+            imm = []
+            for _ in range(count):
+                length, pc = _readVaruint(code, pc)
+                imm.append(bytes(code[pc:pc + length]))
+                pc += length
+
+        fn = _HANDLERS.get(spec.name, _unsupported(spec.name))
+        ops[start] = _Op(start, spec.name, spec.cost, imm, pc, fn, labels.get(start))
+
+    # Without assembler labels, name branch targets after their pc
+    for op in list(ops.values()):
+        if op.name in ("b", "bz", "bnz", "callsub"):
+            target = ops.get(op.imm[0] if op.name == "callsub" else op.imm)
+            if target is not None and target.label is None:
+                target.label = f"pc_{target.pc}"
+
+    for op in ops.values():
+        op.isExit = op.name == "return" and op.label is not None
+
+    return ops
+
+# Opcode handlers. Each takes the evaluation state and decoded immediates and
+# returns the pc to jump to, or None to continue with the next op
+
+def _uint(value) -> int:
+    if not isinstance(value, int):
+        raise EvalError("Expected uint64, got byte string")
+    return value
+
+def _bytes(value) -> bytes:
+    if not isinstance(value, bytes):
+        raise EvalError("Expected byte string, got uint64")
+    return value
+
+def _checked(value: int) -> int:
+    if not 0 <= value <= MAX_UINT:
+        raise EvalError("Integer overflow or underflow")
+    return value
+
+def _binaryUint(fn):
+    def handler(s: _State, imm):
+        b = _uint(s.stack.pop())
+        a = _uint(s.stack.pop())
+        s.stack.append(fn(a, b))
+    return handler
+
+def _compare(fn):
+    return _binaryUint(lambda a, b: 1 if fn(a, b) else 0)
+
+def _div(a, b):
+    if b == 0:
+        raise EvalError("Division by zero")
+    return a // b
+
+def _mod(a, b):
+    if b == 0:
+        raise EvalError("Modulo by zero")
+    return a % b
+
+def _eq(negate: bool):
+    def handler(s: _State, imm):
+        b = s.stack.pop()
+        a = s.stack.pop()
+        if type(a) is not type(b):
+            raise EvalError("Cannot compare uint64 with byte string")
+        s.stack.append(1 if (a == b) != negate else 0)
+    return handler
+
+def _not(s: _State, imm):
+    s.stack.append(1 if _uint(s.stack.pop()) == 0 else 0)
+
+def _len(s: _State, imm):
+    s.stack.append(len(_bytes(s.stack.pop())))
+
+def _itob(s: _State, imm):
+    s.stack.append(_uint(s.stack.pop()).to_bytes(8, "big"))
+
+def _btoi(s: _State, imm):
+    value = _bytes(s.stack.pop())
+    if len(value) > 8:
+        raise EvalError("btoi on more than 8 bytes")
+    s.stack.append(int.from_bytes(value, "big"))
+
+def _bitNot(s: _State, imm):
+    s.stack.append(MAX_UINT ^ _uint(s.stack.pop()))
+
+def _mulw(s: _State, imm):
+    b = _uint(s.stack.pop())
+    a = _uint(s.stack.pop())
+    product = a * b
+    s.stack += [product >> 64, product & MAX_UINT]
+
+def _addw(s: _State, imm):
+    b = _uint(s.stack.pop())
+    a = _uint(s.stack.pop())
+    total = a + b
+    s.stack += [total >> 64, total & MAX_UINT]
+
+def _divmodw(s: _State, imm):
+    divisor = (_uint(s.stack[-2]) << 64) | _uint(s.stack.pop())
+    s.stack.pop()
+    dividend = (_uint(s.stack[-2]) << 64) | _uint(s.stack.pop())
+    s.stack.pop()
+    if divisor == 0:
+        raise EvalError("Division by zero")
+    quotient, remainder = divmod(dividend, divisor)
+    s.stack += [quotient >> 64, quotient & MAX_UINT, remainder >> 64, remainder & MAX_UINT]
+
+def _err(s: _State, imm):
+    raise EvalError("err opcode executed")
+
+def _intcblock(s: _State, imm):
+    s.intc = imm
+
+def _bytecblock(s: _State, imm):
+    s.bytec = imm
+
+def _intc(index):
+    def handler(s: _State, imm):
+        i = index if index is not None else imm
+        if i >= len(s.intc):
+            raise EvalError(f"intc {i} beyond constant block")
+        s.stack.append(s.intc[i])
+    return handler
+
+def _bytec(index):
+    def handler(s: _State, imm):
+        i = index if index is not None else imm
+        if i >= len(s.bytec):
+            raise EvalError(f"bytec {i} beyond constant block")
+        s.stack.append(s.bytec[i])
+    return handler
+
+def _arg(index):
+    def handler(s: _State, imm):
+        i = index if index is not None else imm
+        if i >= len(s.args):
+            raise EvalError(f"LogicSig has no argument {i}")
+        s.stack.append(s.args[i])
+    return handler
+
+def _args(s: _State, imm):
+    _arg(_uint(s.stack.pop()))(s, None)
+
+def _push(s: _State, imm):
+    s.stack.append(imm)
+
+def _txnField(txn: TxnFields, name: str):
+    value = txn.get(name)
+    if value is None:
+        value = _FIELD_DEFAULTS[name]
+    return value
+
+def _txnIndex(s: _State, i: int) -> TxnFields:
+    if i >= len(s.group):
+        raise EvalError(f"Group has no transaction {i}")
+    return s.group[i]
+
+def _txn(s: _State, imm):
+    s.stack.append(_txnField(s.group[s.index], imm))
+
+def _gtxn(s: _State, imm):
+    s.stack.append(_txnField(_txnIndex(s, imm[0]), imm[1]))
+
+def _gtxns(s: _State, imm):
+    s.stack.append(_txnField(_txnIndex(s, _uint(s.stack.pop())), imm))
+
+def _arrayItem(values, i):
+    if i >= len(values):
+        raise EvalError(f"Array index {i} out of range")
+    return values[i]
+
+def _txna(s: _State, imm):
+    s.stack.append(_arrayItem(_txnField(s.group[s.index], imm[0]), imm[1]))
+
+def _gtxna(s: _State, imm):
+    s.stack.append(_arrayItem(_txnField(_txnIndex(s, imm[0]), imm[1]), imm[2]))
+
+def _gtxnsa(s: _State, imm):
+    txn = _txnIndex(s, _uint(s.stack.pop()))
+    s.stack.append(_arrayItem(_txnField(txn, imm[0]), imm[1]))
+
+def _txnas(s: _State, imm):
+    i = _uint(s.stack.pop())
+    s.stack.append(_arrayItem(_txnField(s.group[s.index], imm), i))
+
+def _gtxnas(s: _State, imm):
+    i = _uint(s.stack.pop())
+    s.stack.append(_arrayItem(_txnField(_txnIndex(s, imm[0]), imm[1]), i))
+
+def _gtxnsas(s: _State, imm):
+    i = _uint(s.stack.pop())
+    txn = _txnIndex(s, _uint(s.stack.pop()))
+    s.stack.append(_arrayItem(_txnField(txn, imm), i))
+
+def _global(s: _State, imm):
+    s.stack.append(s.globals[imm])
+
+def _load(s: _State, imm):
+    s.stack.append(s.scratch[imm])
+
+def _store(s: _State, imm):
+    s.scratch[imm] = s.stack.pop()
+
+def _loads(s: _State, imm):
+    s.stack.append(s.scratch[_uint(s.stack.pop())])
+
+def _stores(s: _State, imm):
+    value = s.stack.pop()
+    s.scratch[_uint(s.stack.pop())] = value
+
+def _bnz(s: _State, imm):
+    return imm if _uint(s.stack.pop()) != 0 else None
+
+def _bz(s: _State, imm):
+    return imm if _uint(s.stack.pop()) == 0 else None
+
+def _b(s: _State, imm):
+    return imm
+
+def _return(s: _State, imm):
+    s.result = _uint(s.stack.pop())
+
+def _assert(s: _State, imm):
+    if _uint(s.stack.pop()) == 0:
+        raise EvalError("assert failed")
+
+def _pop(s: _State, imm):
+    s.stack.pop()
+
+def _dup(s: _State, imm):
+    s.stack.append(s.stack[-1])
+
+def _dup2(s: _State, imm):
+    if len(s.stack) < 2:
+        raise IndexError
+    s.stack += s.stack[-2:]
+
+def _dig(s: _State, imm):
+    s.stack.append(s.stack[-1 - imm])
+
+def _swap(s: _State, imm):
+    s.stack[-1], s.stack[-2] = s.stack[-2], s.stack[-1]
+
+def _select(s: _State, imm):
+    c = _uint(s.stack.pop())
+    b = s.stack.pop()
+    a = s.stack.pop()
+    s.stack.append(b if c != 0 else a)
+
+def _cover(s: _State, imm):
+    if imm >= len(s.stack):
+        raise IndexError
+    s.stack.insert(len(s.stack) - 1 - imm, s.stack.pop())
+
+def _uncover(s: _State, imm):
+    if imm >= len(s.stack):
+        raise IndexError
+    s.stack.append(s.stack.pop(len(s.stack) - 1 - imm))
+
+def _concat(s: _State, imm):
+    b = _bytes(s.stack.pop())
+    a = _bytes(s.stack.pop())
+    if len(a) + len(b) > 4096:
+        raise EvalError("concat result exceeds 4096 bytes")
+    s.stack.append(a + b)
+
+def _slice(value: bytes, start: int, end: int) -> bytes:
+    if start > end or end > len(value):
+        raise EvalError("Substring out of range")
+    return value[start:end]
+
+def _substring(s: _State, imm):
+    s.stack.append(_slice(_bytes(s.stack.pop()), imm[0], imm[1]))
+
+def _substring3(s: _State, imm):
+    end = _uint(s.stack.pop())
+    start = _uint(s.stack.pop())
+    s.stack.append(_slice(_bytes(s.stack.pop()), start, end))
+
+def _extract(s: _State, imm):
+    value = _bytes(s.stack.pop())
+    start, length = imm
+    end = len(value) if length == 0 else start + length
+    s.stack.append(_slice(value, start, end))
+
+def _extract3(s: _State, imm):
+    length = _uint(s.stack.pop())
+    start = _uint(s.stack.pop())
+    s.stack.append(_slice(_bytes(s.stack.pop()), start, start + length))
+
+def _extractUint(size: int):
+    def handler(s: _State, imm):
+        start = _uint(s.stack.pop())
+        value = _bytes(s.stack.pop())
+        s.stack.append(int.from_bytes(_slice(value, start, start + size), "big"))
+    return handler
+
+def _getbyte(s: _State, imm):
+    i = _uint(s.stack.pop())
+    value = _bytes(s.stack.pop())
+    s.stack.append(_slice(value, i, i + 1)[0])
+
+def _hash(name: str):
+    def handler(s: _State, imm):
+        s.stack.append(hashlib.new(name, _bytes(s.stack.pop())).digest())
+    return handler
+
+def _ed25519verify(s: _State, imm):
+    pubkey = _bytes(s.stack.pop())
+    signature = _bytes(s.stack.pop())
+    data = _bytes(s.stack.pop())
+    try:
+        VerifyKey(pubkey).verify(b"ProgData" + s.programHash + data, signature)
+        s.stack.append(1)
+    except (BadSignatureError, ValueError, TypeError):
+        s.stack.append(0)
+
+def _shl(s: _State, imm):
+    b = _uint(s.stack.pop())
+    a = _uint(s.stack.pop())
+    if b > 63:
+        raise EvalError("shl by more than 63 bits")
+    s.stack.append((a << b) & MAX_UINT)
+
+def _shr(s: _State, imm):
+    b = _uint(s.stack.pop())
+    a = _uint(s.stack.pop())
+    if b > 63:
+        raise EvalError("shr by more than 63 bits")
+    s.stack.append(a >> b)
+
+def _exp(a, b):
+    if a == 0 and b == 0:
+        raise EvalError("0^0 is undefined")
+    if a > 1 and b > 64:
+        raise EvalError("Integer overflow or underflow")
+    return _checked(a ** b)
+
+def _bytesMath(fn, cmp: bool = False):
+    def handler(s: _State, imm):
+        b = _bytes(s.stack.pop())
+        a = _bytes(s.stack.pop())
+        if len(a) > 64 or len(b) > 64:
+            raise EvalError("Byte math input longer than 64 bytes")
+        result = fn(int.from_bytes(a, "big"), int.from_bytes(b, "big"))
+        if cmp:
+            s.stack.append(1 if result else 0)
+        else:
+            s.stack.append(result.to_bytes((result.bit_length() + 7) // 8, "big") if result else b"")
+    return handler
+
+def _bytesSub(a, b):
+    if b > a:
+        raise EvalError("Byte math underflow")
+    return a - b
+
+def _bzero(s: _State, imm):
+    s.stack.append(bytes(_uint(s.stack.pop())))
+
+def _callsub(s: _State, imm):
+    target, returnPc = imm
+    s.callstack.append(returnPc)
+    return target
+
+def _retsub(s: _State, imm):
+    if not s.callstack:
+        raise EvalError("retsub with empty call stack")
+    return s.callstack.pop()
+
+def _appGlobalGet(s: _State, imm):
+    key = _bytes(s.stack.pop())
+    if s.appGlobals is None:
+        raise EvalError("Application state is not available in signature mode")
+    s.stack.append(s.appGlobals.get(key, 0))
+
+def _appGlobalGetEx(s: _State, imm):
+    key = _bytes(s.stack.pop())
+    _uint(s.stack.pop())
+    if s.appGlobals is None:
+        raise EvalError("Application state is not available in signature mode")
+    exists = key in s.appGlobals
+    s.stack += [s.appGlobals.get(key, 0), 1 if exists else 0]
+
+def _appGlobalPut(s: _State, imm):
+    value = s.stack.pop()
+    key = _bytes(s.stack.pop())
+    if s.appGlobals is None:
+        raise EvalError("Application state is not available in signature mode")
+    s.appGlobals[key] = value
+
+def _appGlobalDel(s: _State, imm):
+    key = _bytes(s.stack.pop())
+    if s.appGlobals is None:
+        raise EvalError("Application state is not available in signature mode")
+    s.appGlobals.pop(key, None)
+
+def _unsupported(name: str):
+    def handler(s: _State, imm):
+        raise EvalError(f"{name} is not supported by the offline evaluator")
+    return handler
+
+_HANDLERS: Dict[str, Callable] = {
+    "err": _err,
+    "sha256": _hash("sha256"),
+    "sha512_256": _hash("sha512_256"),
+    "ed25519verify": _ed25519verify,
+    "+": _binaryUint(lambda a, b: _checked(a + b)),
+    "-": _binaryUint(lambda a, b: _checked(a - b)),
+    "/": _binaryUint(_div),
+    "*": _binaryUint(lambda a, b: _checked(a * b)),
+    "<": _compare(lambda a, b: a < b),
+    ">": _compare(lambda a, b: a > b),
+    "<=": _compare(lambda a, b: a <= b),
+    ">=": _compare(lambda a, b: a >= b),
+    "&&": _compare(lambda a, b: a != 0 and b != 0),
+    "||": _compare(lambda a, b: a != 0 or b != 0),
+    "==": _eq(False),
+    "!=": _eq(True),
+    "!": _not,
+    "len": _len,
+    "itob": _itob,
+    "btoi": _btoi,
+    "%": _binaryUint(_mod),
+    "|": _binaryUint(lambda a, b: a | b),
+    "&": _binaryUint(lambda a, b: a & b),
+    "^": _binaryUint(lambda a, b: a ^ b),
+    "~": _bitNot,
+    "mulw": _mulw,
+    "addw": _addw,
+    "divmodw": _divmodw,
+    "intcblock": _intcblock,
+    "intc": _intc(None),
+    "intc_0": _intc(0),
+    "intc_1": _intc(1),
+    "intc_2": _intc(2),
+    "intc_3": _intc(3),
+    "bytecblock": _bytecblock,
+    "bytec": _bytec(None),
+    "bytec_0": _bytec(0),
+    "bytec_1": _bytec(1),
+    "bytec_2": _bytec(2),
+    "bytec_3": _bytec(3),
+    "arg": _arg(None),
+    "arg_0": _arg(0),
+    "arg_1": _arg(1),
+    "arg_2": _arg(2),
+    "arg_3": _arg(3),
+    "args": _args,
+    "txn": _txn,
+    "global": _global,
+    "gtxn": _gtxn,
+    "load": _load,
+    "store": _store,
+    "txna": _txna,
+    "gtxna": _gtxna,
+    "gtxns": _gtxns,
+    "gtxnsa": _gtxnsa,
+    "txnas": _txnas,
+    "gtxnas": _gtxnas,
+    "gtxnsas": _gtxnsas,
+    "loads": _loads,
+    "stores": _stores,
+    "bnz": _bnz,
+    "bz": _bz,
+    "b": _b,
+    "return": _return,
+    "assert": _assert,
+    "pop": _pop,
+    "dup": _dup,
+    "dup2": _dup2,
+    "dig": _dig,
+    "swap": _swap,
+    "select": _select,
+    "cover": _cover,
+    "uncover": _uncover,
+    "concat": _concat,
+    "substring": _substring,
+    "substring3": _substring3,
+    "getbyte": _getbyte,
+    "extract": _extract,
+    "extract3": _extract3,
+    "extract_uint16": _extractUint(2),
+    "extract_uint32": _extractUint(4),
+    "extract_uint64": _extractUint(8),
+    "app_global_get": _appGlobalGet,
+    "app_global_get_ex": _appGlobalGetEx,
+    "app_global_put": _appGlobalPut,
+    "app_global_del": _appGlobalDel,
+    "pushbytes": _push,
+    "pushint": _push,
+    "callsub": _callsub,
+    "retsub": _retsub,
+    "shl": _shl,
+    "shr": _shr,
+    "exp": _binaryUint(_exp),
+    "b+": _bytesMath(lambda a, b: a + b),
+    "b-": _bytesMath(_bytesSub),
+    "b/": _bytesMath(lambda a, b: _div(a, b)),
+    "b*": _bytesMath(lambda a, b: a * b),
+    "b%": _bytesMath(lambda a, b: _mod(a, b)),
+    "b<": _bytesMath(lambda a, b: a < b, cmp=True),
+    "b>": _bytesMath(lambda a, b: a > b, cmp=True),
+    "b<=": _bytesMath(lambda a, b: a <= b, cmp=True),
+    "b>=": _bytesMath(lambda a, b: a >= b, cmp=True),
+    "b==": _bytesMath(lambda a, b: a == b, cmp=True),
+    "b!=": _bytesMath(lambda a, b: a != b, cmp=True),
+    "bzero": _bzero,
+}
@@ -0,0 +1,426 @@
+"""
+Property based fuzzing of the exchange escrow. Mutated 1 and 3 transaction groups are
+run through the compiled escrow in process and compared to a reference model of the
+actions the exchange allows
+"""
+
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from algosdk import encoding
+from backend.teal.evaluator import TealEvaluator, TxnFields, ZERO_ADDRESS
+
+PAY = 1
+AXFER = 4
+APPL = 6
+MAX_FEE = 1000
+
+class ExchangeSpec:
+    """
+    Reference model of ChadExchangeASC1. allowed returns whether the escrow may sign
+    transaction index of group, written directly from the exchange rules rather than
+    from the TEAL
+    """
+
+    maxBatchSwaps = 5
+
+    def __init__(self, adminAddr: str, chadID: int, minChadTxThresh: int, appID: Optional[int] = None,
+                 batched: bool = False):
+        self.admin = encoding.decode_address(adminAddr)
+        self.chadID = chadID
+        self.minChadTxThresh = minChadTxThresh
+        self.appID = appID
+        self.batched = batched
+
+    def allowed(self, group: List[TxnFields], index: int) -> bool:
+        txn = group[index]
+        if len(group) == 1:
+            if txn["TypeEnum"] == AXFER and txn["Sender"] == txn["AssetReceiver"]:
+                return self.isValidOptIn(txn)
+            if txn["TypeEnum"] == PAY:
+                return self.isValidWithdrawAlgo(txn)
+            if txn["TypeEnum"] == AXFER:
+                return self.isValidWithdrawChad(txn)
+            return False
+
+        if self.batched:
+            # Swap pairs at (index - 1, index) share the approval at the end
+            if len(group) % 2 == 0 or len(group) > 2 * self.maxBatchSwaps + 1 or index % 2 == 0:
+                return False
+            buyer, payout, approval = group[index - 1], group[index], group[-1]
+            if buyer["TypeEnum"] == PAY and payout["TypeEnum"] == AXFER:
+                return self.isValidSwapAlgoForChad([buyer, payout, approval])
+            if buyer["TypeEnum"] == AXFER and payout["TypeEnum"] == PAY:
+                return (
+                    buyer["AssetReceiver"] == payout["Sender"]
+                    and self.isValidSwapChadForAlgo([buyer, payout, approval])
+                )
+            return False
+
+        if len(group) == 3:
+            # Without a per swap admin signature the escrow may only sign the payout
+            if self.appID is not None and index != 1:
+                return False
+            if group[0]["TypeEnum"] == PAY and group[1]["TypeEnum"] == AXFER:
+                return self.isValidSwapAlgoForChad(group)
+            if group[0]["TypeEnum"] == AXFER and group[1]["TypeEnum"] == PAY:
+                return self.isValidSwapChadForAlgo(group)
+
+        return False
+
+    def isValidOptIn(self, txn: TxnFields) -> bool:
+        return (
+            txn["XferAsset"] == self.chadID
+            and txn["AssetAmount"] == 0
+            and _isSafeAssetTransfer(txn)
+        )
+
+    def isValidWithdrawAlgo(self, txn: TxnFields) -> bool:
+        return txn["Receiver"] == self.admin and _isSafePayment(txn)
+
+    def isValidWithdrawChad(self, txn: TxnFields) -> bool:
+        return (
+            txn["AssetReceiver"] == self.admin
+            and txn["XferAsset"] == self.chadID
+            and _isSafeAssetTransfer(txn)
+        )
+
+    def isValidSwapAlgoForChad(self, group: List[TxnFields]) -> bool:
+        payment, chad, approval = group
+        return (
+            payment["Fee"] <= MAX_FEE
+            and payment["Receiver"] == chad["Sender"]
+            and chad["AssetReceiver"] == payment["Sender"]
+            and chad["XferAsset"] == self.chadID
+            and chad["AssetAmount"] >= self.minChadTxThresh
+            and _isSafeAssetTransfer(chad)
+            and self.isValidApproval(approval)
+        )
+
+    def isValidSwapChadForAlgo(self, group: List[TxnFields]) -> bool:
+        chad, payment, approval = group
+        return (
+            chad["Fee"] <= MAX_FEE
+            and chad["XferAsset"] == self.chadID
+            and chad["AssetAmount"] >= self.minChadTxThresh
+            and _isSafeAssetTransfer(chad)
+            and payment["Receiver"] == chad["Sender"]
+            and (self.appID is None or chad["AssetReceiver"] == payment["Sender"])
+            and _isSafePayment(payment)
+            and self.isValidApproval(approval)
+        )
+
+    def isValidApproval(self, txn: TxnFields) -> bool:
+        if self.appID is not None:
+            return (
+                txn["TypeEnum"] == APPL
+                and txn["ApplicationID"] == self.appID
+                and txn["OnCompletion"] == 0
+                and txn["Fee"] <= MAX_FEE
+            )
+
+        return (
+            txn["TypeEnum"] == PAY
+            and txn["Sender"] == self.admin
+            and txn["Amount"] == 0
+            and txn["Fee"] <= MAX_FEE
+        )
+
+def _isSafePayment(txn: TxnFields) -> bool:
+    return (
+        txn["Fee"] <= MAX_FEE
+        and txn["CloseRemainderTo"] == ZERO_ADDRESS
+        and txn["RekeyTo"] == ZERO_ADDRESS
+    )
+
+def _isSafeAssetTransfer(txn: TxnFields) -> bool:
+    return (
+        txn["Fee"] <= MAX_FEE
+        and txn["AssetSender"] == ZERO_ADDRESS
+        and txn["AssetCloseTo"] == ZERO_ADDRESS
+        and txn["RekeyTo"] == ZERO_ADDRESS
+    )
+
+class GroupGenerator:
+    """
+    Generates exchange transaction groups as TEAL field dicts. Each group starts from
+    a valid action and has a random set of mutations applied, so most of the space
+    explored sits close to the boundary of what the escrow accepts
+    """
+
+    actions = ["optIn", "withdrawAlgo", "withdrawChad", "swapAlgoForChad", "swapChadForAlgo"]
+    mutations = ["fee", "closeTo", "rekey", "assetID", "order", "amount", "approval", "type", "size", "receiver"]
+    mutationRate = 0.25
+
+    def __init__(self, escrow: bytes, admin: bytes, chadID: int, minChadTxThresh: int, seed: int = 0,
+                 appID: Optional[int] = None, batched: bool = False):
+        self.rng = random.Random(seed)
+        self.appID = appID
+        self.batched = batched
+        self.escrow = escrow
+        self.admin = admin
+        self.user = bytes([7]) * 32
+        self.other = bytes([9]) * 32
+        self.addresses = [ZERO_ADDRESS, escrow, admin, self.user, self.other]
+        self.chadID = chadID
+        self.thresh = minChadTxThresh
+
+    def generate(self) -> Tuple[str, Tuple[str, ...], List[TxnFields]]:
+        """
+        Returns (action, mutations applied, group)
+        """
+        rng = self.rng
+        action = rng.choice(self.actions)
+        group = getattr(self, action)()
+        if self.batched and action.startswith("swap"):
+            # Pack more swaps of either direction in front of the approval
+            for _ in range(rng.randrange(ExchangeSpec.maxBatchSwaps)):
+                group[-1:-1] = getattr(self, rng.choice(["swapAlgoForChad", "swapChadForAlgo"]))()[:2]
+        applied = tuple(m for m in self.mutations if rng.random() < self.mutationRate)
+        for mutation in applied:
+            getattr(self, "_" + mutation)(group)
+
+        for i, txn in enumerate(group):
+            txn["GroupIndex"] = i
+
+        return action, applied, group
+
+    def _txn(self, typeEnum: int, sender: bytes, **fields) -> TxnFields:
+        txn = {
+            "Sender": sender, "Fee": MAX_FEE, "TypeEnum": typeEnum,
+            "RekeyTo": ZERO_ADDRESS, "CloseRemainderTo": ZERO_ADDRESS,
+            "AssetSender": ZERO_ADDRESS, "AssetCloseTo": ZERO_ADDRESS,
+            "Receiver": ZERO_ADDRESS, "AssetReceiver": ZERO_ADDRESS,
+            "Amount": 0, "AssetAmount": 0, "XferAsset": 0,
+            "ApplicationID": 0, "OnCompletion": 0,
+        }
+        txn.update(fields)
+        return txn
+
+    def payment(self, sender: bytes, receiver: bytes, amount: int) -> TxnFields:
+        return self._txn(PAY, sender, Receiver=receiver, Amount=amount)
+
+    def assetTransfer(self, sender: bytes, receiver: bytes, amount: int) -> TxnFields:
+        return self._txn(AXFER, sender, AssetReceiver=receiver, AssetAmount=amount, XferAsset=self.chadID)
+
+    def approval(self) -> TxnFields:
+        if self.appID is not None:
+            return self._txn(APPL, self.user, ApplicationID=self.appID)
+
+        return self.payment(self.admin, self.escrow, 0)
+
+    def optIn(self):
+        return [self.assetTransfer(self.escrow, self.escrow, 0)]
+
+    def withdrawAlgo(self):
+        return [self.payment(self.escrow, self.admin, self.rng.randrange(1, 10 ** 9))]
+
+    def withdrawChad(self):
+        return [self.assetTransfer(self.escrow, self.admin, self.rng.randrange(1, 10 ** 9))]
+
+    def swapAlgoForChad(self):
+        return [
+            self.payment(self.user, self.escrow, self.rng.randrange(1, 10 ** 9)),
+            self.assetTransfer(self.escrow, self.user, self.thresh + self.rng.randrange(0, 10 ** 9)),
+            self.approval(),
+        ]
+
+    def swapChadForAlgo(self):
+        return [
+            self.assetTransfer(self.user, self.escrow, self.thresh + self.rng.randrange(0, 10 ** 9)),
+            self.payment(self.escrow, self.user, self.rng.randrange(1, 10 ** 9)),
+            self.approval(),
+        ]
+
+    def _pick(self, group):
+        return self.rng.choice(group)
+
+    def _fee(self, group):
+        self._pick(group)["Fee"] = self.rng.choice([0, MAX_FEE - 1, MAX_FEE + 1, 2000, 10 ** 6])
+
+    def _closeTo(self, group):
+        txn = self._pick(group)
+        key = "CloseRemainderTo" if txn["TypeEnum"] == PAY else self.rng.choice(["AssetCloseTo", "AssetSender"])
+        txn[key] = self.rng.choice(self.addresses[1:])
+
+    def _rekey(self, group):
+        self._pick(group)["RekeyTo"] = self.rng.choice(self.addresses[1:])
+
+    def _assetID(self, group):
+        self._pick(group)["XferAsset"] = self.rng.choice([0, self.chadID - 1, self.chadID + 1, 2 ** 64 - 1])
+
+    def _order(self, group):
+        self.rng.shuffle(group)
+
+    def _amount(self, group):
+        txn = self._pick(group)
+        key = "Amount" if txn["TypeEnum"] == PAY else "AssetAmount"
+        txn[key] = self.rng.choice([0, 1, self.thresh - 1, self.thresh, self.thresh + 1, 2 ** 64 - 1])
+
+    def _approval(self, group):
+        txn = group[-1]
+        if self.appID is not None:
+            key = self.rng.choice(["ApplicationID", "OnCompletion"])
+            txn[key] = self.rng.choice([0, 1, 5, self.appID + 1]) if key == "ApplicationID" else self.rng.randrange(1, 6)
+        elif self.rng.random() < 0.5:
+            txn["Sender"] = self.rng.choice([self.escrow, self.user, self.other])
+        else:
+            txn["Amount"] = self.rng.choice([1, self.thresh])
+
+    def _type(self, group):
+        txn = self._pick(group)
+        txn["TypeEnum"] = self.rng.choice([PAY, AXFER, 3, 6])
+
+    def _size(self, group):
+        if len(group) > 1 and self.rng.random() < 0.5:
+            del group[self.rng.randrange(len(group))]
+        else:
+            group.append(dict(self._pick(group)))
+
+    def _receiver(self, group):
+        txn = self._pick(group)
+        key = "Receiver" if txn["TypeEnum"] == PAY else "AssetReceiver"
+        txn[key] = self.rng.choice(self.addresses)
+
+@dataclass
+class Mismatch:
+    action: str
+    mutations: Tuple[str, ...]
+    index: int
+    expected: bool
+    branch: str
+    group: List[TxnFields]
+
+@dataclass
+class FuzzReport:
+    """
+    Aggregated result of a fuzzing run
+    """
+
+    groups: int = 0
+    evaluations: int = 0
+    accepted: int = 0
+    mismatches: int = 0
+    branches: Counter = field(default_factory=Counter)
+    mismatchKinds: Counter = field(default_factory=Counter)
+    examples: List[Mismatch] = field(default_factory=list)
+    seconds: float = 0.0
+
+    maxExamples = 20
+
+    def merge(self, other: "FuzzReport"):
+        self.groups += other.groups
+        self.evaluations += other.evaluations
+        self.accepted += other.accepted
+        self.mismatches += other.mismatches
+        self.branches.update(other.branches)
+        self.mismatchKinds.update(other.mismatchKinds)
+        self.examples += other.examples[:self.maxExamples - len(self.examples)]
+
+    @property
+    def groupsPerMinute(self) -> float:
+        return 60 * self.groups / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.groups} groups, {self.evaluations} evaluations in {self.seconds:.1f}s "
+            f"({self.groupsPerMinute:,.0f} groups/min)",
+            f"accepted {self.accepted}, mismatches {self.mismatches}",
+            "branches: " + ", ".join(f"{b}={n}" for b, n in self.branches.most_common()),
+        ]
+        for (action, mutations, expected), n in self.mismatchKinds.most_common(10):
+            lines.append(f"  {n} x {action} {list(mutations)}: spec {'allows' if expected else 'rejects'}")
+
+        return "\n".join(lines)
+
+@dataclass
+class FuzzConfig:
+    program: bytes
+    adminAddr: str
+    chadID: int
+    minChadTxThresh: int
+    appID: Optional[int] = None
+    batched: bool = False
+
+def fuzzChunk(config: FuzzConfig, iterations: int, seed: int) -> FuzzReport:
+    """
+    Fuzz iterations groups with one generator. Runs in the worker processes
+    """
+    evaluator = TealEvaluator(config.program)
+    spec = ExchangeSpec(config.adminAddr, config.chadID, config.minChadTxThresh, config.appID, config.batched)
+    escrow = encoding.decode_address(encoding.encode_address(evaluator.programHash))
+    generator = GroupGenerator(escrow, spec.admin, config.chadID, config.minChadTxThresh, seed, config.appID, config.batched)
+    report = FuzzReport()
+
+    for _ in range(iterations):
+        action, mutations, group = generator.generate()
+        report.groups += 1
+
+        # The escrow signs every transaction it sends
+        for index, txn in enumerate(group):
+            if txn["Sender"] != escrow:
+                continue
+
+            result = evaluator.evaluate(group, index)
+            expected = spec.allowed(group, index)
+            report.evaluations += 1
+            report.accepted += result.passed
+            report.branches[result.branch] += 1
+
+            if result.passed != expected:
+                report.mismatches += 1
+                report.mismatchKinds[(action, mutations, expected)] += 1
+                if len(report.examples) < FuzzReport.maxExamples:
+                    report.examples.append(Mismatch(action, mutations, index, expected, result.branch, group))
+
+    return report
+
+class ExchangeFuzzer:
+    """
+    Fans fuzzing out across a process pool
+    """
+
+    chunkSize = 20000
+
+    def __init__(self, config: FuzzConfig, workers: Optional[int] = None):
+        self.config = config
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, iterations: int, seed: int = 0) -> FuzzReport:
+        chunks = [min(self.chunkSize, iterations - start) for start in range(0, iterations, self.chunkSize)]
+        report = FuzzReport()
+        start = time.perf_counter()
+
+        if self.workers == 1:
+            for i, n in enumerate(chunks):
+                report.merge(fuzzChunk(self.config, n, seed + i))
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(fuzzChunk, self.config, n, seed + i) for i, n in enumerate(chunks)]
+                for future in futures:
+                    report.merge(future.result())
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def forExchange(exchange, workers: Optional[int] = None) -> "ExchangeFuzzer":
+        """
+        Fuzzer for the escrow of a ChadExchangeService
+        """
+        contract = exchange.contract
+        if contract.attested:
+            raise ValueError("Attested swaps carry LogicSig args, which the group generator does not model")
+
+        return ExchangeFuzzer(
+            FuzzConfig(
+                exchange.escrowBytes, contract.adminAddr, contract.chadID, contract.minChadTxThresh,
+                contract.appID, contract.batched
+            ),
+            workers=workers
+        )
@@ -0,0 +1,179 @@
+"""
+Size and opcode cost profiling of the exchange escrow and delegated signature
+programs, with a stored baseline to catch regressions
+"""
+
+import itertools
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from algosdk import encoding
+from pyteal import compileTeal, Mode
+from backend.contracts.chadExchange import ChadExchangeASC1
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.teal.assembler import TealAssembler
+from backend.teal.evaluator import TealEvaluator
+from backend.teal.fuzzer import GroupGenerator
+
+@dataclass
+class BranchProfile:
+    """
+    Cost of one representative transaction group through a program
+    """
+
+    action: str
+    branch: str
+    passed: bool
+    cost: int
+    opcodes: Dict[str, int] = field(default_factory=dict)
+
+@dataclass
+class ContractProfile:
+    name: str
+    size: int
+    branches: Dict[str, BranchProfile] = field(default_factory=dict)
+
+    def expectedCost(self, mix: Dict[str, float]) -> float:
+        """
+        Mean cost per evaluation for a traffic mix of action -> weight
+        """
+        total = sum(mix.values())
+        return sum(self.branches[action].cost * weight for action, weight in mix.items()) / total
+
+    def summary(self) -> str:
+        lines = [f"{self.name}: {self.size} bytes"]
+        for action, profile in self.branches.items():
+            top = sorted(profile.opcodes.items(), key=lambda kv: -kv[1])[:4]
+            lines.append(
+                f"  {action:<16} cost {profile.cost:>4}  {'pass' if profile.passed else 'FAIL'}  "
+                + ", ".join(f"{op}x{n}" for op, n in top)
+            )
+
+        return "\n".join(lines)
+
+class ContractProfiler:
+    """
+    Profiles contracts built from fixed reference parameters, so numbers are
+    comparable between runs
+    """
+
+    adminAddr = encoding.encode_address(bytes([1]) * 32)
+    chadID = 1000000
+    minChadTxThresh = 20000000
+    noMoreThan = 100000000
+
+    baselinePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profileBaseline.json")
+
+    @staticmethod
+    def profileExchange(branchOrder: Optional[List[str]] = None) -> ContractProfile:
+        """
+        Profile ChadExchangeASC1 with one valid group per action
+        """
+        contract = ChadExchangeASC1(
+            ContractProfiler.adminAddr, ContractProfiler.chadID, ContractProfiler.minChadTxThresh, branchOrder=branchOrder
+        )
+        program = TealAssembler.assemble(compileTeal(contract.program(), mode=Mode.Signature, version=5))
+        evaluator = TealEvaluator(program)
+        escrow = evaluator.programHash
+        generator = GroupGenerator(
+            escrow, encoding.decode_address(ContractProfiler.adminAddr), ContractProfiler.chadID, ContractProfiler.minChadTxThresh
+        )
+
+        profile = ContractProfile("ChadExchangeASC1", len(program.bytecode))
+        for action in ChadExchangeASC1.defaultBranchOrder:
+            group = getattr(generator, action)()
+            for i, txn in enumerate(group):
+                txn["GroupIndex"] = i
+
+            index = next(i for i, txn in enumerate(group) if txn["Sender"] == escrow)
+            result = evaluator.evaluate(group, index, countOpcodes=True)
+            profile.branches[action] = BranchProfile(action, result.branch, result.passed, result.cost, result.opcodeCounts)
+
+        return profile
+
+    @staticmethod
+    def profileDelegatedSignatures() -> List[ContractProfile]:
+        """
+        Profile the algo and chad delegated signatures, patched from their templates as
+        the service derives them, with a transfer at the limit
+        """
+        exchange = encoding.decode_address(ContractProfiler.adminAddr)
+        generator = GroupGenerator(bytes([2]) * 32, exchange, ContractProfiler.chadID, ContractProfiler.minChadTxThresh)
+        cases = [
+            ("algoSig", DelegatedSignature.algoSigProgram(ContractProfiler.adminAddr, ContractProfiler.noMoreThan),
+             generator.payment(generator.user, exchange, ContractProfiler.noMoreThan)),
+            ("chadSig", DelegatedSignature.chadSigProgram(ContractProfiler.adminAddr, ContractProfiler.noMoreThan, ContractProfiler.chadID),
+             generator.assetTransfer(generator.user, exchange, ContractProfiler.noMoreThan)),
+        ]
+
+        profiles = []
+        for name, program, txn in cases:
+            result = TealEvaluator(program).evaluate([txn], 0, countOpcodes=True)
+            profile = ContractProfile(name, len(program))
+            profile.branches["transfer"] = BranchProfile("transfer", result.branch, result.passed, result.cost, result.opcodeCounts)
+            profiles.append(profile)
+
+        return profiles
+
+    @staticmethod
+    def profileAll() -> List[ContractProfile]:
+        return [ContractProfiler.profileExchange()] + ContractProfiler.profileDelegatedSignatures()
+
+    @staticmethod
+    def suggestBranchOrder(mix: Dict[str, float]) -> List[Tuple[float, List[str]]]:
+        """
+        Rank every ordering of the escrow branches by mean cost under the traffic mix,
+        cheapest first. Orders are measured rather than estimated since the cost of a
+        failed predicate depends on the program PyTeal generates around it
+        """
+        unknown = set(mix) - set(ChadExchangeASC1.defaultBranchOrder)
+        if unknown:
+            raise ValueError(f"Unknown actions in traffic mix: {sorted(unknown)}")
+
+        ranked = []
+        for order in itertools.permutations(ChadExchangeASC1.defaultBranchOrder):
+            profile = ContractProfiler.profileExchange(branchOrder=list(order))
+            ranked.append((profile.expectedCost(mix), list(order)))
+
+        ranked.sort(key=lambda r: r[0])
+        return ranked
+
+    @staticmethod
+    def loadBaseline(path: Optional[str] = None) -> Dict[str, dict]:
+        with open(path or ContractProfiler.baselinePath) as f:
+            return json.load(f)
+
+    @staticmethod
+    def saveBaseline(profiles: List[ContractProfile], path: Optional[str] = None):
+        baseline = {
+            p.name: {"size": p.size, "costs": {a: b.cost for a, b in p.branches.items()}} for p in profiles
+        }
+        with open(path or ContractProfiler.baselinePath, "w") as f:
+            json.dump(baseline, f, indent=4)
+            f.write("\n")
+
+    @staticmethod
+    def regressions(profiles: List[ContractProfile], baseline: Dict[str, dict]) -> List[str]:
+        """
+        Describe every size or cost that grew relative to the baseline
+        """
+        found = []
+        for profile in profiles:
+            expected = baseline.get(profile.name)
+            if expected is None:
+                found.append(f"{profile.name}: no baseline")
+                continue
+
+            if profile.size > expected["size"]:
+                found.append(f"{profile.name}: size {expected['size']} -> {profile.size} bytes")
+
+            for action, branch in profile.branches.items():
+                if not branch.passed:
+                    found.append(f"{profile.name}.{action}: representative group rejected")
+                baseCost = expected["costs"].get(action)
+                if baseCost is not None and branch.cost > baseCost:
+                    found.append(f"{profile.name}.{action}: cost {baseCost} -> {branch.cost}")
+
+        return found
@@ -0,0 +1,272 @@
+"""
+TEAL v5 language specification shared by the assembler and evaluator
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+MAX_VERSION = 5
+
+@dataclass(frozen=True)
+class OpSpec:
+    """
+    Opcode, immediate argument layout and evaluation cost of a TEAL op
+
+    Immediate layouts:
+    - ""        no immediates
+    - "u8"      one uint8
+    - "u8u8"    two uint8s
+    - "txn"     transaction field
+    - "gtxn"    group index and transaction field
+    - "txna"    transaction field and array index
+    - "gtxna"   group index, transaction field and array index
+    - "global"  global field
+    - "ahold"   asset holding field
+    - "aparam"  asset params field
+    - "appparam" app params field
+    - "label"   int16 branch offset
+    - "varuint" a single varuint (pushint)
+    - "bytes"   varuint length prefixed bytes (pushbytes)
+    - "intc"    varuint count followed by varuints (intcblock)
+    - "bytec"   varuint count followed by length prefixed bytes (bytecblock)
+    """
+
+    name: str
+    opcode: int
+    immediates: str = ""
+    cost: int = 1
+    version: int = 1
+
+OPS = [
+    OpSpec("err", 0x00),
+    OpSpec("sha256", 0x01, cost=35),
+    OpSpec("keccak256", 0x02, cost=130),
+    OpSpec("sha512_256", 0x03, cost=45),
+    OpSpec("ed25519verify", 0x04, cost=1900),
+    OpSpec("+", 0x08),
+    OpSpec("-", 0x09),
+    OpSpec("/", 0x0a),
+    OpSpec("*", 0x0b),
+    OpSpec("<", 0x0c),
+    OpSpec(">", 0x0d),
+    OpSpec("<=", 0x0e),
+    OpSpec(">=", 0x0f),
+    OpSpec("&&", 0x10),
+    OpSpec("||", 0x11),
+    OpSpec("==", 0x12),
+    OpSpec("!=", 0x13),
+    OpSpec("!", 0x14),
+    OpSpec("len", 0x15),
+    OpSpec("itob", 0x16),
+    OpSpec("btoi", 0x17),
+    OpSpec("%", 0x18),
+    OpSpec("|", 0x19),
+    OpSpec("&", 0x1a),
+    OpSpec("^", 0x1b),
+    OpSpec("~", 0x1c),
+    OpSpec("mulw", 0x1d),
+    OpSpec("addw", 0x1e, version=2),
+    OpSpec("divmodw", 0x1f, cost=20, version=4),
+    OpSpec("intcblock", 0x20, "intc"),
+    OpSpec("intc", 0x21, "u8"),
+    OpSpec("intc_0", 0x22),
+    OpSpec("intc_1", 0x23),
+    OpSpec("intc_2", 0x24),
+    OpSpec("intc_3", 0x25),
+    OpSpec("bytecblock", 0x26, "bytec"),
+    OpSpec("bytec", 0x27, "u8"),
+    OpSpec("bytec_0", 0x28),
+    OpSpec("bytec_1", 0x29),
+    OpSpec("bytec_2", 0x2a),
+    OpSpec("bytec_3", 0x2b),
+    OpSpec("arg", 0x2c, "u8"),
+    OpSpec("arg_0", 0x2d),
+    OpSpec("arg_1", 0x2e),
+    OpSpec("arg_2", 0x2f),
+    OpSpec("arg_3", 0x30),
+    OpSpec("txn", 0x31, "txn"),
+    OpSpec("global", 0x32, "global"),
+    OpSpec("gtxn", 0x33, "gtxn"),
+    OpSpec("load", 0x34, "u8"),
+    OpSpec("store", 0x35, "u8"),
+    OpSpec("txna", 0x36, "txna", version=2),
+    OpSpec("gtxna", 0x37, "gtxna", version=2),
+    OpSpec("gtxns", 0x38, "txn", version=3),
+    OpSpec("gtxnsa", 0x39, "txna", version=3),
+    OpSpec("gload", 0x3a, "u8u8", version=4),
+    OpSpec("gloads", 0x3b, "u8", version=4),
+    OpSpec("gaid", 0x3c, "u8", version=4),
+    OpSpec("gaids", 0x3d, version=4),
+    OpSpec("loads", 0x3e, version=5),
+    OpSpec("stores", 0x3f, version=5),
+    OpSpec("bnz", 0x40, "label"),
+    OpSpec("bz", 0x41, "label", version=2),
+    OpSpec("b", 0x42, "label", version=2),
+    OpSpec("return", 0x43, version=2),
+    OpSpec("assert", 0x44, version=3),
+    OpSpec("pop", 0x48),
+    OpSpec("dup", 0x49),
+    OpSpec("dup2", 0x4a, version=2),
+    OpSpec("dig", 0x4b, "u8", version=3),
+    OpSpec("swap", 0x4c, version=3),
+    OpSpec("select", 0x4d, version=3),
+    OpSpec("cover", 0x4e, "u8", version=5),
+    OpSpec("uncover", 0x4f, "u8", version=5),
+    OpSpec("concat", 0x50, version=2),
+    OpSpec("substring", 0x51, "u8u8", version=2),
+    OpSpec("substring3", 0x52, version=2),
+    OpSpec("getbit", 0x53, version=3),
+    OpSpec("setbit", 0x54, version=3),
+    OpSpec("getbyte", 0x55, version=3),
+    OpSpec("setbyte", 0x56, version=3),
+    OpSpec("extract", 0x57, "u8u8", version=5),
+    OpSpec("extract3", 0x58, version=5),
+    OpSpec("extract_uint16", 0x59, version=5),
+    OpSpec("extract_uint32", 0x5a, version=5),
+    OpSpec("extract_uint64", 0x5b, version=5),
+    OpSpec("balance", 0x60, version=2),
+    OpSpec("app_opted_in", 0x61, version=2),
+    OpSpec("app_local_get", 0x62, version=2),
+    OpSpec("app_local_get_ex", 0x63, version=2),
+    OpSpec("app_global_get", 0x64, version=2),
+    OpSpec("app_global_get_ex", 0x65, version=2),
+    OpSpec("app_local_put", 0x66, version=2),
+    OpSpec("app_global_put", 0x67, version=2),
+    OpSpec("app_local_del", 0x68, version=2),
+    OpSpec("app_global_del", 0x69, version=2),
+    OpSpec("asset_holding_get", 0x70, "ahold", version=2),
+    OpSpec("asset_params_get", 0x71, "aparam", version=2),
+    OpSpec("app_params_get", 0x72, "appparam", version=5),
+    OpSpec("min_balance", 0x78, version=3),
+    OpSpec("pushbytes", 0x80, "bytes", version=3),
+    OpSpec("pushint", 0x81, "varuint", version=3),
+    OpSpec("callsub", 0x88, "label", version=4),
+    OpSpec("retsub", 0x89, version=4),
+    OpSpec("shl", 0x90, version=4),
+    OpSpec("shr", 0x91, version=4),
+    OpSpec("sqrt", 0x92, cost=4, version=4),
+    OpSpec("bitlen", 0x93, version=4),
+    OpSpec("exp", 0x94, version=4),
+    OpSpec("expw", 0x95, cost=10, version=4),
+    OpSpec("b+", 0xa0, cost=10, version=4),
+    OpSpec("b-", 0xa1, cost=10, version=4),
+    OpSpec("b/", 0xa2, cost=20, version=4),
+    OpSpec("b*", 0xa3, cost=20, version=4),
+    OpSpec("b<", 0xa4, version=4),
+    OpSpec("b>", 0xa5, version=4),
+    OpSpec("b<=", 0xa6, version=4),
+    OpSpec("b>=", 0xa7, version=4),
+    OpSpec("b==", 0xa8, version=4),
+    OpSpec("b!=", 0xa9, version=4),
+    OpSpec("b%", 0xaa, cost=20, version=4),
+    OpSpec("b|", 0xab, cost=6, version=4),
+    OpSpec("b&", 0xac, cost=6, version=4),
+    OpSpec("b^", 0xad, cost=6, version=4),
+    OpSpec("b~", 0xae, cost=4, version=4),
+    OpSpec("bzero", 0xaf, version=4),
+    OpSpec("log", 0xb0, version=5),
+    OpSpec("itxn_begin", 0xb1, version=5),
+    OpSpec("itxn_field", 0xb2, "txn", version=5),
+    OpSpec("itxn_submit", 0xb3, version=5),
+    OpSpec("itxn", 0xb4, "txn", version=5),
+    OpSpec("itxna", 0xb5, "txna", version=5),
+    OpSpec("txnas", 0xc0, "txn", version=5),
+    OpSpec("gtxnas", 0xc1, "gtxn", version=5),
+    OpSpec("gtxnsas", 0xc2, "txn", version=5),
+    OpSpec("args", 0xc3, version=5),
+]
+
+OPS_BY_NAME: Dict[str, OpSpec] = {op.name: op for op in OPS}
+OPS_BY_CODE: Dict[int, OpSpec] = {op.opcode: op for op in OPS}
+
+TXN_FIELDS = [
+    "Sender", "Fee", "FirstValid", "FirstValidTime", "LastValid", "Note", "Lease",
+    "Receiver", "Amount", "CloseRemainderTo", "VotePK", "SelectionPK", "VoteFirst",
+    "VoteLast", "VoteKeyDilution", "Type", "TypeEnum", "XferAsset", "AssetAmount",
+    "AssetSender", "AssetReceiver", "AssetCloseTo", "GroupIndex", "TxID",
+    "ApplicationID", "OnCompletion", "ApplicationArgs", "NumAppArgs", "Accounts",
+    "NumAccounts", "ApprovalProgram", "ClearStateProgram", "RekeyTo", "ConfigAsset",
+    "ConfigAssetTotal", "ConfigAssetDecimals", "ConfigAssetDefaultFrozen",
+    "ConfigAssetUnitName", "ConfigAssetName", "ConfigAssetURL",
+    "ConfigAssetMetadataHash", "ConfigAssetManager", "ConfigAssetReserve",
+    "ConfigAssetFreeze", "ConfigAssetClawback", "FreezeAsset", "FreezeAssetAccount",
+    "FreezeAssetFrozen", "Assets", "NumAssets", "Applications", "NumApplications",
+    "GlobalNumUint", "GlobalNumByteSlice", "LocalNumUint", "LocalNumByteSlice",
+    "ExtraProgramPages", "Nonparticipation", "Logs", "NumLogs", "CreatedAssetID",
+    "CreatedApplicationID",
+]
+
+TXN_ARRAY_FIELDS = {"ApplicationArgs", "Accounts", "Assets", "Applications", "Logs"}
+
+GLOBAL_FIELDS = [
+    "MinTxnFee", "MinBalance", "MaxTxnLife", "ZeroAddress", "GroupSize",
+    "LogicSigVersion", "Round", "LatestTimestamp", "CurrentApplicationID",
+    "CreatorAddress", "CurrentApplicationAddress", "GroupID",
+]
+
+ASSET_HOLDING_FIELDS = ["AssetBalance", "AssetFrozen"]
+
+ASSET_PARAMS_FIELDS = [
+    "AssetTotal", "AssetDecimals", "AssetDefaultFrozen", "AssetUnitName", "AssetName",
+    "AssetURL", "AssetMetadataHash", "AssetManager", "AssetReserve", "AssetFreeze",
+    "AssetClawback", "AssetCreator",
+]
+
+APP_PARAMS_FIELDS = [
+    "AppApprovalProgram", "AppClearStateProgram", "AppGlobalNumUint",
+    "AppGlobalNumByteSlice", "AppLocalNumUint", "AppLocalNumByteSlice",
+    "AppExtraProgramPages", "AppCreator", "AppAddress",
+]
+
+FIELD_NAMES = {
+    "txn": TXN_FIELDS,
+    "global": GLOBAL_FIELDS,
+    "ahold": ASSET_HOLDING_FIELDS,
+    "aparam": ASSET_PARAMS_FIELDS,
+    "appparam": APP_PARAMS_FIELDS,
+}
+
+# Named integer constants accepted by the int pseudo-op
+NAMED_INTS = {
+    # TxnType values
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+    # OnComplete values
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+
+TXN_TYPE_ENUM = {
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+}
+
+# Stack type of each TXN_FIELDS entry, U for uint64 and B for bytes
+TXN_FIELD_TYPES = "BUUUUBBBUBBBUUUBUUUBBBUBUUBUBUBBBUUUUBBBBBBBBUBUUUUUUUUUUUBUUU"
+
+# Fields holding an address, these are 32 zero bytes when unset
+ADDRESS_FIELDS = {
+    "Sender", "Receiver", "CloseRemainderTo", "AssetSender", "AssetReceiver",
+    "AssetCloseTo", "RekeyTo", "ConfigAssetManager", "ConfigAssetReserve",
+    "ConfigAssetFreeze", "ConfigAssetClawback", "FreezeAssetAccount",
+}
+
+# Fixed length byte fields, these are zero bytes when unset
+FIXED_BYTES_FIELDS = {"Lease": 32, "VotePK": 32, "SelectionPK": 32, "ConfigAssetMetadataHash": 32, "TxID": 32}
+
+# Costs that depend on the program's mode
+LOGIC_SIG_BUDGET = 20000
+APP_BUDGET = 700
@@ -0,0 +1,135 @@
+"""
+Program templates. A TEAL program containing TMPL_ variables is assembled once and
+concrete programs are derived by patching the bytecode of each variable's constant
+"""
+
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple, Union
+
+from algosdk import encoding
+from backend.teal.assembler import TealAssembler, AssembledProgram, TemplateSlot, _varuint, _lengthPrefixed
+
+class ProgramTemplate:
+    """
+    Derives programs from TEAL source containing TMPL_ variables. Each variable
+    occurrence is assembled as a pushint/pushbytes so instantiating only splices the
+    new constants in and shifts the branch offsets that cross them. The output is
+    identical to assembling the substituted source
+    """
+
+    cacheSize = 4096
+
+    def __init__(self, source: str):
+        self.source = source
+        self.program: AssembledProgram = TealAssembler.assemble(source)
+        self.variables = sorted({slot.name for slot in self.program.templateSlots})
+        self._slots: List[TemplateSlot] = sorted(self.program.templateSlots, key=lambda s: s.offset)
+
+        # Constants already in the program. A variable taking one of these values
+        # changes the constant block layout, so it can't be patched in place
+        self._constants = set(self.program.intConstants) | set(self.program.byteConstants)
+
+        self._cache: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def instantiate(self, **values: Union[int, str, bytes]) -> bytes:
+        """
+        Return the bytecode for the template with values substituted. Ints are given
+        as int, addresses as str and byte strings as bytes
+        """
+        missing = set(self.variables) - set(values)
+        if missing:
+            raise ValueError(f"Missing values for template variables: {sorted(missing)}")
+
+        key = tuple(sorted(values.items()))
+        with self._lock:
+            bytecode = self._cache.get(key)
+            if bytecode is not None:
+                self._cache.move_to_end(key)
+                return bytecode
+
+        encoded = {name: _encodeValue(name, values[name]) for name in self.variables}
+        if self._canPatch(encoded):
+            bytecode = self._patch(encoded)
+        else:
+            bytecode = TealAssembler.assemble(self.substitute(**values)).bytecode
+
+        with self._lock:
+            self._cache[key] = bytecode
+            if len(self._cache) > ProgramTemplate.cacheSize:
+                self._cache.popitem(last=False)
+
+        return bytecode
+
+    def substitute(self, **values: Union[int, str, bytes]) -> str:
+        """
+        Return the template source with values substituted
+        """
+        def replace(match):
+            value = values[match.group(0)]
+            if isinstance(value, bytes):
+                return "0x" + value.hex()
+            return str(value)
+
+        return re.sub(r"\bTMPL_\w+", replace, self.source)
+
+    def _canPatch(self, encoded: Dict[str, Tuple[str, Union[int, bytes]]]) -> bool:
+        # Every variable must be used once and take a value not found elsewhere in
+        # the program, so a full assembly would also push it
+        occurrences = Counter(slot.name for slot in self._slots)
+        if any(count > 1 for count in occurrences.values()):
+            return False
+
+        values = [value for _, value in encoded.values()]
+        if len(set(values)) != len(values):
+            return False
+
+        return not any(value in self._constants for value in values)
+
+    def _patch(self, encoded: Dict[str, Tuple[str, Union[int, bytes]]]) -> bytes:
+        template = self.program.bytecode
+        out = bytearray()
+        shifts: List[Tuple[int, int]] = []     # (template offset, cumulative shift after it)
+        shift = 0
+        prev = 0
+        for slot in self._slots:
+            kind, value = encoded[slot.name]
+            if kind != slot.kind:
+                raise ValueError(f"Template variable {slot.name} expects {slot.kind}")
+
+            immediate = _varuint(value) if kind == "int" else _lengthPrefixed(value)
+            out += template[prev:slot.offset]
+            out += immediate
+            prev = slot.offset + slot.length
+            shift += len(immediate) - slot.length
+            shifts.append((slot.offset, shift))
+        out += template[prev:]
+
+        if shift != 0:
+            def moved(pc: int) -> int:
+                delta = 0
+                for offset, total in shifts:
+                    if offset >= pc:
+                        break
+                    delta = total
+                return pc + delta
+
+            for pc, target in self.program.branches:
+                newPc = moved(pc)
+                offset = moved(target) - (newPc + 3)
+                out[newPc + 1:newPc + 3] = offset.to_bytes(2, "big", signed=True)
+
+        return bytes(out)
+
+def _encodeValue(name: str, value: Union[int, str, bytes]) -> Tuple[str, Union[int, bytes]]:
+    if isinstance(value, bool) or not isinstance(value, (int, str, bytes)):
+        raise ValueError(f"Unsupported value for template variable {name}: {value!r}")
+    if isinstance(value, int):
+        if not 0 <= value < 2 ** 64:
+            raise ValueError(f"Template variable {name} out of range: {value}")
+        return "int", value
+    if isinstance(value, str):
+        return "bytes", encoding.decode_address(value)
+    return "bytes", value
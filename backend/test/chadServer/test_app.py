@@ -0,0 +1,62 @@
+import json
+import time
+from backend.chadServer import app as server
+from backend.services.priceAPI.priceAPIInterface import PriceAPIInterface, PriceReturn
+from backend.services.priceAPI.priceService import PriceService
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+
+
+class FixedSource(PriceAPIInterface):
+    def requestAlgoPrice(self) -> PriceReturn:
+        return PriceReturn(0.4, True)
+
+class TestServer:
+    """
+    Endpoint tests through the Flask test client, with the exchange on an in-memory
+    algod and the price service on a fixed upstream
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+        cls.priceService = PriceService._instance
+        PriceService._instance = PriceService(FixedSource())
+
+    @classmethod
+    def teardown_class(cls):
+        PriceService._instance = cls.priceService
+
+    def test_candlesShowSwapVolume(self):
+        """
+        A swap confirmed through the followed exchange shows up as /candles volume
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer)
+        server.followExchange(exchange)
+
+        future = exchange.pendingTransactions.submit("swapAlgoForChad", 1, 3, self.buyer)
+        for _ in range(40):
+            volume = server.app.test_client().get("/candles?interval=1m").get_json()["volume"]
+            if future.done() and sum(volume) > 0:
+                break
+            client.mine()
+            time.sleep(0.02)
+
+        assert future.result(timeout=5) in client.confirmed
+        assert volume == [1000000]
+
+    def test_buyChadUsesSmoothedPrice(self, monkeypatch):
+        """
+        Buy chad transactions are priced from the smoothed price, not the last sample
+        """
+        requested = []
+
+        def smoothed(service, window=300.0):
+            requested.append(window)
+            return PriceReturn(0.4, True)
+
+        monkeypatch.setattr(PriceService, "requestSmoothedPrice", smoothed)
+
+        body = json.dumps({"addr": self.buyer.pubKey, "algoAmount": 1000000})
+        assert server.app.test_client().post("/createBuyChadTx", data=body).status_code == 200
+        assert requested == [300.0]
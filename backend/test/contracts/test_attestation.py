@@ -0,0 +1,89 @@
+import pytest
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.priceAttestation import PriceAttestor, PriceAttestation
+from backend.test.fakeAlgod import makeKeyPair
+from algosdk.future import transaction as algo_txn
+
+
+class TestPriceAttestation:
+    """
+    Unit tests for attested swaps, evaluated offline against the escrow logic
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+        cls.chadID = 42
+        cls.exchange = ChadExchangeService(None, cls.admin, minChadTxThresh=20000000, chadID=cls.chadID, attested=True)
+        cls.escrow = cls.exchange.escrowAddress
+        cls.rate = ChadExchangeApp.rateFor(3)
+
+    def swapGroup(self, chadAmount, attestation, lastValid=1020):
+        params = algo_txn.SuggestedParams(fee=1000, first=1000, last=lastValid, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+        txns = [
+            algo_txn.PaymentTxn(self.buyer.pubKey, params, self.escrow, 10000000),
+            algo_txn.AssetTransferTxn(self.escrow, params, self.buyer.pubKey, chadAmount, self.chadID),
+        ]
+        gid = algo_txn.calculate_group_id(txns)
+        for txn in txns:
+            txn.group = gid
+
+        return [
+            txns[0].sign(self.buyer.privKey),
+            algo_txn.LogicSigTransaction(txns[1], attestation.logicSig(self.exchange.escrowLogicSig)),
+        ]
+
+    def test_validSwap(self):
+        """
+        Payout at the attested rate passes
+        """
+        attestation = PriceAttestor(self.admin, self.escrow).attest(self.rate, 1000)
+        self.exchange.validateGroup(self.swapGroup(30000000, attestation))
+
+    def test_payoutAboveRate(self):
+        """
+        Payout above the attested rate fails
+        """
+        attestation = PriceAttestor(self.admin, self.escrow).attest(self.rate, 1000)
+        with pytest.raises(ValueError):
+            self.exchange.validateGroup(self.swapGroup(30000001, attestation))
+
+    def test_expired(self):
+        """
+        Transactions that outlive the attestation fail
+        """
+        attestation = PriceAttestor(self.admin, self.escrow).attest(self.rate, 1000)
+        with pytest.raises(ValueError):
+            self.exchange.validateGroup(self.swapGroup(30000000, attestation, lastValid=attestation.expiryRound + 1))
+
+    @pytest.mark.parametrize("tamper", ["rate", "signer", "exchange"])
+    def test_forged(self, tamper):
+        """
+        Attestations with an altered rate, from another key or for another escrow fail
+        """
+        if tamper == "signer":
+            attestation = PriceAttestor(makeKeyPair(), self.escrow).attest(self.rate, 1000)
+        elif tamper == "exchange":
+            attestation = PriceAttestor(self.admin, makeKeyPair().pubKey).attest(self.rate, 1000)
+        else:
+            signed = PriceAttestor(self.admin, self.escrow).attest(self.rate, 1000)
+            attestation = PriceAttestation(self.rate * 2, signed.expiryRound, self.escrow, signed.signature)
+
+        with pytest.raises(ValueError):
+            self.exchange.validateGroup(self.swapGroup(30000000, attestation))
+
+    def test_signedOncePerTick(self):
+        """
+        Attestations are reused until the rate changes or they near expiry
+        """
+        attestor = PriceAttestor(self.admin, self.escrow)
+        for currentRound in range(1000, 1010):
+            attestor.attest(self.rate, currentRound)
+        assert attestor.signatures == 1
+
+        attestor.attest(self.rate + 1, 1010)
+        assert attestor.signatures == 2
+
+        attestor.attest(self.rate + 1, 1010 + PriceAttestor.validRounds)
+        assert attestor.signatures == 3
@@ -0,0 +1,132 @@
+import pytest
+import threading
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.suggestedParams import SuggestedParamsProvider
+from backend.test.fakeAlgod import FakeAlgod, makeKeyPair
+from backend.teal.assembler import TealAssembler
+from backend.teal.evaluator import TealEvaluator
+from pyteal import compileTeal, Mode
+from algosdk import account, encoding
+
+
+class TestChadExchangeApp:
+    """
+    Unit tests for the exchange app, evaluated offline against its global state
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.chadID = 42
+        cls.admin = encoding.decode_address(account.generate_account()[1])
+        cls.buyer = encoding.decode_address(account.generate_account()[1])
+        program = compileTeal(ChadExchangeApp(cls.chadID).approvalProgram(), Mode.Application, version=5)
+        cls.evaluator = TealEvaluator(TealAssembler.assemble(program), mode="application")
+        cls.rate = ChadExchangeApp.rateFor(3)
+
+    def state(self):
+        return {b"admin": self.admin, b"chadID": self.chadID, b"rate": self.rate, b"rateRound": 0}
+
+    def appCall(self, sender, *args):
+        return {
+            "Sender": sender, "TypeEnum": 6, "ApplicationID": 1, "OnCompletion": 0,
+            "ApplicationArgs": list(args), "NumAppArgs": len(args), "GroupIndex": 2,
+        }
+
+    def swapAlgoForChad(self, algoAmount, chadAmount, chadID=None):
+        return [
+            {"TypeEnum": 1, "Sender": self.buyer, "Amount": algoAmount},
+            {"TypeEnum": 4, "AssetReceiver": self.buyer, "AssetAmount": chadAmount, "XferAsset": chadID or self.chadID},
+            self.appCall(self.buyer, b"swapAlgoForChad"),
+        ]
+
+    def swapChadForAlgo(self, chadAmount, algoAmount):
+        return [
+            {"TypeEnum": 4, "Sender": self.buyer, "AssetAmount": chadAmount, "XferAsset": self.chadID},
+            {"TypeEnum": 1, "Receiver": self.buyer, "Amount": algoAmount},
+            self.appCall(self.buyer, b"swapChadForAlgo"),
+        ]
+
+    @pytest.mark.parametrize("chadAmount, passed", [(30000000, True), (29999999, True), (30000001, False)])
+    def test_swapAlgoForChad(self, chadAmount, passed):
+        """
+        Chads paid out are capped by the stored rate
+        """
+        group = self.swapAlgoForChad(10000000, chadAmount)
+        assert self.evaluator.evaluate(group, 2, appGlobals=self.state()).passed == passed
+
+    @pytest.mark.parametrize("algoAmount, passed", [(10000000, True), (10000001, False)])
+    def test_swapChadForAlgo(self, algoAmount, passed):
+        """
+        Algo paid out is capped by the stored rate
+        """
+        group = self.swapChadForAlgo(30000000, algoAmount)
+        assert self.evaluator.evaluate(group, 2, appGlobals=self.state()).passed == passed
+
+    def test_roundingMatchesApp(self):
+        """
+        Service side amount helpers round the same way as the app
+        """
+        rate = ChadExchangeApp.rateFor(2.718281)
+        state = self.state()
+        state[b"rate"] = rate
+        for amount in [1, 999, 10 ** 6 + 7, 123456789]:
+            group = self.swapAlgoForChad(amount, ChadExchangeApp.chadsFor(amount, rate))
+            assert self.evaluator.evaluate(group, 2, appGlobals=state).passed
+            group = self.swapChadForAlgo(amount, ChadExchangeApp.algosFor(amount, rate))
+            assert self.evaluator.evaluate(group, 2, appGlobals=state).passed
+
+    @pytest.mark.parametrize("round, passed", [(0, True), (ChadExchangeApp.maxRateAge, True), (ChadExchangeApp.maxRateAge + 1, False)])
+    def test_staleRate(self, round, passed):
+        """
+        Swaps are refused once the stored rate is older than maxRateAge rounds
+        """
+        for group in [self.swapAlgoForChad(10000000, 30000000), self.swapChadForAlgo(30000000, 10000000)]:
+            result = self.evaluator.evaluate(group, 2, globals={"Round": round}, appGlobals=self.state())
+            assert result.passed == passed
+
+    def test_republishesAgingRate(self):
+        """
+        An unchanged rate is only published again once half of maxRateAge has passed
+        """
+        client = FakeAlgod()
+        exchange = ChadExchangeService(client, makeKeyPair(), 1000000, self.chadID, appID=1)
+        stop = threading.Event()
+
+        def mineSent():
+            while not stop.wait(0.01):
+                if client.pool:
+                    client.mine()
+
+        miner = threading.Thread(target=mineSent, daemon=True)
+        miner.start()
+        try:
+            assert exchange.publishRate(3) is not None
+            assert exchange.publishRate(3) is None
+
+            for _ in range(ChadExchangeApp.maxRateAge // 2):
+                client.mine()
+            SuggestedParamsProvider.forClient(client).notifyRound(client.lastRound)
+            assert exchange.publishRate(3) is not None
+            assert exchange.publishRate(3) is None
+            assert exchange.publishRate(4) is not None
+        finally:
+            stop.set()
+            miner.join()
+
+    def test_wrongAsset(self):
+        """
+        Swaps of another asset are rejected
+        """
+        group = self.swapAlgoForChad(10000000, 1, chadID=self.chadID + 1)
+        assert not self.evaluator.evaluate(group, 2, appGlobals=self.state()).passed
+
+    def test_setRate(self):
+        """
+        Only the admin can set the rate
+        """
+        newRate = (5 * ChadExchangeApp.RATE_SCALE).to_bytes(8, "big")
+        state = self.state()
+        assert not self.evaluator.evaluate([self.appCall(self.buyer, b"setRate", newRate)], 0, appGlobals=state).passed
+
+        assert self.evaluator.evaluate([self.appCall(self.admin, b"setRate", newRate)], 0, appGlobals=state).passed
+        assert state[b"rate"] == 5 * ChadExchangeApp.RATE_SCALE
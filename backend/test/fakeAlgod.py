@@ -0,0 +1,131 @@
+import base64
+import threading
+import msgpack
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from backend.teal.assembler import TealAssembler
+
+
+def makeKeyPair() -> KeyPair:
+    privKey, pubKey = account.generate_account()
+    return KeyPair(privKey=privKey, pubKey=pubKey)
+
+def fundedExchange(client: "FakeAlgod", admin: KeyPair, buyer: KeyPair = None, chadID: int = 42,
+                   algoAmount: int = 10000000, chadAmount: int = 100000000, **kwargs) -> ChadExchangeService:
+    """
+    Exchange on client with its escrow funded and opted into CHAD, along with buyer
+    if given. kwargs are passed on to ChadExchangeService
+    """
+    exchange = ChadExchangeService(client, admin, minChadTxThresh=1000000, chadID=chadID, **kwargs)
+    client.fundAccount(exchange.escrowAddress, algoAmount, {chadID: chadAmount})
+    if buyer is not None:
+        client.fundAccount(buyer.pubKey, 100000000, {chadID: 100000000})
+
+    return exchange
+
+class FakeAlgod:
+    """
+    In-memory stand-in for the algod endpoints used by the chain followers. Sent
+    transactions wait in a pool until mine() puts them in the next block
+    """
+
+    genesisHash = base64.b64decode("SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=")
+    genesisID = "sandnet-v1"
+
+    def __init__(self, firstRound: int = 1):
+        self.blocks = {firstRound: self.encodeBlock(firstRound, [])}
+        self.lastRound = firstRound
+        self.confirmed = {}
+        self.poolErrors = {}
+        self.pool = []
+        self.accounts = {}
+        self.dropped = 0        # Upcoming sends accepted but never put in a block
+        self.down = False       # Chain endpoints fail as if algod were unreachable
+        self.blockRequests = 0
+        self._cond = threading.Condition()
+
+    def encodeBlock(self, round: int, signedTxns: list) -> bytes:
+        txns = []
+        for stxn in signedTxns:
+            entry = stxn.dictify()
+            entry["txn"] = {k: v for k, v in entry["txn"].items() if k not in ("gh", "gen")}
+            entry["hgi"] = True
+            txns.append(entry)
+
+        block = {"rnd": round, "ts": round, "gh": self.genesisHash, "gen": self.genesisID, "txns": txns}
+        return msgpack.packb({"block": block}, use_bin_type=True)
+
+    def params(self) -> algo_txn.SuggestedParams:
+        return algo_txn.SuggestedParams(
+            fee=1000, first=self.lastRound, last=self.lastRound + 1000,
+            gh=base64.b64encode(self.genesisHash).decode(), gen=self.genesisID, flat_fee=True
+        )
+
+    def mine(self) -> int:
+        """
+        Commit the pool as the next block and return its round
+        """
+        with self._cond:
+            self.lastRound += 1
+            self.blocks[self.lastRound] = self.encodeBlock(self.lastRound, self.pool)
+            for stxn in self.pool:
+                self.confirmed[stxn.get_txid()] = self.lastRound
+            self.pool = []
+            self._cond.notify_all()
+            return self.lastRound
+
+    def fundAccount(self, address: str, amount: int, assets: dict = None, minBalance: int = 100000):
+        self.accounts[address] = {
+            "address": address,
+            "amount": amount,
+            "min-balance": minBalance,
+            "assets": [{"asset-id": assetID, "amount": held} for assetID, held in (assets or {}).items()],
+        }
+
+    def account_info(self, address: str) -> dict:
+        return self.accounts.get(address, {"address": address, "amount": 0, "min-balance": 0, "assets": []})
+
+    def send_transaction(self, stxn) -> str:
+        return self.send_transactions([stxn])
+
+    def send_transactions(self, stxns) -> str:
+        with self._cond:
+            if self.dropped > 0:
+                self.dropped -= 1
+            else:
+                self.pool.extend(stxns)
+        return stxns[0].get_txid()
+
+    def compile(self, source: str) -> dict:
+        # Stands in for algod /compile, whose output the assembler tests check it against
+        program = TealAssembler.assemble(source)
+        return {"hash": program.address, "result": base64.b64encode(program.bytecode).decode()}
+
+    def suggested_params(self):
+        return self.params()
+
+    def status(self) -> dict:
+        self._checkUp()
+        return {"last-round": self.lastRound}
+
+    def status_after_block(self, round: int) -> dict:
+        self._checkUp()
+        with self._cond:
+            self._cond.wait_for(lambda: self.lastRound > round, timeout=1)
+            return {"last-round": self.lastRound}
+
+    def block_info(self, round: int, response_format: str = "json"):
+        self._checkUp()
+        self.blockRequests += 1
+        return self.blocks[round]
+
+    def _checkUp(self):
+        if self.down:
+            raise ConnectionError("algod unreachable")
+
+    def pending_transaction_info(self, txid: str) -> dict:
+        if txid in self.poolErrors:
+            return {"pool-error": self.poolErrors[txid]}
+        return {"confirmed-round": self.confirmed.get(txid, 0)}
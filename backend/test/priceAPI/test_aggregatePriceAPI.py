@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backend.services.priceAPI.aggregatePriceAPI import AggregatePriceAPI, JSONPriceSource
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up on slow responses
+        pass
+
+class StubPriceServer:
+    """
+    Local price endpoint. delays[n] is how long the nth request takes to answer,
+    the last entry applying to every later request
+    """
+
+    def __init__(self, price: float, delays=(0.0,), status: int = 200):
+        self.price = price
+        self.delays = list(delays)
+        self.status = status
+        self.requests = 0
+
+        stub = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                delay = stub.delays[min(stub.requests, len(stub.delays) - 1)]
+                stub.requests += 1
+                time.sleep(delay)
+
+                body = json.dumps({"algorand": {"nzd": stub.price}}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = _QuietServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/price"
+
+    def source(self, name: str, timeout: float = 2.0, hedge: bool = False) -> JSONPriceSource:
+        return JSONPriceSource(name, self.url, ["algorand", "nzd"], timeout, hedge)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class TestAggregatePriceAPI:
+    """
+    Unit tests for the hedged multi-source price, against local stub servers
+    """
+
+    def test_medianWithinBudget(self):
+        """
+        Sources that fail or answer after the latency budget are left out of the
+        median, and the caller never waits past the budget
+        """
+        stubs = [StubPriceServer(0.30), StubPriceServer(0.34), StubPriceServer(0.31),
+                 StubPriceServer(0.99, status=500), StubPriceServer(5.0, delays=(2.0,))]
+        aggregate = AggregatePriceAPI([stub.source(f"s{i}") for i, stub in enumerate(stubs)], latencyBudget=0.5)
+
+        start = time.monotonic()
+        result = aggregate.requestAlgoPrice()
+        assert time.monotonic() - start < 0.9
+
+        assert result.success and result.price == 0.31
+        stats = aggregate.sourceStats()
+        assert stats["s3"]["errors"] == 1 and stats["s3"]["errorRate"] == 1.0
+        assert stats["s0"]["p50"] is not None and stats["s4"]["p50"] is None
+
+        aggregate.close()
+        for stub in stubs:
+            stub.close()
+
+    def test_hedgedRequest(self):
+        """
+        A hedged source whose first response stalls is asked again and still gets its
+        vote, a source that is not hedged is asked once
+        """
+        slow = StubPriceServer(0.40, delays=(3.0, 0.0))
+        aggregate = AggregatePriceAPI([slow.source("slow", hedge=True)], latencyBudget=1.0)
+
+        result = aggregate.requestAlgoPrice()
+        assert result.success and result.price == 0.40
+        assert slow.requests == 2
+        assert aggregate.sourceStats()["slow"]["hedges"] == 1
+        aggregate.close()
+
+        slow.requests = 0
+        aggregate = AggregatePriceAPI([slow.source("slow")], latencyBudget=1.0)
+        assert not aggregate.requestAlgoPrice().success
+        assert slow.requests == 1
+        assert aggregate.sourceStats()["slow"]["hedges"] == 0
+
+        aggregate.close()
+        slow.close()
+
+    def test_tooFewSources(self):
+        """
+        Without enough answers the last good price is returned as unsuccessful
+        """
+        good, bad = StubPriceServer(0.25), StubPriceServer(0.25, status=503)
+        aggregate = AggregatePriceAPI([good.source("good"), bad.source("bad")], latencyBudget=0.5, minSources=2)
+
+        result = aggregate.requestAlgoPrice()
+        assert not result.success and result.price == 0
+
+        aggregate.minSources = 1
+        assert aggregate.requestAlgoPrice().price == 0.25
+
+        aggregate.close()
+        good.close()
+        bad.close()
+
+    def test_fromConfig(self, tmp_path):
+        """
+        Sources, their options and the aggregate settings are read from a config file
+        """
+        stub = StubPriceServer(0.28)
+        path = tmp_path / "sources.json"
+        path.write_text(json.dumps({
+            "latencyBudget": 0.8,
+            "sources": [
+                {"name": "local", "url": stub.url, "path": ["algorand", "nzd"], "timeout": 0.5, "hedge": True},
+                {"name": "other", "url": stub.url, "path": ["algorand", "nzd"]},
+            ],
+        }))
+
+        aggregate = AggregatePriceAPI.fromConfig(str(path))
+        assert aggregate.latencyBudget == 0.8 and aggregate.minSources == AggregatePriceAPI.minSources
+        assert [(s.name, s.timeout, s.hedge) for s in aggregate.sources] == [("local", 0.5, True), ("other", 2.0, False)]
+        assert aggregate.requestAlgoPrice().price == 0.28
+
+        aggregate.close()
+        stub.close()
+
+        default = AggregatePriceAPI.fromConfig()
+        assert [source.name for source in default.sources] == ["coingecko"]
+        default.close()
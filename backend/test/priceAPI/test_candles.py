@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from backend.services.blockFollower import BlockEvent, BlockTransaction
+from backend.services.priceAPI.candles import Candles
+
+
+class FakeExchange:
+    def subscribe(self, callback):
+        self.callback = callback
+
+class TestCandles:
+    """
+    Unit tests for incrementally aggregated price candles
+    """
+
+    def test_matchesAggregation(self):
+        """
+        Candles built sample by sample equal an aggregation of all samples at once
+        """
+        rng = np.random.default_rng(5)
+        times = 1700000000 + np.cumsum(rng.uniform(0, 40, 3000))
+        prices = 0.3 + np.cumsum(rng.normal(0, 0.001, 3000))
+        candles = Candles()
+        for timestamp, price in zip(times, prices):
+            candles.addPrice(price, timestamp)
+
+        for name, seconds in Candles.intervals.items():
+            result = candles.query(name)
+            buckets = (times // seconds * seconds).astype(np.int64)
+            starts = np.unique(buckets)
+            assert result["start"] == starts.tolist()
+
+            for i in rng.integers(0, len(starts), 10):
+                inBucket = prices[buckets == starts[i]]
+                assert result["open"][i] == inBucket[0]
+                assert result["high"][i] == inBucket.max()
+                assert result["low"][i] == inBucket.min()
+                assert result["close"][i] == inBucket[-1]
+
+    def test_rangeQueriesAndVolume(self):
+        """
+        Ranges select candles by start time, swaps add volume to the candle they fall
+        in, late ones included, and full series drop their oldest half
+        """
+        candles = Candles(capacity=8)
+        for minute in range(6):
+            candles.addPrice(1.0 + minute, 60 * minute + 30)
+
+        candles.addSwap(5000000, 130)
+        candles.addSwap(1000000, 150)
+        candles.addSwap(7000000, 400)       # Opens a candle from the last close
+
+        result = candles.query("1m", start=100, end=300)
+        assert result["start"] == [60, 120, 180, 240]
+        assert result["volume"] == [0, 6000000, 0, 0]
+        assert result["trades"] == [0, 2, 0, 0]
+        assert candles.query("1m", limit=2)["start"] == [300, 360]
+        assert candles.query("1m", limit=2)["open"] == [6.0, 6.0]
+
+        for minute in range(7, 10):
+            candles.addPrice(1.0, 60 * minute)
+        assert candles.query("1m")["start"] == [240, 300, 360, 420, 480, 540]
+
+        with pytest.raises(ValueError):
+            candles.query("2m")
+
+    def test_followsSwaps(self):
+        """
+        Grouped payments through the escrow count as volume, approvals and ungrouped
+        deposits do not
+        """
+        candles = Candles()
+        exchange = FakeExchange()
+        candles.follow(exchange)
+
+        exchange.callback(BlockEvent(10, 1700000010, [
+            BlockTransaction("a", 10, {"type": "pay", "amt": 2000000, "grp": b"g"}),
+            BlockTransaction("b", 10, {"type": "axfer", "aamt": 6000000, "grp": b"g"}),
+            BlockTransaction("c", 10, {"type": "pay", "grp": b"g"}),
+            BlockTransaction("d", 10, {"type": "pay", "amt": 9000000}),
+        ]))
+
+        result = candles.query("1d")
+        assert result["volume"] == [2000000] and result["trades"] == [1]
+        assert result["open"] == [None]
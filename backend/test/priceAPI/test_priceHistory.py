@@ -0,0 +1,108 @@
+import math
+import numpy as np
+import pytest
+from backend.chadServer.models import PriceReturn
+from backend.services.priceAPI.priceHistory import PriceHistory
+from backend.services.priceAPI.priceService import PriceService
+
+
+def bruteForce(times: np.ndarray, prices: np.ndarray, window: float):
+    """
+    TWAP and volatility over window, rescanning the samples
+    """
+    now = times[-1]
+    tail = max(np.searchsorted(times, now - window, side="right") - 1, 0)
+    times, prices = times[tail:], prices[tail:]
+
+    # Clip the tail sample's step to the window start
+    stepped = np.maximum(times, now - window)
+    twap = prices[-1] if now == stepped[0] else np.sum(prices[:-1] * np.diff(stepped)) / (now - stepped[0])
+    returns = np.diff(np.log(prices))
+    volatility = returns.std() if len(returns) >= 2 else 0.0
+    return twap, volatility
+
+class StubSource:
+    def __init__(self, prices):
+        self.prices = list(prices)
+
+    def requestAlgoPrice(self) -> PriceReturn:
+        return PriceReturn(self.prices.pop(0), True)
+
+class TestPriceHistory:
+    """
+    Unit tests for the price ring buffer
+    """
+
+    def test_matchesRescan(self):
+        """
+        Incremental TWAP and volatility match a rescan of the samples, including once
+        the buffer has wrapped
+        """
+        rng = np.random.default_rng(3)
+        times = np.cumsum(rng.uniform(1, 20, 700))
+        prices = 0.5 * np.exp(np.cumsum(rng.normal(0, 0.01, 700)))
+        history = PriceHistory(capacity=256, windows=(60, 600, 10 ** 6))
+
+        for i, (timestamp, price) in enumerate(zip(times, prices)):
+            history.add(price, timestamp)
+            if i % 50 == 0 or i == len(times) - 1:
+                kept = slice(max(i + 1 - 256, 0), i + 1)
+                for window in history.windows:
+                    twap, volatility = bruteForce(times[kept], prices[kept], window)
+                    assert history.twap(window) == pytest.approx(twap, rel=1e-9)
+                    assert history.volatility(window) == pytest.approx(volatility, rel=1e-6, abs=1e-12)
+
+        assert len(history) == 256
+        assert history.samples()[1].tolist() == prices[-256:].tolist()
+        assert history.latest == (times[-1], prices[-1])
+
+    def test_twapClippedToWindow(self):
+        """
+        A sample from before the window only counts from the window start, however
+        long ago it arrived
+        """
+        history = PriceHistory(windows=(300,))
+        history.add(1.0, 0)
+        history.add(2.0, 3600)
+        for timestamp in range(3610, 3900, 10):
+            history.add(2.0, timestamp)
+        assert history.twap(300) == pytest.approx((1.0 * 10 + 2.0 * 290) / 300)
+
+        history.add(2.0, 3900)
+        assert history.twap(300) == pytest.approx(2.0)
+
+        history = PriceHistory(windows=(300,))
+        history.add(1.0, 0)
+        history.add(3.0, 3700)
+        history.add(3.0, 3800)
+        assert history.twap(300) == pytest.approx((1.0 * 200 + 3.0 * 100) / 300)
+
+    def test_ema(self):
+        """
+        The EMA moves towards a new price by the fraction of its time constant elapsed
+        """
+        history = PriceHistory(windows=(60,))
+        history.add(1.0, 0)
+        history.add(2.0, 60)
+        assert history.ema(60) == pytest.approx(2.0 - math.exp(-1))
+
+        with pytest.raises(ValueError):
+            history.ema(61)
+        with pytest.raises(ValueError):
+            history.add(1.0, 59)
+
+    def test_snapshotWarmStart(self, tmp_path):
+        """
+        A service restarted from the snapshot of an earlier one keeps its history
+        """
+        path = str(tmp_path / "history.npz")
+        service = PriceService(StubSource([0.4, 0.5]), history=PriceHistory(windows=(300,)), historyPath=path)
+        service.refresh()
+        service.refresh()
+        assert service.requestSmoothedPrice(300).success
+
+        restored = PriceHistory.load(path, windows=(300,))
+        assert restored.samples()[1].tolist() == [0.4, 0.5]
+        assert restored.twap(300) == pytest.approx(service.history.twap(300))
+
+        assert len(PriceHistory.load(str(tmp_path / "missing.npz"))) == 0
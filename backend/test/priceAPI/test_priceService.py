@@ -0,0 +1,110 @@
+import threading
+import time
+from backend.services.priceAPI.priceAPIInterface import PriceAPIInterface, PriceReturn
+from backend.services.priceAPI.priceService import PriceService
+
+
+class StubSource(PriceAPIInterface):
+    """
+    Upstream returning the queued results in order. Requests wait on release while
+    it is cleared
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.requests = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def requestAlgoPrice(self) -> PriceReturn:
+        self.requests += 1
+        self.release.wait()
+        result = self.results[min(self.requests, len(self.results)) - 1]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+class TestPriceService:
+    """
+    Unit tests for the background refreshed price service, against a stub upstream
+    """
+
+    def test_singleFlight(self):
+        """
+        Concurrent refreshes share one upstream request and its result
+        """
+        source = StubSource(PriceReturn(0.3, True))
+        service = PriceService(source)
+        source.release.clear()
+
+        results = []
+        callers = [threading.Thread(target=lambda: results.append(service.refresh())) for _ in range(5)]
+        for caller in callers:
+            caller.start()
+        time.sleep(0.1)
+        source.release.set()
+        for caller in callers:
+            caller.join()
+
+        assert source.requests == 1 and service.upstreamRequests == 1
+        assert [result.price for result in results] == [0.3] * 5
+
+    def test_servesStaleOnErrors(self):
+        """
+        Failing refreshes keep the last good price, which stays successful until
+        maxStaleness has passed
+        """
+        source = StubSource(PriceReturn(0.3, True), ConnectionError("down"), PriceReturn(0, False))
+        service = PriceService(source, refreshPeriod=60, maxStaleness=0.1)
+
+        assert not service.requestAlgoPrice().success
+        service.refresh()
+        assert service.requestAlgoPrice() == PriceReturn(0.3, True)
+
+        assert not service.refresh().success
+        assert not service.refresh().success
+        assert service.upstreamErrors == 2
+        assert service.requestAlgoPrice() == PriceReturn(0.3, True)
+
+        time.sleep(0.15)
+        assert service.requestAlgoPrice() == PriceReturn(0.3, False)
+
+    def test_refreshesWhenBehind(self):
+        """
+        A request finding the price older than refreshPeriod starts one refresh
+        without waiting for it
+        """
+        source = StubSource(PriceReturn(0.3, True), PriceReturn(0.4, True))
+        service = PriceService(source, refreshPeriod=0.05)
+        service.refresh()
+        time.sleep(0.06)
+
+        source.release.clear()
+        assert service.requestAlgoPrice().price == 0.3
+        time.sleep(0.05)
+        assert service.requestAlgoPrice().price == 0.3
+        source.release.set()
+
+        time.sleep(0.1)
+        assert source.requests == 2
+        assert service.requestAlgoPrice().price == 0.4
+
+    def test_recordFailureKeepsServing(self, tmp_path):
+        """
+        A history that can't be saved or recorded neither blocks later refreshes nor
+        stops the price being served
+        """
+        blocked = tmp_path / "file"
+        blocked.write_text("")
+        source = StubSource(PriceReturn(0.3, True), PriceReturn(0.4, True))
+        service = PriceService(source, historyPath=str(blocked / "history.npz"))
+
+        assert service.refresh() == PriceReturn(0.3, True)
+
+        def broken(price, timestamp=None):
+            raise RuntimeError("disk full")
+        service.history.add = broken
+
+        assert service.refresh() == PriceReturn(0.4, True)
+        assert service._fetch is None
+        assert service.requestAlgoPrice() == PriceReturn(0.4, True)
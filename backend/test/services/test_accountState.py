@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from backend.services.accountState import AccountStateCache
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+from algosdk.future import transaction as algo_txn
+
+
+class TestAccountState:
+    """
+    Unit tests for the account state cache and swap pre-flight checks
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.chadID = 42
+
+    def test_invalidatedByConfirmedTransactions(self):
+        client = FakeAlgod()
+        sender, receiver = makeKeyPair(), makeKeyPair()
+        client.fundAccount(sender.pubKey, 5000000)
+        client.fundAccount(receiver.pubKey, 1000000)
+
+        cache = AccountStateCache(client)
+        assert [state.amount for state in cache.getMany([sender.pubKey, receiver.pubKey])] == [5000000, 1000000]
+        assert cache.get(receiver.pubKey).amount == 1000000
+        assert cache.misses == 2 and cache.hits == 1
+
+        client.fundAccount(receiver.pubKey, 2000000)
+        client.send_transaction(algo_txn.PaymentTxn(sender.pubKey, client.params(), receiver.pubKey, 1000000).sign(sender.privKey))
+        client.mine()
+
+        for _ in range(100):
+            if cache.invalidations:
+                break
+            time.sleep(0.01)
+
+        assert cache.get(receiver.pubKey).amount == 2000000
+
+    def test_invalidatedDuringFetch(self):
+        """
+        Balances fetched before an invalidation landed are not cached
+        """
+        client = FakeAlgod()
+        account = makeKeyPair()
+        client.fundAccount(account.pubKey, 5000000)
+
+        fetching, release = threading.Event(), threading.Event()
+        accountInfo = client.account_info
+
+        def slowAccountInfo(address):
+            info = accountInfo(address)
+            fetching.set()
+            release.wait(5)
+            return info
+
+        client.account_info = slowAccountInfo
+        cache = AccountStateCache(client)
+        thread = threading.Thread(target=cache.get, args=(account.pubKey,))
+        thread.start()
+
+        fetching.wait(5)
+        cache.invalidate(account.pubKey)
+        client.fundAccount(account.pubKey, 7000000)
+        release.set()
+        thread.join()
+
+        assert cache.get(account.pubKey).amount == 7000000
+        assert cache.misses == 2
+
+    def test_doomedSwapsRejectedLocally(self):
+        """
+        Swaps a buyer can not take part in fail before anything is signed or sent
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, chadID=self.chadID)
+
+        notOptedIn, poor = makeKeyPair(), makeKeyPair()
+        client.fundAccount(notOptedIn.pubKey, 10000000)
+        client.fundAccount(poor.pubKey, 600000, {self.chadID: 0}, minBalance=200000)
+
+        with pytest.raises(ValueError, match="opted into CHAD"):
+            exchange.requestSwap("swapAlgoForChad", 1, 3, notOptedIn).result(timeout=5)
+        with pytest.raises(ValueError, match="can not pay"):
+            exchange.requestSwap("swapAlgoForChad", 1, 3, poor).result(timeout=5)
+        with pytest.raises(ValueError, match="holds less"):
+            exchange.requestSwap("swapChadForAlgo", 1, 3, poor).result(timeout=5)
+
+        assert client.pool == []
+        assert exchange.liquidity.reserved[self.chadID] == 0
@@ -0,0 +1,155 @@
+import os
+import tempfile
+import time
+import pytest
+from backend.services.blockFollower import BlockFollower
+from backend.services.confirmationTracker import ConfirmationTracker
+from backend.test.fakeAlgod import FakeAlgod
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+
+
+class TestBlockFollower:
+    """
+    Unit tests for the block follower and the confirmation tracker built on it,
+    run against an in-memory algod
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.senderKey, cls.sender = account.generate_account()
+        _, cls.escrow = account.generate_account()
+        _, cls.other = account.generate_account()
+
+    def payment(self, client: FakeAlgod, receiver: str, amount: int = 1000):
+        return algo_txn.PaymentTxn(self.sender, client.params(), receiver, amount).sign(self.senderKey)
+
+    def test_publishesEscrowTransactions(self):
+        """
+        Subscribers filtered to the escrow only see its transactions, with txids
+        matching the signed transactions
+        """
+        client = FakeAlgod()
+        subscription = BlockFollower(client).subscribe(addresses=[self.escrow])
+
+        first = subscription.get(timeout=5)
+        assert first.round == 1 and first.transactions == []
+
+        toEscrow = self.payment(client, self.escrow)
+        client.send_transactions([toEscrow, self.payment(client, self.other)])
+        client.mine()
+
+        event = subscription.get(timeout=5)
+        subscription.close()
+
+        assert event.round == 2
+        assert [tx.txid for tx in event.transactions] == [toEscrow.get_txid()]
+        assert self.escrow in event.transactions[0].addresses
+
+    def test_catchesUpFromCheckpoint(self):
+        """
+        A restarted follower resumes after the checkpointed round and fetches each
+        block once
+        """
+        client = FakeAlgod()
+        checkpoint = os.path.join(tempfile.mkdtemp(), "follower.json")
+
+        follower = BlockFollower(client, checkpoint)
+        subscription = follower.subscribe()
+        assert subscription.get(timeout=5).round == 1
+
+        # Checkpointed once every subscriber has the round
+        while follower.latestRound < 1:
+            time.sleep(0.01)
+        subscription.close()
+
+        for _ in range(3):
+            client.mine()
+
+        follower = BlockFollower(client, checkpoint)
+        subscription = follower.subscribe()
+        rounds = [subscription.get(timeout=5).round for _ in range(3)]
+        subscription.close()
+
+        assert rounds == [2, 3, 4]
+
+    def test_trackerConfirmsFromBlocks(self):
+        """
+        Confirmations come from the followed blocks, without polling each txid
+        """
+        client = FakeAlgod()
+        tracker = ConfirmationTracker(client)
+
+        stxn = self.payment(client, self.escrow)
+        txid = client.send_transaction(stxn)
+        future = tracker.track(txid, stxn.transaction.last_valid_round)
+        client.mine()
+
+        assert future.result(timeout=5)["confirmed-round"] == 2
+
+    def test_trackerReportsRejection(self):
+        """
+        A transaction rejected from the pool fails its future with ValueError
+        """
+        client = FakeAlgod()
+        tracker = ConfirmationTracker(client)
+
+        stxn = self.payment(client, self.escrow)
+        client.poolErrors[stxn.get_txid()] = "overspend"
+        future = tracker.track(stxn.get_txid(), stxn.transaction.last_valid_round)
+
+        client.mine()
+
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+
+    def test_laggingSubscriberDropped(self, monkeypatch):
+        """
+        A subscriber that stops reading is dropped instead of holding back the
+        follower, and the tracker keeps confirming
+        """
+        monkeypatch.setattr(BlockFollower, "retryDelay", 0.05)
+        client = FakeAlgod()
+        follower = BlockFollower(client)
+        BlockFollower._followers[client] = follower
+        stalled = follower.subscribe(maxPending=2)
+        tracker = ConfirmationTracker(client)
+        while follower.latestRound < 1:
+            time.sleep(0.01)
+
+        for _ in range(4):
+            client.mine()
+        stxn = self.payment(client, self.escrow)
+        future = tracker.track(client.send_transaction(stxn), stxn.transaction.last_valid_round)
+        client.mine()
+
+        assert future.result(timeout=5)["confirmed-round"] == 6
+        assert stalled.dropped and stalled.closed
+        assert [event.round for event in stalled] == [1, 2]
+
+    def test_algodDown(self, monkeypatch):
+        """
+        Pending confirmations fail once algod has been unreachable maxFailures
+        times in a row, and subscribers see the error
+        """
+        monkeypatch.setattr(BlockFollower, "retryDelay", 0.05)
+        client = FakeAlgod()
+        follower = BlockFollower(client)
+        BlockFollower._followers[client] = follower
+        subscription = follower.subscribe()
+        assert subscription.get(timeout=5).round == 1
+
+        tracker = ConfirmationTracker(client)
+        stxn = self.payment(client, self.escrow)
+        future = tracker.track(client.send_transaction(stxn), stxn.transaction.last_valid_round)
+        client.down = True
+
+        with pytest.raises(ConnectionError):
+            future.result(timeout=5)
+        assert tracker.pendingCount == 0
+        with pytest.raises(ConnectionError):
+            subscription.get(timeout=5)
+
+        client.down = False
+        client.mine()
+        assert subscription.get(timeout=5).round == 2
+        subscription.close()
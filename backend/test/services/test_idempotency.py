@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import Future
+from backend.services.idempotency import IdempotencyCache
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+
+
+def resolved(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+class TestIdempotency:
+    """
+    Unit tests for idempotent swap submission
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+
+    def test_duplicateSwapNeverReachesAlgod(self):
+        """
+        A retried request returns the original txid and the escrow transaction
+        carries the key's lease
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer)
+
+        first = exchange.requestSwap("swapAlgoForChad", 1, 3, self.buyer, idempotencyKey="order-1")
+        retry = exchange.requestSwap("swapAlgoForChad", 1, 3, self.buyer, idempotencyKey="order-1")
+        assert retry is first
+
+        sent = list(client.pool)
+        assert len(sent) == 3
+        assert sent[1].transaction.lease == IdempotencyCache.lease(f"{self.buyer.pubKey}:order-1")
+
+        for _ in range(20):
+            if first.done():
+                break
+            client.mine()
+            time.sleep(0.02)
+
+        assert first.result(timeout=5) in client.confirmed
+        assert exchange.requestSwap("swapAlgoForChad", 1, 3, self.buyer, idempotencyKey="order-1") is first
+        assert exchange.idempotency.hits == 2 and exchange.idempotency.misses == 1
+
+    def test_eviction(self):
+        """
+        Keys are forgotten after their retention round, least recently used first
+        when full, and when their submission failed
+        """
+        cache = IdempotencyCache(maxEntries=2, retainRounds=5)
+        cache.submit("a", 10, 20, lambda: resolved("txA"))
+        cache.submit("b", 10, 20, lambda: resolved("txB"))
+        cache.submit("a", 11, 21, lambda: resolved("other"))
+        cache.submit("c", 12, 22, lambda: resolved("txC"))
+
+        assert len(cache) == 2
+        assert cache.submit("a", 12, 22, lambda: resolved("other")).result() == "txA"
+
+        assert cache.submit("a", 26, 36, lambda: resolved("txA2")).result() == "txA2"
+
+        failed = Future()
+        failed.set_exception(ValueError("rejected"))
+        cache.submit("d", 26, 36, lambda: failed)
+        assert cache.submit("d", 26, 36, lambda: resolved("txD")).result() == "txD"
@@ -0,0 +1,61 @@
+import time
+import pytest
+from backend.services.liquidityLedger import LiquidityLedger
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+
+
+class TestLiquidityLedger:
+    """
+    Unit tests for escrow liquidity reservations
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+        cls.chadID = 42
+
+    def test_reservations(self):
+        ledger = LiquidityLedger.fromAccountInfo(
+            {"amount": 1100000, "min-balance": 100000, "assets": [{"asset-id": self.chadID, "amount": 500}]},
+            self.chadID
+        )
+        assert ledger.available(LiquidityLedger.ALGO) == 1000000
+
+        first = ledger.reserve({self.chadID: 300, LiquidityLedger.ALGO: 1000}, {LiquidityLedger.ALGO: 100})
+        with pytest.raises(ValueError):
+            ledger.reserve({self.chadID: 300})
+        assert ledger.rejected == 1
+
+        ledger.commit(first)
+        assert ledger.available(self.chadID) == 200
+        assert ledger.available(LiquidityLedger.ALGO) == 1000000 - 1000 + 100
+
+        second = ledger.reserve({self.chadID: 200})
+        ledger.release(second)
+        assert ledger.available(self.chadID) == 200
+
+    def test_unfillableSwapRejectedBeforeSending(self):
+        """
+        A swap the escrow cannot pay out fails at quote time and a confirmed one
+        commits its reservation
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer, self.chadID, algoAmount=1000000, chadAmount=5000000)
+
+        with pytest.raises(ValueError):
+            exchange.requestSwap("swapAlgoForChad", 2, 3, self.buyer).result(timeout=5)
+        assert client.pool == []
+
+        future = exchange.requestSwap("swapAlgoForChad", 1, 3, self.buyer)
+        assert exchange.liquidity.available(self.chadID) == 2000000
+
+        for _ in range(20):
+            if future.done():
+                break
+            client.mine()
+            time.sleep(0.02)
+
+        future.result(timeout=5)
+        assert exchange.liquidity.reserved[self.chadID] == 0
+        assert exchange.liquidity.balances[self.chadID] == 2000000
+        assert exchange.liquidity.balances[LiquidityLedger.ALGO] == 900000 + 1000000 - 1000
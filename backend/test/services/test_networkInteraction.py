@@ -0,0 +1,122 @@
+import threading
+import time
+from backend.services.confirmationTracker import ConfirmationTracker
+from backend.services.networkInteraction import NetworkInteraction
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+
+
+class TestSubmitMany:
+    """
+    Unit tests for pipelined submission, run against an in-memory algod
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.senderKey, cls.sender = account.generate_account()
+        _, cls.receiver = account.generate_account()
+
+    def payment(self, client: FakeAlgod, amount: int, lastValid: int = None):
+        params = client.params()
+        if lastValid is not None:
+            params.last = lastValid
+        return algo_txn.PaymentTxn(self.sender, params, self.receiver, amount).sign(self.senderKey)
+
+    def submitWhileMining(self, client: FakeAlgod, items: list, **kwargs) -> list:
+        results = []
+        submitter = threading.Thread(target=lambda: results.extend(NetworkInteraction.submit_many(client, items, **kwargs)))
+        submitter.start()
+        for _ in range(40):
+            if not submitter.is_alive():
+                break
+            client.mine()
+            time.sleep(0.02)
+        submitter.join(timeout=5)
+        return results
+
+    def test_resultPerItem(self):
+        """
+        Transactions and groups get a result each, in order, with dropped and
+        rejected items reporting their error
+        """
+        client = FakeAlgod()
+        expiring = self.payment(client, 1, lastValid=client.lastRound + 2)
+        rejected = self.payment(client, 2)
+        single = self.payment(client, 3)
+        group = [self.payment(client, 4), self.payment(client, 5)]
+        algo_txn.assign_group_id([tx.transaction for tx in group])
+
+        client.dropped = 2
+        client.poolErrors[rejected.get_txid()] = "overspend"
+        results = self.submitWhileMining(client, [expiring, rejected, single, group])
+
+        assert [result.txid for result in results] == [
+            expiring.get_txid(), rejected.get_txid(), single.get_txid(), group[0].get_txid()
+        ]
+        assert not results[0].ok and results[0].error is not None
+        assert not results[1].ok and "overspend" in results[1].error
+        assert results[2].ok and results[3].ok
+        assert client.confirmed[group[1].get_txid()] == results[3].confirmed_round
+
+    def test_resultsFilledOnReturn(self, monkeypatch):
+        """
+        Every result is filled in when submit_many returns, however late the done
+        callbacks run
+        """
+        track = ConfirmationTracker.track
+
+        def slowCallbacks(tracker, txid, lastValid=None, callback=None):
+            def late(future):
+                time.sleep(0.2)
+                callback(future)
+            return track(tracker, txid, lastValid, callback=late if callback is not None else None)
+
+        monkeypatch.setattr(ConfirmationTracker, "track", slowCallbacks)
+        client = FakeAlgod()
+        rejected = self.payment(client, 1)
+        client.poolErrors[rejected.get_txid()] = "overspend"
+
+        snapshot = []
+        def submit():
+            results = NetworkInteraction.submit_many(client, [self.payment(client, 2), rejected])
+            snapshot.extend((result.confirmed_round, result.error) for result in results)
+
+        submitter = threading.Thread(target=submit)
+        submitter.start()
+        for _ in range(40):
+            if not submitter.is_alive():
+                break
+            client.mine()
+            time.sleep(0.02)
+        submitter.join(timeout=5)
+
+        assert snapshot[0][0] is not None and snapshot[0][1] is None
+        assert snapshot[1][0] is None and "overspend" in snapshot[1][1]
+
+    def test_inFlightBound(self):
+        """
+        With one item in flight each item waits for the previous one to confirm
+        """
+        client = FakeAlgod()
+        items = [self.payment(client, amount) for amount in range(1, 4)]
+
+        results = self.submitWhileMining(client, items, max_in_flight=1)
+
+        rounds = [result.confirmed_round for result in results]
+        assert all(result.ok for result in results)
+        assert rounds == sorted(set(rounds))
+
+    def test_fundingTransactionsDistinct(self):
+        """
+        Funding with an Algo deposit equal to the funding amount still sends
+        distinct transactions, all confirmed
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, makeKeyPair())
+
+        txns = exchange.fundingTxns(250000, algoAmount=250000, chadAmount=1000000)
+        assert len({tx.get_txid() for tx in txns}) == len(txns) == 3
+        assert txns[0].transaction.amt == 500000
+
+        results = self.submitWhileMining(client, txns)
+        assert all(result.ok for result in results)
@@ -0,0 +1,118 @@
+import time
+from backend.services.blockFollower import BlockFollower
+from backend.services.pendingTransactions import PendingTransactionManager
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+
+
+class TestPendingTransactionManager:
+    """
+    Unit tests for expiry detection and resubmission of swap groups, run against
+    an in-memory algod
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+
+    def mineUntil(self, client: FakeAlgod, done, maxRounds: int = 40):
+        for _ in range(maxRounds):
+            if done():
+                return
+            client.mine()
+            time.sleep(0.02)
+
+    def test_resubmitsExpiredGroup(self):
+        """
+        A dropped group is detected at its last valid round and rebuilt with the
+        re-quoted rate
+        """
+        client = FakeAlgod()
+        quotes = []
+        exchange = fundedExchange(client, self.admin, self.buyer, requote=lambda action: quotes.append(action) or 4)
+        manager = exchange.pendingTransactions
+
+        client.dropped = 1
+        future = manager.submit("swapAlgoForChad", 1, 3, self.buyer)
+        assert manager.queueDepth == 1
+
+        firstTxID = manager._inFlight[0].txID
+        lastValid = manager._inFlight[0].lastValid
+        assert lastValid == client.lastRound + PendingTransactionManager.validRounds
+
+        self.mineUntil(client, future.done)
+
+        txID = future.result(timeout=5)
+        assert txID != firstTxID and txID in client.confirmed
+        assert client.confirmed[txID] > lastValid
+        assert quotes == ["swapAlgoForChad"]
+        assert manager.expired == 1 and manager.resubmitted == 1
+        assert manager.queueDepth == 0
+
+    def test_givesUpAfterMaxAttempts(self):
+        """
+        A group dropped on every attempt fails with TimeoutError after maxAttempts
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer)
+        manager = exchange.pendingTransactions
+
+        client.dropped = PendingTransactionManager.maxAttempts
+        future = manager.submit("swapChadForAlgo", 3, 3, self.buyer)
+
+        self.mineUntil(client, future.done, maxRounds=PendingTransactionManager.maxAttempts * 15)
+
+        assert isinstance(future.exception(timeout=5), TimeoutError)
+        assert manager.expired == PendingTransactionManager.maxAttempts
+
+    def test_failureReleasesReservation(self):
+        """
+        Any error while sending fails the swap and releases liquidity already
+        reserved for it
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer)
+        manager = exchange.pendingTransactions
+
+        def unreachable(*args):
+            raise ConnectionError("algod unreachable")
+
+        exchange.buildSwapGroup = unreachable
+        exchange.buildSwap = unreachable
+        future = manager.submit("swapAlgoForChad", 1, 3, self.buyer)
+
+        assert isinstance(future.exception(timeout=5), ConnectionError)
+        assert all(amount == 0 for amount in exchange.liquidity.reserved.values())
+        assert manager.queueDepth == 0
+
+        exchange.preflightSwap = unreachable
+        future = manager.submit("swapAlgoForChad", 1, 3, self.buyer)
+        assert isinstance(future.exception(timeout=5), ConnectionError)
+        assert manager.queueDepth == 0
+
+    def test_reservationKeptWhileUnreachable(self, monkeypatch):
+        """
+        Losing track of a group while algod is unreachable keeps its payout reserved
+        until the group is seen to confirm
+        """
+        monkeypatch.setattr(BlockFollower, "retryDelay", 0.01)
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer)
+        manager = exchange.pendingTransactions
+
+        client.down = True
+        future = manager.submit("swapAlgoForChad", 1, 3, self.buyer)
+        deadline = time.monotonic() + 5
+        while manager.trackingErrors < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert manager.trackingErrors >= 2
+        assert not future.done() and manager.queueDepth == 1
+        assert any(amount > 0 for amount in exchange.liquidity.reserved.values())
+
+        client.mine()
+        client.down = False
+        self.mineUntil(client, future.done)
+
+        assert future.result(timeout=5) in client.confirmed
+        assert all(amount == 0 for amount in exchange.liquidity.reserved.values())
+        assert manager.queueDepth == 0 and manager.expired == 0
@@ -0,0 +1,89 @@
+import json
+import os
+from algosdk import logic
+from backend.services.programCache import ProgramCache
+
+
+class StubCompiler:
+    """
+    Compile function that counts its calls. It returns a valid program pushing an
+    int derived from the source
+    """
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, source: str) -> bytes:
+        self.calls += 1
+        return b"\x05\x81" + bytes([sum(source.encode()) % 128])
+
+class TestProgramCache:
+    """
+    Unit tests for the in-memory and on-disk compiled program cache
+    """
+
+    def setup_method(self):
+        self.compile = StubCompiler()
+
+    def useCache(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(ProgramCache, "cacheDir", str(tmp_path))
+        monkeypatch.setattr(ProgramCache, "_programs", {})
+
+    def test_memoryCache(self, monkeypatch, tmp_path):
+        """
+        A program is compiled once and derived fields match its bytes
+        """
+        self.useCache(monkeypatch, tmp_path)
+
+        first = ProgramCache.get("int 1", {"chadID": 1}, self.compile)
+        second = ProgramCache.get("int 1", {"chadID": 1}, self.compile)
+
+        assert first is second
+        assert self.compile.calls == 1
+        assert first.programBytes == self.compile("int 1")
+        assert first.address == logic.address(first.programBytes)
+        assert first.logicSig.logic == first.programBytes
+
+    def test_keyCoversSourceAndParams(self, monkeypatch, tmp_path):
+        """
+        Changing the source or any parameter gives a different program, parameter
+        order does not
+        """
+        self.useCache(monkeypatch, tmp_path)
+
+        key = ProgramCache.programKey("int 1", {"a": 1, "b": 2})
+        assert key == ProgramCache.programKey("int 1", {"b": 2, "a": 1})
+        assert key != ProgramCache.programKey("int 2", {"a": 1, "b": 2})
+        assert key != ProgramCache.programKey("int 1", {"a": 1, "b": 3})
+
+        ProgramCache.get("int 1", {"a": 1}, self.compile)
+        ProgramCache.get("int 1", {"a": 2}, self.compile)
+        assert self.compile.calls == 2
+
+    def test_reloadAfterRestart(self, monkeypatch, tmp_path):
+        """
+        A fresh process loads persisted programs without compiling, and ignores
+        corrupt or tampered entries
+        """
+        self.useCache(monkeypatch, tmp_path)
+        program = ProgramCache.get("int 1", {}, self.compile)
+        assert os.path.exists(os.path.join(str(tmp_path), f"{program.key}.json"))
+
+        # Simulate a restart
+        monkeypatch.setattr(ProgramCache, "_programs", {})
+        reloaded = ProgramCache.get("int 1", {}, self.compile)
+        assert self.compile.calls == 1
+        assert reloaded.programBytes == program.programBytes
+
+        path = os.path.join(str(tmp_path), f"{program.key}.json")
+        with open(path) as f:
+            entry = json.load(f)
+        entry["address"] = logic.address(b"\x05\x81\x00")
+        with open(path, "w") as f:
+            json.dump(entry, f)
+
+        ProgramCache.clear()
+        assert ProgramCache.get("int 1", {}, self.compile).programBytes == program.programBytes
+        assert self.compile.calls == 2
+
+        ProgramCache.clear(disk=True)
+        assert os.listdir(str(tmp_path)) == []
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.services.quoteEngine import QuoteEngine
+
+
+class TestQuoteEngine:
+    """
+    Unit tests for fixed point swap quotes
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.engine = QuoteEngine(minChadTxThresh=20000000)
+
+    def test_ladderMatchesAppRounding(self):
+        """
+        Every rung of a ladder pays out what the exchange app allows, and matches the
+        single quote for the same amount
+        """
+        rng = np.random.default_rng(7)
+        amounts = rng.integers(1, 10 ** 12, 2000) / 1e6
+        for chadsPerAlgo in (3, 2.718281, 0.000123):
+            rate = ChadExchangeApp.rateFor(chadsPerAlgo)
+
+            ladder = self.engine.ladder("swapAlgoForChad", amounts, chadsPerAlgo)
+            assert ladder.amountOut.tolist() == [ChadExchangeApp.chadsFor(a, rate) for a in ladder.amountIn.tolist()]
+
+            ladder = self.engine.ladder("swapChadForAlgo", amounts, chadsPerAlgo)
+            assert ladder.amountOut.tolist() == [ChadExchangeApp.algosFor(a, rate) for a in ladder.amountIn.tolist()]
+
+            for i in np.flatnonzero(ladder.valid)[:20]:
+                quote = self.engine.quote("swapChadForAlgo", amounts[i], chadsPerAlgo)
+                assert (quote.amountIn, quote.amountOut) == (ladder.amountIn[i], ladder.amountOut[i])
+
+    def test_largeAmountsDoNotOverflow(self):
+        """
+        Amounts up to the Algo supply are priced exactly in int64
+        """
+        supply = 10 ** 10     # Algo
+        ladder = self.engine.ladder("swapAlgoForChad", [supply], 123.456789)
+        assert ladder.amountOut[0] == supply * 10 ** 6 * 123456789 // 10 ** 6
+
+        ladder = self.engine.ladder("swapChadForAlgo", [supply], 0.5)
+        assert ladder.amountOut[0] == 2 * supply * 10 ** 6
+
+    def test_minimumAndRounding(self):
+        """
+        Amounts are rounded to the nearest micro-unit, and swaps below the minimum
+        are flagged in a ladder and rejected as single quotes
+        """
+        assert QuoteEngine.toMicro(0.29) == 290000
+        assert QuoteEngine.toMicro([0.29, 1.000001]).tolist() == [290000, 1000001]
+
+        ladder = self.engine.ladder("swapAlgoForChad", [0, 6.66, 6.67, 100], 3)
+        assert ladder.valid.tolist() == [False, False, True, True]
+        assert ladder.toDict()["amountOut"] == [0, 19980000, 20010000, 300000000]
+
+        with pytest.raises(ValueError):
+            self.engine.quote("swapAlgoForChad", 6.66, 3)
+        with pytest.raises(ValueError):
+            self.engine.quote("swapChadForAlgo", 19.999999, 3)
+        with pytest.raises(ValueError):
+            self.engine.ladder("swapAlgoForChad", [1], 0)
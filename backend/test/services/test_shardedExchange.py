@@ -0,0 +1,61 @@
+import threading
+import time
+from backend.services.liquidityLedger import LiquidityLedger
+from backend.services.shardedExchange import ShardedExchange
+from backend.test.fakeAlgod import FakeAlgod, makeKeyPair
+
+
+class TestShardedExchange:
+    """
+    Unit tests for escrow shards, run against an in-memory algod
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.chadID = 42
+
+    def test_shardsAndRouting(self):
+        """
+        Shards have distinct escrows, shard 0 is the unsharded escrow and users are
+        spread over every shard
+        """
+        exchange = ShardedExchange(None, self.admin, 1000000, self.chadID, shards=4)
+        unsharded = ShardedExchange(None, self.admin, 1000000, self.chadID, shards=1)
+
+        assert len({shard.escrowAddress for shard in exchange.shards}) == 4
+        assert exchange.shards[0].escrowAddress == unsharded.shards[0].escrowAddress
+
+        users = [makeKeyPair().pubKey for _ in range(200)]
+        counts = [0] * 4
+        for user in users:
+            counts[ShardedExchange.shardIndex(user, 4)] += 1
+            assert exchange.shardFor(user) is exchange.shardFor(user)
+        assert min(counts) > 20
+
+    def test_rebalance(self):
+        """
+        Liquidity is evened out with one batch of withdrawals and one of deposits
+        """
+        client = FakeAlgod()
+        exchange = ShardedExchange(client, self.admin, 1000000, self.chadID, shards=3)
+        client.fundAccount(exchange.shards[0].escrowAddress, 3100000, {self.chadID: 9000000})
+        client.fundAccount(exchange.shards[1].escrowAddress, 100000, {self.chadID: 0})
+        client.fundAccount(exchange.shards[2].escrowAddress, 1100000, {self.chadID: 3000000})
+
+        plan = exchange.rebalancePlan(self.chadID)
+        assert plan == [(0, -5000000), (1, 4000000), (2, 1000000)]
+
+        stop = threading.Event()
+        def mine():
+            while not stop.is_set():
+                time.sleep(0.05)
+                client.mine()
+        threading.Thread(target=mine, daemon=True).start()
+
+        startRound = client.lastRound
+        moves = exchange.rebalance()
+        stop.set()
+
+        assert exchange.available(self.chadID) == [4000000, 4000000, 4000000]
+        assert moves[LiquidityLedger.ALGO] == [(0, -1665667), (1, 1333333), (2, 332334)]
+        assert client.lastRound - startRound <= 3
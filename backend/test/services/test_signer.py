@@ -0,0 +1,64 @@
+from backend.services.signer import Signer
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+
+
+class TestSigner:
+    """
+    Unit tests for batch signing with cached keys
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.privKey, cls.sender = account.generate_account()
+        cls.otherKey, cls.other = account.generate_account()
+        cls.params = algo_txn.SuggestedParams(fee=1000, first=1000, last=2000, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+
+    def payments(self, count: int):
+        return [algo_txn.PaymentTxn(self.sender, self.params, self.other, i + 1) for i in range(count)]
+
+    def test_matchesTransactionSign(self):
+        """
+        Signed transactions are byte for byte those of Transaction.sign, in process and
+        from the pool, including transactions signed by a rekeyed key
+        """
+        txns = self.payments(6)
+        expected = [txn.sign(self.privKey) for txn in txns[:5]] + [txns[5].sign(self.otherKey)]
+        items = [(txn, self.privKey) for txn in txns[:5]] + [(txns[5], self.otherKey)]
+
+        pooled = Signer(workers=2, poolThreshold=0)
+        try:
+            for signer in (Signer(workers=1), pooled):
+                signed = signer.signMany(items)
+                assert [encoding.msgpack_encode(stx) for stx in signed] == [encoding.msgpack_encode(stx) for stx in expected]
+                assert signer.signatures == 6
+        finally:
+            pooled.close()
+
+    def test_wrapsLogicSigs(self):
+        """
+        LogicSig authorized transactions are wrapped, not signed
+        """
+        lsig = algo_txn.LogicSig(bytes([5, 129, 1]))     # int 1
+        txn = algo_txn.PaymentTxn(lsig.address(), self.params, self.other, 1)
+
+        approval, wrapped = Signer(workers=1).signMany([(self.payments(1)[0], self.privKey), (txn, lsig)])
+
+        assert isinstance(wrapped, algo_txn.LogicSigTransaction)
+        assert wrapped.lsig is lsig
+        assert approval.signature == self.payments(1)[0].sign(self.privKey).signature
+
+    def test_keyCacheBounded(self):
+        """
+        Only the most recently used keys stay decoded, and close forgets them all
+        """
+        signer = Signer(workers=1, maxKeys=2)
+        keys = [account.generate_account()[0] for _ in range(3)]
+
+        signer.signingKey(keys[0])
+        signer.signingKey(keys[1])
+        signer.signingKey(keys[0])
+        signer.signingKey(keys[2])
+        assert list(signer._keys) == [keys[0], keys[2]]
+
+        signer.close()
+        assert not signer._keys
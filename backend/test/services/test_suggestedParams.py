@@ -0,0 +1,81 @@
+import time
+from backend.services.suggestedParams import SuggestedParamsProvider
+from backend.test.fakeAlgod import FakeAlgod
+
+
+class CountingAlgod(FakeAlgod):
+    def __init__(self):
+        super().__init__()
+        self.paramRequests = 0
+
+    def suggested_params(self):
+        self.paramRequests += 1
+        return super().suggested_params()
+
+class TestSuggestedParamsProvider:
+    """
+    Unit tests for shared suggested params, run against an in-memory algod
+    """
+
+    def test_cachedWithinRound(self):
+        """
+        Params are fetched once and then served from the cache, counted as hits
+        """
+        client = CountingAlgod()
+        provider = SuggestedParamsProvider(client, ttl=60)
+
+        params = [provider.get() for _ in range(5)]
+        assert client.paramRequests == 1
+        assert (provider.hits, provider.misses) == (4, 1)
+        assert provider.hitRate == 0.8
+
+        assert all(p.fee == SuggestedParamsProvider.fee and p.flat_fee for p in params)
+        assert params[0].last == params[0].first + SuggestedParamsProvider.validityWindow
+
+    def test_callersGetCopies(self):
+        """
+        Changing the params one caller got leaves later callers unaffected
+        """
+        provider = SuggestedParamsProvider(CountingAlgod(), ttl=60, validityWindow=10)
+
+        params = provider.get()
+        params.last = params.first + 2
+        params.fee = 5
+
+        again = provider.get()
+        assert again.last == again.first + 10
+        assert again.fee == SuggestedParamsProvider.fee
+
+    def test_refreshOnNewRoundOrTtl(self):
+        """
+        A later round or an expired ttl refetches, an older round does not
+        """
+        client = CountingAlgod()
+        provider = SuggestedParamsProvider(client, ttl=60)
+        provider.get()
+
+        provider.notifyRound(client.lastRound)
+        provider.get()
+        assert client.paramRequests == 1
+
+        client.mine()
+        provider.notifyRound(client.lastRound)
+        assert provider.get().first == client.lastRound
+        assert client.paramRequests == 2
+
+        provider.ttl = 0.05
+        time.sleep(0.06)
+        provider.get()
+        assert client.paramRequests == 3
+
+        provider.invalidate()
+        provider.get()
+        assert client.paramRequests == 4
+
+    def test_sharedPerClient(self):
+        """
+        Callers on the same client share one provider
+        """
+        client = CountingAlgod()
+        assert SuggestedParamsProvider.forClient(client) is SuggestedParamsProvider.forClient(client)
+        assert SuggestedParamsProvider.forClient(client) is not SuggestedParamsProvider.forClient(CountingAlgod())
@@ -0,0 +1,49 @@
+import time
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+
+
+class TestSwapBatcher:
+    """
+    Unit tests for micro-batched swaps, run against an in-memory algod
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+
+    def test_failingRequestLeavesBatch(self):
+        """
+        A request that errors fails on its own, with its reservation released, while
+        the rest of the batch confirms and the batcher keeps running
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin, self.buyer, batched=True)
+        preflight = exchange.preflightSwap
+
+        def flakyPreflight(action, amount, chadsPerAlgo, address):
+            if amount == 2:
+                raise ConnectionError("algod unreachable")
+            return preflight(action, amount, chadsPerAlgo, address)
+
+        exchange.preflightSwap = flakyPreflight
+        good = exchange.swapBatcher.submit("swapAlgoForChad", 1, 3, self.buyer)
+        bad = exchange.swapBatcher.submit("swapAlgoForChad", 2, 3, self.buyer)
+
+        assert isinstance(bad.exception(timeout=5), ConnectionError)
+        for _ in range(20):
+            if good.done():
+                break
+            client.mine()
+            time.sleep(0.02)
+
+        assert good.result(timeout=5) in client.confirmed
+        assert exchange.swapBatcher.batches == 1 and exchange.swapBatcher.swaps == 1
+
+        later = exchange.swapBatcher.submit("swapChadForAlgo", 3, 3, self.buyer)
+        for _ in range(20):
+            if later.done():
+                break
+            client.mine()
+            time.sleep(0.02)
+        assert later.result(timeout=5) in client.confirmed
+        assert all(amount == 0 for amount in exchange.liquidity.reserved.values())
@@ -0,0 +1,86 @@
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.signer import _signingMessage
+from backend.services.suggestedParams import SuggestedParamsProvider
+from backend.test.fakeAlgod import FakeAlgod, fundedExchange, makeKeyPair
+from algosdk import encoding
+from algosdk.future import transaction as algo_txn
+
+
+class TestSwapTemplates:
+    """
+    Unit tests checking that templated swap groups encode exactly like groups built
+    transaction by transaction
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+
+    def referenceGroup(self, exchange: ChadExchangeService, action: str, amount: float, chadsPerAlgo: float,
+                       lease: bytes = None) -> list:
+        buyerTx, escrowTx = exchange.buildSwap(action, amount, chadsPerAlgo, self.buyer)
+        escrowTx.lease = lease
+        approvalTx, _ = exchange.swapApproval(self.buyer, action)
+        transactions = [buyerTx, escrowTx, approvalTx]
+
+        gid = algo_txn.calculate_group_id(transactions)
+        for tx in transactions:
+            tx.group = gid
+
+        return transactions
+
+    def test_matchesReferenceEncoding(self):
+        """
+        Both shapes produce the same bytes, transaction IDs and group ID as the
+        transaction by transaction path, with and without a lease
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin)
+
+        for action, amount, chadsPerAlgo in [("swapAlgoForChad", 1.5, 3), ("swapChadForAlgo", 6, 3)]:
+            for lease in (None, bytes(range(32))):
+                expected = self.referenceGroup(exchange, action, amount, chadsPerAlgo, lease)
+                group = exchange.buildSwapGroup(action, amount, chadsPerAlgo, self.buyer, lease=lease)
+
+                assert group.groupID == expected[0].group
+                assert group.messages == [_signingMessage(tx) for tx in expected]
+                assert [encoding.msgpack_encode(tx) for tx in group.transactions] == \
+                       [encoding.msgpack_encode(tx) for tx in expected]
+                assert group.txIDs == [tx.get_txid() for tx in expected]
+
+        # One template per shape and round
+        assert exchange.swapTemplates.compiled == 2
+
+    def test_validityWindowAndRounds(self):
+        """
+        A shorter validity window and a new round each get their own template
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin)
+
+        group = exchange.buildSwapGroup("swapAlgoForChad", 1, 3, self.buyer, validRounds=10)
+        assert group.lastValid == client.lastRound + 10
+
+        client.mine()
+        SuggestedParamsProvider.forClient(client).notifyRound(client.lastRound)
+
+        expected = self.referenceGroup(exchange, "swapAlgoForChad", 1, 3)
+        group = exchange.buildSwapGroup("swapAlgoForChad", 1, 3, self.buyer)
+        assert group.transactions[0].first_valid_round == client.lastRound
+        assert group.groupID == expected[0].group
+        assert exchange.swapTemplates.compiled == 2
+
+    def test_signedGroupValidates(self):
+        """
+        Signatures made from the template messages verify against the transactions
+        """
+        client = FakeAlgod()
+        exchange = fundedExchange(client, self.admin)
+        group = exchange.buildSwapGroup("swapChadForAlgo", 6, 3, self.buyer)
+
+        signed = exchange.signer.signMany([(group.transactions[0], self.buyer.privKey)], messages=group.messages)
+        assert signed[0].signature == group.transactions[0].sign(self.buyer.privKey).signature
+
+        txID, lastValid = exchange.submitSwapGroup(group, self.buyer)
+        assert txID == group.txIDs[0]
+        assert lastValid == group.lastValid
@@ -0,0 +1,65 @@
+import pytest
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.teal.algodPrograms import AlgodPrograms
+from backend.teal.assembler import TealAssembler
+
+
+class TestAlgodPrograms:
+    """
+    Offline check of the local assembler against bytecode recorded from algod with
+    tools/recordAlgodPrograms.py. No network or sandbox is needed
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.recorded = AlgodPrograms.load()
+        cls.variants = {variant.name: variant for variant in AlgodPrograms.variants()}
+
+    @pytest.mark.parametrize("name", [variant.name for variant in AlgodPrograms.variants()])
+    def test_matchesAlgod(self, name):
+        """
+        Each program variant assembles byte for byte to the recorded algod output
+        """
+        expected = self.recorded.get(name)
+        if expected is None:
+            pytest.skip(f"{name} not recorded, run tools/recordAlgodPrograms.py against a sandbox")
+
+        variant = self.variants[name]
+        assert expected["sourceSha256"] == variant.sourceHash, "TEAL changed since recording, re-record"
+        assert TealAssembler.assemble(variant.source).bytecode.hex() == expected["bytecode"]
+
+    @pytest.mark.parametrize("name", [variant.name for variant in AlgodPrograms.variants() if "Sig" in variant.name])
+    def test_templateMatchesAlgod(self, name):
+        """
+        Delegated signatures patched from a template match the recorded algod output
+        """
+        expected = self.recorded.get(name)
+        if expected is None:
+            pytest.skip(f"{name} not recorded, run tools/recordAlgodPrograms.py against a sandbox")
+
+        variant = self.variants[name]
+        assert expected["sourceSha256"] == variant.sourceHash, "TEAL changed since recording, re-record"
+        if name.startswith("algoSig"):
+            program = DelegatedSignature.algoSigProgram(**variant.params)
+        else:
+            program = DelegatedSignature.chadSigProgram(**variant.params)
+        assert program.hex() == expected["bytecode"]
+
+    def test_mismatchesReported(self, tmp_path):
+        """
+        Missing, stale and differing recordings are each reported
+        """
+        path = str(tmp_path / "programs.json")
+        AlgodPrograms.save(AlgodPrograms.record(lambda source: TealAssembler.assemble(source).bytecode), path)
+        recorded = AlgodPrograms.load(path)
+        assert AlgodPrograms.mismatches(recorded) == []
+
+        del recorded["escrow"]
+        recorded["escrowBatched"]["sourceSha256"] = "0" * 64
+        recorded["appClear"]["bytecode"] = "05"
+        assert AlgodPrograms.mismatches(recorded) == [
+            "escrow: not recorded",
+            "escrowBatched: recording is stale, TEAL changed since it was compiled",
+            "appClear: assembled bytecode differs from algod",
+        ]
+
+        assert AlgodPrograms.load(str(tmp_path / "missing.json")) == {}
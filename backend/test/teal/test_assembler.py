@@ -0,0 +1,102 @@
+import pytest
+from pyteal import compileTeal, Mode
+from backend.test.testHelpers import Sandbox, Account, Client, Convert
+from backend.contracts.chadExchange import ChadExchangeASC1
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.services.networkInteraction import NetworkInteraction
+from backend.teal.assembler import TealAssembler
+from algosdk import logic
+
+
+class TestTealAssembler:
+    """
+    Unit tests for the local TEAL assembler. Every program is also compiled by the
+    sandbox algod and the results must be byte identical
+    """
+    @classmethod
+    def setup_class(cls):
+        """
+        Initialize tests with sandbox running and get test accounts
+        """
+        Sandbox.command("up", "release")
+        Sandbox.command("reset")
+        cls.client = Client.getClient()
+        cls.admin, cls.user1, cls.user2 = Account.getTestAccounts()
+
+    @classmethod
+    def teardown_class(cls):
+        Sandbox.command("down")
+
+    def assertMatchesAlgod(self, source: str):
+        local = TealAssembler.assemble(source)
+        remote = NetworkInteraction.compile_program(self.client, source)
+
+        assert local.bytecode == remote
+        assert local.address == logic.address(remote)
+
+    @pytest.mark.parametrize("chadID, minChadTxThresh", [
+        (1, 1), (5, Convert.chad2uChad(20)), (1000, 1000), (2 ** 40, 2 ** 63)
+    ])
+    def test_exchangeProgram(self, chadID, minChadTxThresh):
+        """
+        Escrow program assembles identically to algod for a range of parameters
+        """
+        program = ChadExchangeASC1(self.admin.pubKey, chadID, minChadTxThresh).program()
+        self.assertMatchesAlgod(compileTeal(program, mode=Mode.Signature, version=5))
+
+    @pytest.mark.parametrize("noMoreThan, chadID", [(0, 1), (1000, 7), (Convert.algo2uAlgo(100), 1000)])
+    def test_delegatedSignaturePrograms(self, noMoreThan, chadID):
+        """
+        Delegated signature programs assemble identically to algod
+        """
+        self.assertMatchesAlgod(DelegatedSignature.algoSig(self.user1.pubKey, noMoreThan))
+        self.assertMatchesAlgod(DelegatedSignature.chadSig(self.user1.pubKey, noMoreThan, chadID))
+
+    def test_constantLayout(self):
+        """
+        Repeated constants are placed in blocks by use count and single use constants
+        are pushed
+        """
+        self.assertMatchesAlgod("\n".join([
+            "#pragma version 5",
+            "int 7", "int 300", "int 300", "int 7", "int 7", "int 1", "int 1", "+", "+", "+", "+", "+",
+            "int 2", "int 3", "int 4", "int 2", "int 3", "int 4", "+", "+", "+", "+", "+", "+",
+            'byte "abc"', 'byte 0x616263', "byte base64(AAEC)", "concat", "concat",
+            f"addr {self.user1.pubKey}", f"addr {self.user1.pubKey}", "concat", "concat",
+            "len", "+", "return",
+        ]))
+
+    @pytest.mark.parametrize("version", [2, 3])
+    def test_constantLayoutBeforeV4(self, version):
+        """
+        Before v4 every constant is placed in the blocks in order of first use
+        """
+        self.assertMatchesAlgod("\n".join([
+            f"#pragma version {version}",
+            "int 7", "int 300", "int 300", "+", "+", "int 1", "+",
+            'byte "abc"', "len", "+", "return",
+        ]))
+
+    def test_branches(self):
+        """
+        Forward and backward branches have the same offsets as algod
+        """
+        self.assertMatchesAlgod("\n".join([
+            "#pragma version 5",
+            "int 3",
+            "loop:",
+            "int 1",
+            "-",
+            "dup",
+            "bnz loop",
+            "bz done",
+            "err",
+            "done:",
+            "gtxn 1 Fee",
+            "txna ApplicationArgs 0",
+            "len",
+            "+",
+            "b end",
+            "end:",
+            "return",
+        ]))
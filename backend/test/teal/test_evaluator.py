@@ -0,0 +1,73 @@
+import pytest
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.teal.evaluator import TealEvaluator
+from backend.test.fakeAlgod import makeKeyPair
+from algosdk.future import transaction as algo_txn
+
+
+class TestTealEvaluator:
+    """
+    Unit tests for the offline TEAL evaluator against the exchange escrow logic
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.admin = makeKeyPair()
+        cls.buyer = makeKeyPair()
+        cls.chadID = 42
+        cls.exchange = ChadExchangeService(None, cls.admin, minChadTxThresh=20000000, chadID=cls.chadID)
+        cls.escrow = cls.exchange.escrowAddress
+        cls.params = algo_txn.SuggestedParams(fee=1000, first=1, last=1001, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+
+    def swapAlgoForChad(self, chadAmount=30000000, approvalSender=None, closeTo=None):
+        txns = [
+            algo_txn.PaymentTxn(self.buyer.pubKey, self.params, self.escrow, 10000000),
+            algo_txn.AssetTransferTxn(self.escrow, self.params, self.buyer.pubKey, chadAmount, self.chadID, close_assets_to=closeTo),
+            algo_txn.PaymentTxn(approvalSender or self.admin.pubKey, self.params, self.escrow, 0),
+        ]
+        gid = algo_txn.calculate_group_id(txns)
+        for txn in txns:
+            txn.group = gid
+
+        return [
+            txns[0].sign(self.buyer.privKey),
+            algo_txn.LogicSigTransaction(txns[1], self.exchange.escrowLogicSig),
+            txns[2].sign(self.admin.privKey),
+        ]
+
+    def test_validSwap(self):
+        """
+        Valid swap passes pre-flight validation
+        """
+        self.exchange.validateGroup(self.swapAlgoForChad())
+
+    @pytest.mark.parametrize("kwargs", [
+        {"chadAmount": 1000},
+        {"approvalSender": makeKeyPair().pubKey},
+        {"closeTo": makeKeyPair().pubKey},
+    ])
+    def test_invalidSwap(self, kwargs):
+        """
+        Swaps breaking the escrow logic are rejected before sending
+        """
+        with pytest.raises(ValueError):
+            self.exchange.validateGroup(self.swapAlgoForChad(**kwargs))
+
+    def test_failingBranch(self):
+        """
+        Result reports the branch whose condition failed
+        """
+        group = self.swapAlgoForChad(chadAmount=1000)
+        result = self.exchange.escrowEvaluator.evaluateGroup(group)
+        assert not result.passed
+        assert result.branch != "main"
+        assert result.cost > 0
+
+    def test_delegatedSignature(self):
+        """
+        Delegated algo signature enforces its spending limit
+        """
+        evaluator = TealEvaluator(DelegatedSignature.algoSigProgram(self.escrow, 5000))
+        for amount, passed in [(5000, True), (5001, False)]:
+            txn = algo_txn.PaymentTxn(self.buyer.pubKey, self.params, self.escrow, amount)
+            assert evaluator.evaluate([TealEvaluator.fields(txn)], 0).passed == passed
@@ -0,0 +1,50 @@
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from backend.teal.fuzzer import ExchangeFuzzer
+from algosdk import account
+
+
+class TestExchangeFuzzer:
+    """
+    Fuzz the escrow logic against the reference spec. Kept small here, run
+    tools/fuzzExchange.py for a full campaign
+    """
+    @classmethod
+    def setup_class(cls):
+        privKey, pubKey = account.generate_account()
+        cls.exchange = ChadExchangeService(None, KeyPair(pubKey=pubKey, privKey=privKey), minChadTxThresh=20000000, chadID=42)
+
+    def test_escrowMatchesSpec(self):
+        """
+        Escrow accepts exactly the groups the spec allows, and every branch is reached
+        """
+        report = ExchangeFuzzer.forExchange(self.exchange, workers=1).run(20000, seed=1)
+        assert report.mismatches == 0, report.summary()
+        assert report.accepted > 0
+        assert len(report.branches) >= 6
+
+    def test_detectsDivergence(self):
+        """
+        A spec that disagrees with the escrow is reported
+        """
+        fuzzer = ExchangeFuzzer.forExchange(self.exchange, workers=1)
+        fuzzer.config.minChadTxThresh += 1
+        report = fuzzer.run(20000, seed=1)
+        assert report.mismatches > 0
+        assert all(kind[0].startswith("swap") for kind in report.mismatchKinds)
+
+    def test_appEscrowMatchesSpec(self):
+        """
+        App approved escrow only signs the payout leg of a swap
+        """
+        exchange = ChadExchangeService(None, self.exchange.admin, minChadTxThresh=20000000, chadID=42, appID=77)
+        report = ExchangeFuzzer.forExchange(exchange, workers=1).run(20000, seed=3)
+        assert report.mismatches == 0, report.summary()
+
+    def test_batchedEscrowMatchesSpec(self):
+        """
+        Batched escrow only pays out on the second leg of each swap pair
+        """
+        exchange = ChadExchangeService(None, self.exchange.admin, minChadTxThresh=20000000, chadID=42, batched=True)
+        report = ExchangeFuzzer.forExchange(exchange, workers=1).run(10000, seed=4)
+        assert report.mismatches == 0, report.summary()
@@ -0,0 +1,38 @@
+from backend.contracts.chadExchange import ChadExchangeASC1
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from backend.teal.fuzzer import ExchangeFuzzer
+from backend.teal.profiler import ContractProfiler
+from algosdk import account
+
+
+class TestContractProfiler:
+    """
+    Program size and cost regression benchmark. Run tools/profileContracts.py
+    --update-baseline after an intended change
+    """
+    def test_noRegressions(self):
+        """
+        No contract grew in size or branch cost beyond the stored baseline
+        """
+        profiles = ContractProfiler.profileAll()
+        assert ContractProfiler.regressions(profiles, ContractProfiler.loadBaseline()) == []
+
+    def test_reorderedEscrowMatchesSpec(self):
+        """
+        Reordering the escrow branches does not change which groups it accepts
+        """
+        privKey, pubKey = account.generate_account()
+        order = ChadExchangeASC1.defaultBranchOrder[::-1]
+        exchange = ChadExchangeService(None, KeyPair(pubKey=pubKey, privKey=privKey), 20000000, 42, branchOrder=order)
+        report = ExchangeFuzzer.forExchange(exchange, workers=1).run(20000, seed=2)
+        assert report.mismatches == 0, report.summary()
+
+    def test_suggestBranchOrder(self):
+        """
+        Swap heavy traffic is best served by testing the swaps first
+        """
+        ranked = ContractProfiler.suggestBranchOrder({"swapAlgoForChad": 60, "swapChadForAlgo": 39, "optIn": 1})
+        cost, order = ranked[0]
+        assert set(order[:2]) == {"swapAlgoForChad", "swapChadForAlgo"}
+        assert cost < ContractProfiler.profileExchange().expectedCost({"swapAlgoForChad": 60, "swapChadForAlgo": 39, "optIn": 1})
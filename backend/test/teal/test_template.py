@@ -0,0 +1,86 @@
+import pytest
+from backend.contracts.delegatedSignature import DelegatedSignature
+from backend.teal.assembler import TealAssembler
+from backend.teal.template import ProgramTemplate
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from algosdk import account
+
+
+class TestProgramTemplate:
+    """
+    Unit tests for template patched programs. Patched bytecode must be identical to
+    fully compiling the program with the same parameters
+    """
+    @classmethod
+    def setup_class(cls):
+        cls.addresses = [account.generate_account()[1] for _ in range(3)]
+
+    @pytest.mark.parametrize("noMoreThan", [0, 1, 127, 128, 1000, 1001, 2 ** 14, 2 ** 40, 2 ** 64 - 1])
+    def test_algoSig(self, noMoreThan):
+        """
+        Patched algoSig matches a full compile, including limits that collide with
+        other constants in the program
+        """
+        for addr in self.addresses:
+            expected = TealAssembler.assemble(DelegatedSignature.algoSig(addr, noMoreThan)).bytecode
+            assert DelegatedSignature.algoSigProgram(addr, noMoreThan) == expected
+
+    @pytest.mark.parametrize("noMoreThan, chadID", [
+        (0, 1), (5, 5), (1000, 7), (20000000, 1000), (2 ** 63, 2 ** 20), (1, 2 ** 64 - 1)
+    ])
+    def test_chadSig(self, noMoreThan, chadID):
+        """
+        Patched chadSig matches a full compile
+        """
+        for addr in self.addresses:
+            expected = TealAssembler.assemble(DelegatedSignature.chadSig(addr, noMoreThan, chadID)).bytecode
+            assert DelegatedSignature.chadSigProgram(addr, noMoreThan, chadID) == expected
+
+    def test_exchangeDelegatedSignature(self):
+        """
+        The exchange hands out template patched signatures paying into its escrow
+        """
+        privKey, pubKey = account.generate_account()
+        exchange = ChadExchangeService(None, KeyPair(pubKey=pubKey, privKey=privKey), 20000000, 42)
+
+        algoSig = exchange.delegatedSignature(0, 5000)
+        assert algoSig.logic == TealAssembler.assemble(DelegatedSignature.algoSig(exchange.escrowAddress, 5000)).bytecode
+        chadSig = exchange.delegatedSignature(42, 5000)
+        assert chadSig.logic == TealAssembler.assemble(DelegatedSignature.chadSig(exchange.escrowAddress, 5000, 42)).bytecode
+
+        with pytest.raises(ValueError):
+            exchange.delegatedSignature(7, 5000)
+
+    def test_branchOffsetsShift(self):
+        """
+        Branches crossing a patched constant are re-targeted when its size changes
+        """
+        source = "\n".join([
+            "#pragma version 5",
+            "int 1",
+            "bnz skip",
+            "int TMPL_A",
+            "pop",
+            "skip:",
+            "byte TMPL_B",
+            "len",
+            "start:",
+            "int 1",
+            "-",
+            "dup",
+            "bnz start",
+            "return",
+        ])
+        template = ProgramTemplate(source)
+
+        for a, b in [(0, b""), (2 ** 63, b"x" * 200), (300, b"abc")]:
+            expected = TealAssembler.assemble(template.substitute(TMPL_A=a, TMPL_B=b)).bytecode
+            assert template.instantiate(TMPL_A=a, TMPL_B=b) == expected
+
+    def test_missingVariable(self):
+        """
+        Instantiating without every variable fails
+        """
+        with pytest.raises(ValueError):
+            ProgramTemplate("#pragma version 5\nint TMPL_A\nint TMPL_B\n+\nreturn").instantiate(TMPL_A=1)
@@ -3,9 +3,9 @@ import subprocess
 import pty
 import time
 from backend.services.chadExchangeService import ChadExchangeService
-from backend.services.transactionService import PaymentTransactionRepository, ASATransactionRepository
-from backend.services.networkInteraction import NetworkInteraction
+from backend.services.confirmationTracker import ConfirmationTracker
 from backend.services.keyPair import KeyPair
+from backend.services.quoteEngine import QuoteEngine
 from backend.services.transactionService import get_default_suggested_params
 from algosdk import kmd
 from algosdk.v2client import algod
@@ -19,34 +19,8 @@ def createExchange(client: algod.AlgodClient, admin: KeyPair, minChadTxThresh: i
     """
     exchange = ChadExchangeService(client, admin, minChadTxThresh, chadID=chadID)
 
-    # Fund exchange
-    fundTxSigned = PaymentTransactionRepository.payment(
-        client=exchange.client, 
-        sender_address=exchange.admin.pubKey, 
-        receiver_address=exchange.escrowAddress, 
-        amount=250000, 
-        sender_private_key=exchange.admin.privKey, 
-        sign_transaction=True
-    )
-    
-    NetworkInteraction.submit_transaction(exchange.client, transaction=fundTxSigned)
-
-    # Opt in contract
-    optInTx = ASATransactionRepository.asa_transfer(
-        client=exchange.client,
-        sender_address=exchange.escrowAddress,
-        receiver_address=exchange.escrowAddress,
-        amount=0,
-        asa_id=exchange.chadID,
-        revocation_target=None,
-        sender_private_key=None,
-        sign_transaction=False
-    )
-
-    optInTxLogSig = algo_txn.LogicSig(exchange.escrowBytes)
-    optInTxSigned = algo_txn.LogicSigTransaction(optInTx, optInTxLogSig)
-
-    NetworkInteraction.submit_transaction(exchange.client, transaction=optInTxSigned)
+    # Fund exchange and opt in to chadcoin in one block
+    exchange.fund(250000)
 
     return exchange
 
@@ -112,15 +86,7 @@ class Transaction:
         Utility function to wait until the transaction is
         confirmed before proceeding.
         """
-        lastRound = client.status().get('last-round')
-        txinfo = client.pending_transaction_info(txid)
-        while not (txinfo.get('confirmed-round') and txinfo.get('confirmed-round') > 0):
-            print("Waiting for confirmation")
-            lastRound += 1
-            client.status_after_block(lastRound)
-            txinfo = client.pending_transaction_info(txid)
-        print("Transaction {} confirmed in round {}.".format(txid, txinfo.get('confirmed-round')))
-        return txinfo
+        return ConfirmationTracker.forClient(client).wait(txid)
 
     @staticmethod
     def sendAlgo(client: algod.AlgodClient, senderAddr: str, receiverAddr: str, signingKey: str, amount: int,
@@ -207,28 +173,28 @@ class Convert:
         """
         Convert microChads to Chads
         """
-        return uChads / 1e6
+        return QuoteEngine.fromMicro(uChads)
 
     @staticmethod
     def chad2uChad(chads: float) -> int:
         """
         Convert Chads to microChads
         """
-        return int(chads * 1e6)
+        return QuoteEngine.toMicro(chads)
 
     @staticmethod
     def uAlgo2Algo(uAlgo: int) -> float:
         """
         Convert microAlgo to Algo
         """
-        return uAlgo / 1e6
+        return QuoteEngine.fromMicro(uAlgo)
 
     @staticmethod
     def algo2uAlgo(algo: float) -> int:
         """
         Convert Algo to microAlgo
         """
-        return int(algo * 1e6)
+        return QuoteEngine.toMicro(algo)
 
 class Indexer:
     """
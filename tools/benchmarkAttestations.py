@@ -0,0 +1,69 @@
+"""
+Compare the admin's rate approval work for per-swap approval transactions against
+price attestations signed once per tick
+
+    python tools/benchmarkAttestations.py --swaps 5000 --ticks 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from algosdk import account, encoding
+from algosdk.future import transaction as algo_txn
+from backend.contracts.chadExchangeApp import ChadExchangeApp
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--swaps", type=int, default=5000)
+parser.add_argument("--ticks", type=int, default=50, help="Price ticks spread across the swaps")
+args = parser.parse_args()
+
+privKey, pubKey = account.generate_account()
+admin = KeyPair(pubKey=pubKey, privKey=privKey)
+buyerPrivKey, buyer = account.generate_account()
+params = algo_txn.SuggestedParams(fee=1000, first=1000, last=2000, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+
+approved = ChadExchangeService(None, admin, minChadTxThresh=20000000, chadID=42)
+attested = ChadExchangeService(None, admin, minChadTxThresh=20000000, chadID=42, attested=True)
+
+def rateAt(swap: int) -> int:
+    tick = swap * args.ticks // args.swaps
+    return ChadExchangeApp.rateFor(3 + tick / 1000)
+
+def groupBytes(signedGroup) -> int:
+    return sum(len(encoding.msgpack_encode(tx)) for tx in signedGroup)
+
+# Admin signs a 0 algo approval payment for every swap
+start = time.perf_counter()
+for swap in range(args.swaps):
+    approvalTx = algo_txn.PaymentTxn(admin.pubKey, params, approved.escrowAddress, 0)
+    approvalTx.sign(admin.privKey)
+perSwapSeconds = time.perf_counter() - start
+
+# Admin signs one attestation per price tick, reused by every swap in the tick
+attestor = attested.attestor
+start = time.perf_counter()
+for swap in range(args.swaps):
+    attestation = attestor.attest(rateAt(swap), params.first)
+    attestation.logicSig(attested.escrowLogicSig)
+perTickSeconds = time.perf_counter() - start
+
+# Wire size of one swap group in each mode
+payTx = algo_txn.PaymentTxn(buyer, params, approved.escrowAddress, 10000000)
+chadTx = algo_txn.AssetTransferTxn(approved.escrowAddress, params, buyer, 30000000, 42)
+approvalTx = algo_txn.PaymentTxn(admin.pubKey, params, approved.escrowAddress, 0)
+approvedGroup = [payTx.sign(buyerPrivKey), algo_txn.LogicSigTransaction(chadTx, approved.escrowLogicSig), approvalTx.sign(admin.privKey)]
+
+payTx = algo_txn.PaymentTxn(buyer, params, attested.escrowAddress, 10000000)
+chadTx = algo_txn.AssetTransferTxn(attested.escrowAddress, params, buyer, 30000000, 42)
+attestedGroup = [payTx.sign(buyerPrivKey), algo_txn.LogicSigTransaction(chadTx, attestation.logicSig(attested.escrowLogicSig))]
+
+print(f"{args.swaps} swaps over {args.ticks} price ticks")
+print(f"  per-swap approval:  {args.swaps:>6} signatures  {perSwapSeconds * 1e3:8.1f} ms  {groupBytes(approvedGroup)} bytes/group")
+print(f"  tick attestation:   {attestor.signatures:>6} signatures  {perTickSeconds * 1e3:8.1f} ms  {groupBytes(attestedGroup)} bytes/group")
+print(f"  admin signing work reduced {perSwapSeconds / perTickSeconds:.1f}x")
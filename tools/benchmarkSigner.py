@@ -0,0 +1,47 @@
+"""
+Compare signing throughput of Transaction.sign against the Signer, in process with
+cached keys and spread over a process pool
+
+    python tools/benchmarkSigner.py --txns 20000 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from algosdk import account
+from algosdk.future import transaction as algo_txn
+from backend.services.signer import Signer
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--txns", type=int, default=20000)
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+args = parser.parse_args()
+
+privKey, sender = account.generate_account()
+_, receiver = account.generate_account()
+params = algo_txn.SuggestedParams(fee=1000, first=1000, last=2000, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=", flat_fee=True)
+txns = [algo_txn.PaymentTxn(sender, params, receiver, i + 1) for i in range(args.txns)]
+
+def rate(sign) -> float:
+    start = time.perf_counter()
+    sign()
+    return args.txns / (time.perf_counter() - start)
+
+baseline = rate(lambda: [txn.sign(privKey) for txn in txns])
+
+inProcess = Signer(workers=1)
+cached = rate(lambda: inProcess.signMany([(txn, privKey) for txn in txns]))
+
+pooled = Signer(workers=args.workers, poolThreshold=0)
+pooled.signMany([(txn, privKey) for txn in txns[:args.workers]])     # Start the workers
+pool = rate(lambda: pooled.signMany([(txn, privKey) for txn in txns]))
+pooled.close()
+
+print(f"{args.txns} payment transactions")
+print(f"  Transaction.sign:       {baseline:>9.0f} sig/s")
+print(f"  Signer, cached keys:    {cached:>9.0f} sig/s  {cached / baseline:.1f}x")
+print(f"  Signer, {args.workers} workers:      {pool:>9.0f} sig/s  {pool / args.workers:.0f} sig/s per core")
@@ -0,0 +1,40 @@
+"""
+Fuzz the exchange escrow logic in process and compare it to the reference spec
+
+    python tools/fuzzExchange.py --iterations 5000000 --chadID 1234 --minChadTxThresh 20000000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from algosdk import account
+from backend.services.chadExchangeService import ChadExchangeService
+from backend.services.keyPair import KeyPair
+from backend.teal.fuzzer import ExchangeFuzzer
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--iterations", type=int, default=1000000)
+parser.add_argument("--workers", type=int, default=None)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--adminAddr", default=None, help="Defaults to a freshly generated address")
+parser.add_argument("--chadID", type=int, default=1)
+parser.add_argument("--minChadTxThresh", type=int, default=20000000)
+args = parser.parse_args()
+
+adminAddr = args.adminAddr or account.generate_account()[1]
+exchange = ChadExchangeService(None, KeyPair(pubKey=adminAddr, privKey=None), args.minChadTxThresh, args.chadID)
+
+report = ExchangeFuzzer.forExchange(exchange, workers=args.workers).run(args.iterations, seed=args.seed)
+print(report.summary())
+
+for example in report.examples:
+    print(f"\n{example.action} {list(example.mutations)} index {example.index}: "
+          f"spec {'allows' if example.expected else 'rejects'}, escrow ended in {example.branch}")
+    for txn in example.group:
+        print(f"  {txn}")
+
+if report.mismatches:
+    sys.exit(1)
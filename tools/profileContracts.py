@@ -0,0 +1,45 @@
+"""
+Report program size and per-branch opcode cost of the exchange contracts, check them
+against the stored baseline and suggest an escrow branch order for a traffic mix
+
+    python tools/profileContracts.py --mix swapAlgoForChad=50,swapChadForAlgo=45,withdrawAlgo=3,withdrawChad=1,optIn=1
+    python tools/profileContracts.py --update-baseline
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from backend.teal.profiler import ContractProfiler
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--mix", default=None, help="Comma separated action=weight traffic mix")
+parser.add_argument("--update-baseline", action="store_true")
+args = parser.parse_args()
+
+profiles = ContractProfiler.profileAll()
+for profile in profiles:
+    print(profile.summary())
+
+if args.update_baseline:
+    ContractProfiler.saveBaseline(profiles)
+    print(f"\nBaseline written to {ContractProfiler.baselinePath}")
+    sys.exit(0)
+
+regressions = ContractProfiler.regressions(profiles, ContractProfiler.loadBaseline())
+if regressions:
+    print("\nRegressions against baseline:")
+    for regression in regressions:
+        print(f"  {regression}")
+
+if args.mix:
+    mix = {action: float(weight) for action, weight in (item.split("=") for item in args.mix.split(","))}
+    ranked = ContractProfiler.suggestBranchOrder(mix)
+    current = profiles[0].expectedCost(mix)
+    print(f"\nMean escrow cost for mix with current order: {current:.1f}")
+    for cost, order in ranked[:3]:
+        print(f"  {cost:6.1f}  {order}")
+
+sys.exit(1 if regressions else 0)
@@ -0,0 +1,36 @@
+"""
+Compile every exchange program variant with algod and store the bytecode, so the
+local assembler can be checked against it offline. Run against the sandbox after any
+contract change, then run backend/test/teal/test_algodPrograms.py
+
+    python tools/recordAlgodPrograms.py
+    python tools/recordAlgodPrograms.py --algod http://localhost:4001 --token aaaa...
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from algosdk.v2client import algod
+from backend.services.networkInteraction import NetworkInteraction
+from backend.teal.algodPrograms import AlgodPrograms
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--algod", default="http://localhost:4001")
+parser.add_argument("--token", default="a" * 64)
+args = parser.parse_args()
+
+client = algod.AlgodClient(algod_token=args.token, algod_address=args.algod)
+print(f"Recording with algod {client.versions().get('build', {})}")
+
+recorded = AlgodPrograms.record(lambda source: NetworkInteraction.compile_program(client, source))
+AlgodPrograms.save(recorded)
+
+mismatches = AlgodPrograms.mismatches(recorded)
+print(f"{len(recorded)} programs written to {AlgodPrograms.fixturePath}")
+for mismatch in mismatches:
+    print(f"  {mismatch}")
+
+sys.exit(1 if mismatches else 0)